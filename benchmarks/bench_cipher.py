@@ -0,0 +1,61 @@
+"""Entry cipher throughput: the Fernet path against AES-256-GCM and ChaCha20-Poly1305.
+
+Run from the repo root:
+    PYTHONPATH=src python benchmarks/bench_cipher.py --ops 50000
+"""
+import argparse
+import base64
+import sys
+import time
+
+from cryptography.fernet import Fernet
+
+from lockr.ciphers import CIPHERS, CipherEngine, entry_aad
+
+
+def ops_per_second(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=50_000)
+    parser.add_argument("--size", type=int, default=24, help="plaintext bytes per entry")
+    args = parser.parse_args()
+
+    key = Fernet.generate_key()
+    plaintext = b"x" * args.size
+    aads = [entry_aad(i, f"site{i}.example.com") for i in range(args.ops)]
+
+    # What CryptoManager did before the AEAD engine: raw Fernet tokens in BLOBs
+    fernet = Fernet(key)
+    tokens = [base64.urlsafe_b64decode(fernet.encrypt(plaintext)) for _ in range(args.ops)]
+    results = {
+        "fernet": (
+            ops_per_second(lambda aad: base64.urlsafe_b64decode(fernet.encrypt(plaintext)), aads),
+            ops_per_second(lambda token: fernet.decrypt(base64.urlsafe_b64encode(token)), tokens),
+            len(tokens[0]),
+        )
+    }
+
+    for name in CIPHERS:
+        engine = CipherEngine(key, name)
+        pairs = [(engine.encrypt(plaintext, aad), aad) for aad in aads]
+        results[name] = (
+            ops_per_second(lambda aad: engine.encrypt(plaintext, aad), aads),
+            ops_per_second(lambda pair: engine.decrypt(*pair), pairs),
+            len(pairs[0][0]),
+        )
+
+    print(f"{args.ops} operations on {args.size}-byte plaintexts")
+    print(f"{'cipher':<20}{'encrypt/s':>12}{'decrypt/s':>12}{'bytes':>8}")
+    for name, (encrypt, decrypt, size) in results.items():
+        print(f"{name:<20}{encrypt:>12.0f}{decrypt:>12.0f}{size:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
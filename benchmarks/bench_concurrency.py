@@ -0,0 +1,155 @@
+"""Multi-process stress test: concurrent writer and reader processes on one vault.
+
+Run from the repo root:
+    PYTHONPATH=src python benchmarks/bench_concurrency.py --writers 4 --readers 4 --seconds 10
+
+Each writer repeatedly picks one of a few hot entries, reads the counter
+stored as its password, and writes it back incremented, conditional on the
+version it read; a ConflictError means another process got there first, and
+the writer simply makes its next attempt. Readers decrypt random entries and page through the
+entry list. Afterwards the counters must add up to the committed increments:
+any shortfall is a lost update. --blind writes without the version check, as
+update_password used to.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from lockr.crypto import CryptoManager
+from lockr.database import ConflictError, DatabaseManager, VaultBusyError
+from vaultgen import MASTER_PASSWORD, build_vault
+
+
+def open_vault(path):
+    database = DatabaseManager(db_path=path)
+    crypto = CryptoManager(database)
+    if not crypto.unlock(MASTER_PASSWORD):
+        raise RuntimeError(f"{path} was not generated by vaultgen.py")
+    return database, crypto
+
+
+def read_counter(database, crypto, pw_id):
+    # (counter, version, website) of a hot entry
+    pw_id, website, _, token, version = database.fetch_password_entry(pw_id)
+    return int(crypto.decrypt_entry(pw_id, website, version, token)), version, website
+
+
+def writer(path, hot, blind, seed, ready, start, stop, results):
+    database, crypto = open_vault(path)
+    rng = random.Random(seed)
+    counts, latencies = Counter(), []
+    ready.wait()
+    start.wait()
+    while not stop.is_set():
+        pw_id = rng.choice(hot)
+        began = time.perf_counter()
+        try:
+            value, version, website = read_counter(database, crypto, pw_id)
+            token = crypto.encrypt_entry(pw_id, website, str(value + 1))
+            database.update_password(pw_id, encrypted_password=token, expected_version=None if blind else version)
+            counts["commits"] += 1
+            latencies.append(time.perf_counter() - began)
+        except ConflictError:
+            counts["conflicts"] += 1
+        except VaultBusyError:
+            counts["busy"] += 1
+    database.close()
+    results.put((counts, latencies))
+
+
+def reader(path, rows, seed, ready, start, stop, results):
+    database, crypto = open_vault(path)
+    rng = random.Random(seed)
+    counts = Counter()
+    ready.wait()
+    start.wait()
+    while not stop.is_set():
+        try:
+            if counts["reads"] % 10 == 9:
+                database.fetch_passwords_page(50)
+            else:
+                pw_id, website, _, token, version = database.fetch_password_entry(rng.randint(1, rows))
+                crypto.decrypt_entry(pw_id, website, version, token)
+            counts["reads"] += 1
+        except VaultBusyError:
+            counts["busy"] += 1
+    database.close()
+    results.put((counts, []))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--hot", type=int, default=4, help="entries the writers contend on")
+    parser.add_argument("--blind", action="store_true", help="write without the version check")
+    args = parser.parse_args()
+
+    # spawn on every platform, so each process opens its own connections from scratch
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        database, crypto = build_vault(path, args.rows)
+        hot = list(range(1, args.hot + 1))
+        for pw_id in hot:
+            website = database.fetch_password_entry(pw_id)[1]
+            database.update_password(pw_id, encrypted_password=crypto.encrypt_entry(pw_id, website, "0"))
+        database.close()
+
+        # Everyone unlocks first, so key derivation is not part of the measured window
+        ready = context.Barrier(args.writers + args.readers + 1)
+        start, stop, results = context.Event(), context.Event(), context.Queue()
+        processes = [
+            context.Process(target=writer, args=(path, hot, args.blind, i, ready, start, stop, results))
+            for i in range(args.writers)
+        ] + [
+            context.Process(target=reader, args=(path, args.rows, 1000 + i, ready, start, stop, results))
+            for i in range(args.readers)
+        ]
+        for process in processes:
+            process.start()
+        ready.wait()
+        start.set()
+        began = time.perf_counter()
+        time.sleep(args.seconds)
+        stop.set()
+        counts, latencies = Counter(), []
+        for _ in processes:
+            process_counts, process_latencies = results.get()
+            counts.update(process_counts)
+            latencies.extend(process_latencies)
+        elapsed = time.perf_counter() - began
+        for process in processes:
+            process.join()
+
+        database, crypto = open_vault(path)
+        total = sum(read_counter(database, crypto, pw_id)[0] for pw_id in hot)
+        database.close()
+
+    attempts = counts["commits"] + counts["conflicts"]
+    lost = counts["commits"] - total
+    print(f"{args.writers} writers and {args.readers} readers on {args.hot} hot entries for {elapsed:.1f}s"
+          f"{' (blind writes)' if args.blind else ''}")
+    print(f"writes/s        {counts['commits'] / elapsed:>10.1f}")
+    print(f"reads/s         {counts['reads'] / elapsed:>10.1f}")
+    print(f"conflict rate   {counts['conflicts'] / attempts if attempts else 0:>10.1%}")
+    if latencies:
+        latencies.sort()
+        print(f"write p50 ms    {statistics.median(latencies) * 1000:>10.2f}")
+        print(f"write p99 ms    {latencies[int(len(latencies) * 0.99)] * 1000:>10.2f}")
+    print(f"busy timeouts   {counts['busy']:>10}")
+    print(f"lost updates    {lost:>10}")
+    # Conflicts are expected; silently lost writes and busy timeouts are failures
+    return 1 if (lost and not args.blind) or counts["busy"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Per-operation latency of DatabaseManager against the old connect-per-call pattern.
+
+Run from the repo root:
+    PYTHONPATH=src python benchmarks/bench_database.py --rows 100000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from lockr.database import DatabaseManager
+
+
+class ConnectPerCallDatabase:
+    # Mirrors the previous DatabaseManager: one sqlite3.connect per method call
+    def __init__(self, path):
+        self.DB_PATH = path
+
+    def get_master_hash(self):
+        with sqlite3.connect(self.DB_PATH) as connection:
+            row = connection.execute("SELECT password_hash FROM master_password WHERE id = 1").fetchone()
+            return row[0] if row else None
+
+    def fetch_passwords_by_id(self, pw_id):
+        with sqlite3.connect(self.DB_PATH) as connection:
+            row = connection.execute("SELECT password FROM passwords WHERE id = ?", (pw_id,)).fetchone()
+            return row[0] if row else None
+
+    def insert_passsword(self, website, username, encrypted_password):
+        with sqlite3.connect(self.DB_PATH) as connection:
+            cursor = connection.execute(
+                "INSERT INTO passwords (website, username, password) VALUES (?, ?, ?)",
+                (website, username, encrypted_password)
+            )
+            connection.commit()
+            return cursor.lastrowid
+
+    def update_password(self, pw_id, encrypted_password):
+        with sqlite3.connect(self.DB_PATH) as connection:
+            connection.execute("UPDATE passwords SET password = ? WHERE id = ?", (encrypted_password, pw_id))
+            connection.commit()
+
+
+def seed(database, rows):
+    token = "x" * 160
+    with database.transaction() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO master_password (id, password_hash) VALUES (1, ?)", (b"hash",)
+        )
+        connection.executemany(
+            "INSERT INTO passwords (website, username, password) VALUES (?, ?, ?)",
+            ((f"site{i}.example", f"user{i}", token) for i in range(rows)),
+        )
+
+
+def measure(func, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def run(database, rows, iterations):
+    ids = [random.randint(1, rows) for _ in range(iterations)]
+    return {
+        "get_master_hash": measure(lambda i: database.get_master_hash(), iterations),
+        "fetch_passwords_by_id": measure(lambda i: database.fetch_passwords_by_id(ids[i]), iterations),
+        "insert_passsword": measure(
+            lambda i: database.insert_passsword(f"bench{i}.example", "bench", "y" * 160), iterations
+        ),
+        "update_password": measure(lambda i: database.update_password(ids[i], encrypted_password="z" * 160), iterations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        database = DatabaseManager(db_path=path)
+        seed(database, args.rows)
+
+        before = run(ConnectPerCallDatabase(path), args.rows, args.iterations)
+        after = run(database, args.rows, args.iterations)
+        database.close()
+
+    print(f"{args.rows} rows, {args.iterations} iterations per operation (microseconds/op)")
+    print(f"{'operation':<24}{'connect-per-call':>18}{'pooled':>12}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<24}{before[name]:>18.1f}{after[name]:>12.1f}{before[name] / after[name]:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Lookup latency on sealed metadata: blind-index queries against the plaintext scan.
+
+Run from the repo root:
+    PYTHONPATH=src python benchmarks/bench_metadata.py --rows 100000
+
+Builds a synthetic vault, times find() while websites and usernames are
+plaintext (a normalizing scan, plus a bare LIKE scan), seals the vault, and
+times the same lookups again through the HMAC blind indexes.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from lockr.metadata import MetadataManager
+from vaultgen import build_vault
+
+
+def like_scan(database, website, limit):
+    # Substring match over every plaintext row, the cheapest scan there is
+    pattern = f"%{website}%"
+    return database.connection.execute(
+        "SELECT id, website, username, created_at FROM passwords WHERE website LIKE ? LIMIT ?",
+        (pattern, limit),
+    ).fetchall()
+
+
+def measure(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        database, crypto = build_vault(os.path.join(tmp, "bench.db"), args.rows)
+        print(f"built {args.rows} entries in {time.perf_counter() - start:.1f}s")
+
+        # Lookups built from a real row: its site as a URL, the bare site, and its user
+        _, website, username, _, _ = database.fetch_password_entry(args.rows // 2)
+        lookups = {
+            "domain (url)": lambda: database.find_passwords(website=f"https://www.{website}/login"),
+            "exact site": lambda: database.find_passwords(website=website, exact=True),
+            "username": lambda: database.find_passwords(username=username),
+            "site + user": lambda: database.find_passwords(website=website, username=username),
+        }
+        scans = max(1, args.iterations // 20)
+
+        plain = {name: measure(lookup, scans) for name, lookup in lookups.items()}
+        like = measure(lambda: like_scan(database, website, 20), scans)
+        page = measure(lambda: database.fetch_passwords_page(limit=50), args.iterations)
+
+        stats = MetadataManager(database, crypto).seal()
+        print(f"sealed {stats['rows']} entries in {stats['seconds']:.1f}s "
+              f"({stats['rows_per_second']:.0f} rows/s); "
+              f"database {os.path.getsize(database.DB_PATH) / 1e6:.1f} MB")
+
+        print(f"{'lookup':<16}{'plain scan ms':>15}{'sealed ms':>11}{'hits':>6}")
+        for name, lookup in lookups.items():
+            sealed = measure(lookup, args.iterations)
+            print(f"{name:<16}{plain[name]:>15.3f}{sealed:>11.3f}{len(lookup()):>6}")
+        print(f"{'like scan':<16}{like:>15.3f}{'-':>11}")
+        sealed_page = measure(lambda: database.fetch_passwords_page(limit=50), args.iterations)
+        print(f"{'page of 50':<16}{page:>15.3f}{sealed_page:>11.3f}")
+        database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Search latency: the FTS5 index against a LIKE scan of the passwords table.
+
+Run from the repo root:
+    PYTHONPATH=src python benchmarks/bench_search.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from lockr.database import DatabaseManager
+
+WORDS = ["mail", "bank", "shop", "cloud", "git", "news", "forum", "video", "music", "travel", "games", "photo"]
+
+
+def seed(database, rows):
+    rng = random.Random(7)
+    with database.transaction() as connection:
+        connection.executemany(
+            "INSERT INTO passwords (website, username, password) VALUES (?, ?, ?)",
+            (
+                (f"{rng.choice(WORDS)}{rng.choice(WORDS)}{i}.example.com", f"user{i}@{rng.choice(WORDS)}.org", "x")
+                for i in range(rows)
+            ),
+        )
+
+
+def like_scan(database, query, limit):
+    # What the old table scan amounts to: a substring match over every row
+    pattern = f"%{query}%"
+    return database.connection.execute(
+        "SELECT id, website, username, created_at FROM passwords WHERE website LIKE ? OR username LIKE ? LIMIT ?",
+        (pattern, pattern, limit),
+    ).fetchall()
+
+
+def measure(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = DatabaseManager(db_path=os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        seed(database, args.rows)
+        print(f"seeded {args.rows} rows with the search index in {time.perf_counter() - start:.1f}s")
+
+        # Queries built from a real row: its first word, a prefix of it, and a typo
+        website = database.fetch_password_entry(args.rows // 2)[1]
+        word = website.split(".")[0]
+        queries = {
+            "exact word": word,
+            "prefix": word[:-2],
+            "typo": word[:-3] + word[-2] + word[-3] + word[-1],
+            "common word": "example",
+        }
+
+        print(f"{'query':<16}{'fts ms':>10}{'like scan ms':>14}{'hits':>6}")
+        for name, query in queries.items():
+            fts = measure(lambda: database.search_passwords(query, 20), args.iterations)
+            scan = measure(lambda: like_scan(database, query, 20), max(1, args.iterations // 10))
+            hits = len(database.search_passwords(query, 20))
+            print(f"{name:<16}{fts:>10.3f}{scan:>14.3f}{hits:>6}")
+        database.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Secret handling in the crypto path: str plaintexts against SecretBuffer.
+
+Run from the repo root:
+    PYTHONPATH=src python benchmarks/bench_secrets.py --ops 20000
+
+For each path this reports operations per second, the peak bytes Python
+allocates per operation (tracemalloc), and, on Linux, how many copies of the
+plaintexts are still readable in the process's memory after every reference
+to them has been dropped.
+"""
+import argparse
+import gc
+import json
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from cryptography.fernet import Fernet
+
+from lockr.ciphers import CipherEngine, entry_aad
+from lockr.crypto import CryptoManager
+from lockr.secretbuffer import SecretBuffer
+
+MARKER = b"lockr-bench-secret-"
+
+
+def readable_copies(pattern):
+    # Occurrences of pattern in this process's writable mappings (Linux only)
+    count = 0
+    with open("/proc/self/maps") as maps, open("/proc/self/mem", "rb", buffering=0) as memory:
+        for line in maps:
+            addresses, permissions = line.split()[:2]
+            if not permissions.startswith("rw"):
+                continue
+            start, end = (int(value, 16) for value in addresses.split("-"))
+            try:
+                memory.seek(start)
+                count += len(re.findall(pattern, memory.read(end - start)))
+            except (OSError, OverflowError, ValueError):
+                continue
+    return count
+
+
+def run(func, items):
+    # (ops per second, peak bytes allocated during one operation)
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    rate = len(items) / (time.perf_counter() - start)
+
+    peaks = []
+    tracemalloc.start()
+    for item in items[:1000]:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func(item)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return rate, sum(peaks) / len(peaks)
+
+
+PATHS = (
+    "decrypt -> str (before)",
+    "decrypt -> SecretBuffer",
+    "decrypt into reused scratch",
+    "re-encrypt via str (before)",
+    "re-encrypt via scratch",
+)
+
+
+def measure_path(path, ops):
+    engine = CipherEngine(Fernet.generate_key())
+    # Every plaintext is unique, so leftover copies can be told apart from live data
+    rows = []
+    for i in range(ops):
+        aad = entry_aad(i, "example.com")
+        rows.append((engine.encrypt(MARKER + f"{i:08d}".encode(), aad), aad))
+    gc.collect()
+    pattern = re.escape(MARKER) + rb"\d{8}"
+    scan = sys.platform.startswith("linux")
+    baseline = readable_copies(pattern) if scan else 0
+
+    scratch = SecretBuffer(256)
+    digest = bytearray(1)
+
+    def decrypt_str(row):
+        # What every caller used to get: bytes from the AEAD, then a decoded str
+        plaintext = engine.decrypt(*row).decode("utf-8")
+        digest[0] ^= ord(plaintext[-1])
+
+    def decrypt_secret(row):
+        with engine.decrypt_secret(*row) as secret:
+            digest[0] ^= secret.view()[-1]
+
+    def decrypt_scratch(row):
+        digest[0] ^= engine.decrypt_into(*row, scratch)[-1]
+
+    def encrypt_str(row):
+        plaintext = engine.decrypt(*row).decode("utf-8")
+        CryptoManager.encrypt_token(engine, plaintext, row[1])
+
+    def encrypt_scratch(row):
+        engine.encrypt(engine.decrypt_into(*row, scratch), row[1])
+
+    funcs = dict(zip(PATHS, (decrypt_str, decrypt_secret, decrypt_scratch, encrypt_str, encrypt_scratch)))
+    rate, peak = run(funcs[path], rows)
+    scratch.wipe()
+    gc.collect()
+    copies = readable_copies(pattern) - baseline if scan else None
+    return rate, peak, copies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=20_000)
+    parser.add_argument("--path", choices=PATHS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.path:
+        print(json.dumps(measure_path(args.path, args.ops)))
+        return 0
+
+    print(f"{args.ops} entries; bytes/op is the peak Python allocation during one operation")
+    print(f"{'path':<34}{'ops/s':>10}{'bytes/op':>10}{'copies left':>13}")
+    for path in PATHS:
+        # A fresh interpreter per path, so no path inherits another's leftovers
+        output = subprocess.run(
+            [sys.executable, __file__, "--ops", str(args.ops), "--path", path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        rate, peak, copies = json.loads(output)
+        print(f"{path:<34}{rate:>10.0f}{peak:>10.0f}{'n/a' if copies is None else copies:>13}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
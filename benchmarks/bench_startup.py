@@ -0,0 +1,79 @@
+"""Import time and CLI startup latency, checked against a time budget.
+
+Run from the repo root:
+    PYTHONPATH=src python benchmarks/bench_startup.py --budget-ms 150
+
+Exits non-zero when any measured startup path exceeds the budget.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def wall_time(argv, env, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def import_times(module, env):
+    # Cumulative self+children microseconds per module from -X importtime
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True, check=False,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="allowed startup overhead above bare Python")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, XDG_DATA_HOME=tmp, LOCKR_AGENT_SOCK=os.path.join(tmp, "agent.sock"))
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.abspath("src"), env.get("PYTHONPATH")]))
+
+        # Create the vault once so later runs measure the warm path
+        subprocess.run([sys.executable, "-c", "from lockr.database import DatabaseManager; DatabaseManager()"], env=env, check=True)
+
+        baseline = wall_time([sys.executable, "-c", "pass"], env, args.runs)
+        paths = {
+            "import lockr.main": [sys.executable, "-c", "import lockr.main"],
+            "lockr --help": [sys.executable, "-m", "lockr.main", "--help"],
+            "lockr agent status": [sys.executable, "-m", "lockr.main", "agent", "status"],
+            "open vault": [sys.executable, "-c", "from lockr.database import DatabaseManager; DatabaseManager()"],
+        }
+        results = {name: wall_time(argv, env, args.runs) - baseline for name, argv in paths.items()}
+        modules = import_times("lockr.main", env)
+
+    print(f"startup overhead above bare Python ({baseline:.1f} ms), median of {args.runs} runs")
+    over_budget = False
+    for name, elapsed in results.items():
+        flag = "" if elapsed <= args.budget_ms else "  OVER BUDGET"
+        over_budget = over_budget or bool(flag)
+        print(f"{name:<24}{elapsed:>9.1f} ms{flag}")
+
+    print("\nslowest imports under lockr.main (cumulative ms)")
+    for name, elapsed in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:8]:
+        print(f"{name:<40}{elapsed:>9.1f}")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Ciphertext storage: base64 TEXT rows against raw BLOB rows.
+
+Run from the repo root:
+    PYTHONPATH=src python benchmarks/bench_storage.py --rows 100000
+
+Builds a vault, rewrites a copy into the pre-BLOB layout, then reports file
+size, per-decrypt time and how long the in-place migration takes.
+"""
+import argparse
+import base64
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from lockr.crypto import CryptoManager
+from lockr.database import DatabaseManager
+
+
+def file_size(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    connection.execute("VACUUM")
+    connection.close()
+    return os.path.getsize(path)
+
+
+def downgrade(path):
+    # The layout before raw BLOBs: base64 text of the urlsafe-base64 token, schema version 5
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.create_function("legacy_token", 1, lambda raw: base64.b64encode(base64.urlsafe_b64encode(raw)).decode())
+    connection.execute("UPDATE passwords SET password = legacy_token(password)")
+    connection.execute("UPDATE schema_version SET version = 5")
+    connection.close()
+
+
+def per_decrypt(decrypt, tokens):
+    start = time.perf_counter()
+    for token in tokens:
+        decrypt(token)
+    return (time.perf_counter() - start) / len(tokens) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sample", type=int, default=20_000, help="rows decrypted for the timing")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        blob_path = os.path.join(tmp, "blob.db")
+        text_path = os.path.join(tmp, "text.db")
+
+        database = DatabaseManager(db_path=blob_path)
+        crypto = CryptoManager(database)
+        crypto.initialize_key("benchmark password")
+        # Raw Fernet tokens: the row format both layouts are compared with
+        def fernet_token(plaintext):
+            return base64.urlsafe_b64decode(crypto.fernet.encrypt(plaintext.encode()))
+
+        with database.transaction():
+            database.insert_passwords_bulk(
+                (i + 1, f"site{i}.example.com", f"user{i}", fernet_token(f"hunter2-{i:08d}")) for i in range(args.rows)
+            )
+        database.close()
+
+        shutil.copy(blob_path, text_path)
+        downgrade(text_path)
+        text_size = file_size(text_path)
+        blob_size = file_size(blob_path)
+
+        connection = sqlite3.connect(text_path)
+        text_tokens = [row[0] for row in connection.execute("SELECT password FROM passwords LIMIT ?", (args.sample,))]
+        connection.close()
+        text_us = per_decrypt(lambda token: crypto.fernet.decrypt(base64.b64decode(token)), text_tokens)
+
+        database = DatabaseManager(db_path=blob_path)
+        blob_tokens = [row[0] for row in database.connection.execute("SELECT password FROM passwords LIMIT ?", (args.sample,))]
+        blob_us = per_decrypt(crypto.decrypt, blob_tokens)
+        database.close()
+
+        start = time.perf_counter()
+        DatabaseManager(db_path=text_path).close()
+        migration = time.perf_counter() - start
+
+    print(f"{args.rows} rows")
+    print(f"{'layout':<16}{'db size (KiB)':>16}{'avg token (B)':>16}{'decrypt (us)':>16}")
+    print(f"{'base64 TEXT':<16}{text_size / 1024:>16.0f}{sum(map(len, text_tokens)) / len(text_tokens):>16.1f}{text_us:>16.2f}")
+    print(f"{'raw BLOB':<16}{blob_size / 1024:>16.0f}{sum(map(len, blob_tokens)) / len(blob_tokens):>16.1f}{blob_us:>16.2f}")
+    print(f"size saved {1 - blob_size / text_size:.0%}; migration of the TEXT vault took {migration:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
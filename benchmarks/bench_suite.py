@@ -0,0 +1,180 @@
+"""Benchmark suite: the real lockr code paths over synthetic vaults from 1k to 1M entries.
+
+Run from the repo root:
+    PYTHONPATH=src python benchmarks/bench_suite.py --output baseline.json
+    PYTHONPATH=src python benchmarks/bench_suite.py --sizes 1000,10000 --compare baseline.json
+
+Results are written as JSON (median, p95 and mean milliseconds per operation
+and vault size). With --compare the run is diffed against an earlier result
+file and the exit status is non-zero when any operation's median regressed by
+more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import cryptography
+from cryptography.fernet import Fernet
+
+from lockr.ciphers import cipher_from_env
+from lockr.crypto import CryptoManager
+from lockr.database import DatabaseManager
+from lockr.rotation import RotationEngine
+from lockr.service import VaultService
+from vaultgen import MASTER_PASSWORD, SITES, build_vault
+
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+
+
+def measure(func, runs):
+    samples = []
+    for i in range(runs):
+        start = time.perf_counter()
+        func(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "mean_ms": statistics.fmean(samples),
+        "runs": runs,
+    }
+
+
+def open_vault(path, rows):
+    # Reuse a vault left by an earlier run (--vault-dir), otherwise generate it
+    if os.path.exists(path):
+        database = DatabaseManager(db_path=path)
+        crypto = CryptoManager(database)
+        if not crypto.unlock(MASTER_PASSWORD):
+            raise RuntimeError(f"{path} was not generated by vaultgen.py")
+        return database, crypto, None
+    start = time.perf_counter()
+    database, crypto = build_vault(path, rows)
+    return database, crypto, time.perf_counter() - start
+
+
+def run_size(path, rows, args):
+    database, crypto, generated = open_vault(path, rows)
+    service = VaultService(database, crypto)
+    rng = random.Random(rows)
+    max_id = database.connection.execute("SELECT max(id) FROM passwords").fetchone()[0]
+    ids = [rng.randint(1, max_id) for _ in range(args.lookups)]
+
+    results = {
+        "unlock": measure(lambda i: CryptoManager(database).unlock(MASTER_PASSWORD), args.kdf_runs),
+        "add": measure(
+            lambda i: service.handle({"op": "put", "website": f"bench{i}.example", "username": "bench", "password": "x" * 20}),
+            args.writes,
+        ),
+        "lookup": measure(lambda i: service.handle({"op": "get", "id": ids[i]}), args.lookups),
+        "list": measure(lambda i: database.fetch_passwords_meta(), args.list_runs),
+        "page": measure(lambda i: database.fetch_passwords_page(21), args.lookups),
+        "search": measure(lambda i: database.search_passwords(rng.choice(SITES)), args.lookups),
+        # Rewraps the data key; the password stays the same so the vault remains reusable
+        "master_change": measure(lambda i: crypto.change_master_password(MASTER_PASSWORD), args.kdf_runs),
+    }
+
+    def rekey(i):
+        new_key = Fernet.generate_key()
+        RotationEngine(database, crypto).rotate(new_key, on_commit=lambda: crypto.store_data_key(new_key))
+        crypto.set_key(new_key)
+
+    results["rekey"] = measure(rekey, 1)
+    database.close()
+
+    summary = {"operations": results}
+    if generated is not None:
+        summary["generate_s"] = generated
+    return summary
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "cryptography": cryptography.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "cipher": cipher_from_env(),
+    }
+
+
+def compare(current, baseline, threshold):
+    # Median ratios for every (size, operation) present in both runs, on stderr
+    regressions = []
+    print(f"\n{'rows':>9} {'operation':<14}{'baseline ms':>13}{'current ms':>13}{'ratio':>8}", file=sys.stderr)
+    for rows, summary in current["results"].items():
+        old = baseline.get("results", {}).get(rows)
+        if not old:
+            continue
+        for name, stats in summary["operations"].items():
+            before = old["operations"].get(name)
+            if not before or not before["median_ms"]:
+                continue
+            ratio = stats["median_ms"] / before["median_ms"]
+            flag = "  REGRESSION" if ratio > 1 + threshold else ""
+            if flag:
+                regressions.append((rows, name))
+            print(
+                f"{rows:>9} {name:<14}{before['median_ms']:>13.3f}{stats['median_ms']:>13.3f}{ratio:>7.2f}x{flag}",
+                file=sys.stderr,
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated vault sizes")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="results JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.20, help="allowed median slowdown for --compare")
+    parser.add_argument("--vault-dir", help="keep generated vaults here and reuse them across runs")
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--list-runs", type=int, default=3)
+    parser.add_argument("--kdf-runs", type=int, default=3)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = {"environment": environment(), "results": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.vault_dir or tmp
+        os.makedirs(directory, exist_ok=True)
+        for rows in sizes:
+            print(f"benchmarking {rows} entries...", file=sys.stderr)
+            report["results"][str(rows)] = run_size(os.path.join(directory, f"vault-{rows}.db"), rows, args)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(report, json.load(handle), args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
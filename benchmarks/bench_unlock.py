@@ -0,0 +1,57 @@
+"""Unlock CPU time: legacy bcrypt + PBKDF2 against the single-pass KDF.
+
+Run from the repo root:
+    PYTHONPATH=src python benchmarks/bench_unlock.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import bcrypt
+
+from lockr.crypto import CryptoManager, DEFAULT_KDF, DEFAULT_KDF_PARAMS
+from lockr.database import DatabaseManager
+
+
+def legacy_unlock(password, stored_hash, salt):
+    # What Server.authenticate used to pay: bcrypt check, then a separate PBKDF2
+    bcrypt.checkpw(password.encode(), stored_hash)
+    CryptoManager.derive_master_secret(password, salt, DEFAULT_KDF, DEFAULT_KDF_PARAMS)
+
+
+def measure(func, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.process_time()
+        func()
+        samples.append(time.process_time() - start)
+    return min(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    with tempfile.TemporaryDirectory() as tmp:
+        database = DatabaseManager(db_path=os.path.join(tmp, "bench.db"))
+        CryptoManager(database).initialize_key(password)
+
+        stored_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt())
+        salt = database.get_encryption_salt()
+        before = measure(lambda: legacy_unlock(password, stored_hash, salt), args.rounds)
+        after = measure(lambda: CryptoManager(database).unlock(password), args.rounds)
+        database.close()
+
+    print(f"unlock CPU time, best of {args.rounds} (milliseconds)")
+    print(f"{'bcrypt + PBKDF2':<20}{before:>10.1f}")
+    print(f"{'single KDF pass':<20}{after:>10.1f}")
+    print(f"{'speedup':<20}{before / after:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Synthetic vault generator shared by the benchmark scripts.
+
+Run from the repo root to write a standalone vault:
+    PYTHONPATH=src python benchmarks/vaultgen.py --rows 100000 --out /tmp/vault.db
+
+Entries are deterministic for a given seed and encrypted with the real
+CryptoManager, so generated vaults unlock and decrypt like real ones.
+"""
+import argparse
+import random
+import string
+import sys
+import time
+
+from lockr.crypto import CryptoManager
+from lockr.database import DatabaseManager
+
+MASTER_PASSWORD = "benchmark master password"
+CHUNK_ROWS = 10_000
+
+SITES = ["mail", "bank", "shop", "cloud", "git", "news", "forum", "video", "music", "travel", "games", "photo"]
+TLDS = ["com", "org", "net", "io", "dev", "co.uk"]
+ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*"
+
+
+def synthetic_entries(rows, seed=0):
+    """(website, username, password) tuples resembling a real export."""
+    rng = random.Random(seed)
+    for i in range(rows):
+        site = f"{rng.choice(SITES)}{rng.choice(SITES)}{i}.{rng.choice(TLDS)}"
+        username = f"user{rng.randrange(rows)}@{rng.choice(SITES)}.{rng.choice(TLDS)}"
+        password = "".join(rng.choices(ALPHABET, k=rng.randint(12, 24)))
+        yield site, username, password
+
+
+def build_vault(path, rows, password=MASTER_PASSWORD, seed=0):
+    """Create a vault at path holding rows entries; returns (database, unlocked crypto)."""
+    database = DatabaseManager(db_path=path)
+    crypto = CryptoManager(database)
+    crypto.initialize_key(password)
+
+    entries = synthetic_entries(rows, seed)
+    while True:
+        chunk = [entry for _, entry in zip(range(CHUNK_ROWS), entries)]
+        if not chunk:
+            break
+        with database.transaction():
+            first_id = database.reserve_password_ids(len(chunk))
+            database.insert_passwords_bulk(
+                (first_id + offset, website, username, crypto.encrypt_entry(first_id + offset, website, secret))
+                for offset, (website, username, secret) in enumerate(chunk)
+            )
+    return database, crypto
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--out", required=True, help="path of the vault database to create")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    database, _ = build_vault(args.out, args.rows, seed=args.seed)
+    database.close()
+    print(f"wrote {args.rows} entries to {args.out} in {time.perf_counter() - start:.1f}s "
+          f"(master password: {MASTER_PASSWORD!r})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
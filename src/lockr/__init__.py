@@ -1,4 +1,14 @@
 # Package initializer for lockr
-from .main import main
-from .manager import Server
-__all__ = ["main", "Server"]
\ No newline at end of file
+# Exports resolve lazily so `python -m lockr.main <command>` only imports what that command needs.
+__all__ = ["main", "Server"]
+
+def __getattr__(name):
+    if name == "main":
+        from .main import main
+    elif name == "Server":
+        from .manager import Server
+    else:
+        raise AttributeError(f"module 'lockr' has no attribute {name!r}")
+    # Cache on the package; for "main" this also shadows the submodule, as before
+    globals()[name] = locals()[name]
+    return globals()[name]
@@ -0,0 +1,165 @@
+import getpass
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+SOCKET_ENV = "LOCKR_AGENT_SOCK"
+
+
+def agent_socket_path(vault=None):
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+
+    # One agent per vault; the default vault keeps the original socket name
+    from .database import DEFAULT_VAULT, VAULT_ENV
+
+    vault = vault or os.environ.get(VAULT_ENV) or DEFAULT_VAULT
+    filename = "agent.sock" if vault == DEFAULT_VAULT else f"agent-{vault}.sock"
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base:
+        return os.path.join(base, "lockr", filename)
+    return os.path.join(tempfile.gettempdir(), f"lockr-{getpass.getuser()}", filename)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+                response = self.server.agent.dispatch(request)
+            except ValueError as e:
+                response = {"ok": False, "error": f"invalid request: {e}"}
+            except RuntimeError as e:
+                # Includes database.VaultError: the client gets a reply, not a dropped connection
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class AgentServer:
+    """ssh-agent style holder of the unlocked data key.
+
+    Serves VaultService requests as JSON lines over a Unix socket that only the
+    owning user can reach. The key is dropped on a lock request or after idle_timeout
+    seconds without requests; the process itself keeps running until stopped.
+    """
+
+    def __init__(self, service, socket_path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("The unlock agent requires Unix domain sockets.")
+        self.service = service
+        self.crypto = service.crypto
+        self.socket_path = socket_path or agent_socket_path()
+        self.idle_timeout = idle_timeout
+        self.last_activity = time.monotonic()
+        self.server = None
+
+    def dispatch(self, request: dict) -> dict:
+        self.last_activity = time.monotonic()
+        op = request.get("op")
+        if op == "status":
+            status = {"ok": True, "locked": self.crypto.fernet is None, "pid": os.getpid()}
+            if self.crypto.cache:
+                status["cache"] = self.crypto.cache_stats()
+            return status
+        if op == "lock":
+            self.crypto.lock()
+            return {"ok": True}
+        if op == "unlock":
+            if not self.crypto.unlock(request.get("password", "")):
+                return {"ok": False, "error": "incorrect master password"}
+            return {"ok": True}
+        if op == "stop":
+            self.crypto.lock()
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {"ok": True}
+        return self.service.handle(request)
+
+    def bind(self):
+        directory = os.path.dirname(self.socket_path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        os.chmod(directory, 0o700)
+        if os.path.exists(self.socket_path):
+            if AgentClient(self.socket_path).is_running():
+                raise RuntimeError(f"An agent is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)
+
+        # Create the socket owner-only from the start rather than chmod-ing later
+        previous_umask = os.umask(0o177)
+        try:
+            self.server = _UnixServer(self.socket_path, _RequestHandler)
+        finally:
+            os.umask(previous_umask)
+        self.server.agent = self
+
+    def serve_forever(self):
+        if self.server is None:
+            self.bind()
+        watchdog = threading.Thread(target=self._lock_when_idle, daemon=True)
+        watchdog.start()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.crypto.lock()
+            self.service.database.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _lock_when_idle(self):
+        while True:
+            time.sleep(1)
+            if self.crypto.fernet and time.monotonic() - self.last_activity > self.idle_timeout:
+                self.crypto.lock()
+
+
+class AgentClient:
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or agent_socket_path()
+        self._socket = None
+        self._file = None
+
+    def request(self, op, **fields) -> dict:
+        return self.send({"op": op, **fields})
+
+    def send(self, request: dict) -> dict:
+        """Send a request dict as is; the agent answers malformed ones with an error reply."""
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(self.socket_path)
+            self._file = self._socket.makefile("rwb")
+        self._file.write(json.dumps(request).encode() + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            self.close()
+            raise ConnectionError("Agent closed the connection.")
+        return json.loads(line)
+
+    def is_running(self) -> bool:
+        try:
+            return self.request("status").get("ok", False)
+        except OSError:
+            return False
+        finally:
+            self.close()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+        if self._socket:
+            self._socket.close()
+        self._socket = None
+        self._file = None
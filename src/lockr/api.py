@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from .tracing import OperationStats
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Reads run concurrently on this many threads; writes always use one
+DEFAULT_READERS = 8
+# sync_state can record the replica's new location, so it runs as a write too
+WRITE_OPS = frozenset({"put", "rm", "sync_state", "sync_apply"})
+# Everything a read-only token may call; sync hands out plaintext and writes, so it is excluded
+READ_ONLY_OPS = frozenset({"get", "list", "search", "find"})
+MAX_BODY = 1024 * 1024
+MAX_HEADERS = 100
+# Seconds between reloads of the token table, so revocations apply without a restart
+TOKEN_REFRESH = 5.0
+
+
+def new_token():
+    return "lockr_" + secrets.token_urlsafe(32)
+
+
+def hash_token(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiMetrics:
+    """Request counts and latency histograms per operation, client and status."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.in_flight = 0
+        self.operations = {}
+        self.clients = {}
+        self.statuses = {}
+
+    def record(self, op, client, status, seconds):
+        # Only touched from the event loop thread, so no lock is needed
+        self.operations.setdefault(op, OperationStats()).add(seconds)
+        self.clients[client] = self.clients.get(client, 0) + 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def snapshot(self):
+        return {
+            "uptime_s": time.time() - self.started,
+            "in_flight": self.in_flight,
+            "operations": {op: stats.summary() for op, stats in sorted(self.operations.items())},
+            "clients": dict(sorted(self.clients.items())),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+        }
+
+
+class ApiServer:
+    """HTTP/JSON API over an unlocked vault for many concurrent clients.
+
+    Requests are VaultService dicts POSTed to /v1/request with a bearer token
+    from `lockr token add`; read-only tokens may only get, list, search and
+    find. The event loop
+    only parses and routes: reads run on a thread pool, and every write goes
+    through a single writer thread so SQLite never sees competing writers from
+    this process. GET /v1/metrics reports per-operation latency histograms.
+    """
+
+    def __init__(self, service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, readers=DEFAULT_READERS):
+        self.service = service
+        self.database = service.database
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.readers = ThreadPoolExecutor(readers, thread_name_prefix="lockr-api-reader")
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix="lockr-api-writer")
+        self.metrics = ApiMetrics()
+        self._tokens = {}
+        self._tokens_loaded = 0.0
+        self._server = None
+
+    # Authentication
+    async def _load_tokens(self):
+        rows = await asyncio.get_running_loop().run_in_executor(self.readers, self.database.fetch_api_tokens)
+        self._tokens = {token_hash: (name, bool(read_only)) for name, token_hash, read_only, _ in rows}
+        self._tokens_loaded = time.monotonic()
+
+    async def _authenticate(self, headers):
+        if time.monotonic() - self._tokens_loaded > TOKEN_REFRESH:
+            await self._load_tokens()
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        client = self._tokens.get(hash_token(token.strip())) if scheme.lower() == "bearer" else None
+        if client is None:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "missing or unknown API token")
+        return client
+
+    # Routing
+    async def _route(self, method, path, headers, body):
+        """(status, response dict, op, client name) for one HTTP request."""
+        if path == "/v1/health" and method == "GET":
+            return HTTPStatus.OK, {"ok": True, "locked": self.service.crypto.fernet is None}, "health", "-"
+
+        name, read_only = await self._authenticate(headers)
+        if path == "/v1/metrics" and method == "GET":
+            return HTTPStatus.OK, {"ok": True, **self.metrics.snapshot()}, "metrics", name
+        if path != "/v1/request":
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no such endpoint: {path}")
+        if method != "POST":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use POST")
+
+        try:
+            request = json.loads(body)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"invalid request: {e}")
+
+        op = request.get("op")
+        if read_only and op not in READ_ONLY_OPS:
+            raise HTTPError(HTTPStatus.FORBIDDEN, f"token {name!r} is read-only")
+        executor = self.writer if op in WRITE_OPS else self.readers
+        malformed, response = await asyncio.get_running_loop().run_in_executor(executor, self.service.respond, request)
+        status = HTTPStatus.BAD_REQUEST if malformed else HTTPStatus.OK
+        return status, response, str(op), name
+
+    # HTTP/1.1 with keep-alive; just enough for JSON clients
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = time.perf_counter()
+                self.metrics.in_flight += 1
+                op, client = "rejected", "-"
+                # Stays False if the request could not be read whole, as the stream is then out of sync
+                keep_alive = False
+                try:
+                    method, path, version, headers, body = await self._read_request(request_line, reader)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                    status, response, op, client = await self._route(method, path.split("?", 1)[0], headers, body)
+                except HTTPError as e:
+                    status, response = e.status, {"ok": False, "error": str(e)}
+                except Exception as e:
+                    # A bug must still answer the client; the connection is not reused after it
+                    status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {"ok": False, "error": f"internal error: {e}"}
+                    keep_alive = False
+                finally:
+                    self.metrics.in_flight -= 1
+                self._write_response(writer, status, response, keep_alive)
+                await writer.drain()
+                self.metrics.record(op, client, int(status), time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, request_line, reader):
+        try:
+            method, path, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "too many headers")
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, path, version, headers, body
+
+    @staticmethod
+    def _write_response(writer, status, response, keep_alive):
+        body = json.dumps(response).encode()
+        writer.write(
+            f"HTTP/1.1 {int(status)} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Cache-Control: no-store\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+        )
+
+    # Lifecycle
+    async def start(self):
+        await self._load_tokens()
+        if not self._tokens:
+            raise RuntimeError("No API tokens exist yet. Create one with `lockr token add <name>`.")
+        if self.socket_path:
+            # Owner-only from the start, like the agent socket
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            previous_umask = os.umask(0o177)
+            try:
+                self._server = await asyncio.start_unix_server(self._handle_connection, self.socket_path)
+            finally:
+                os.umask(previous_umask)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        return self._server
+
+    async def serve_forever(self):
+        server = self._server or await self.start()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        self.readers.shutdown(wait=True)
+        self.writer.shutdown(wait=True)
+        self.service.crypto.lock()
+        self.service.database.close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def address(self):
+        if self.socket_path:
+            return self.socket_path
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
@@ -0,0 +1,200 @@
+import hashlib
+import mmap
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from .ciphers import CipherEngine, entry_aad
+from .secretbuffer import SecretBuffer
+
+CHUNK_SIZE = 1000
+# Initial plaintext scratch per chunk; grows for longer entries
+SCRATCH_SIZE = 256
+BREACH_FILE_ENV = "LOCKR_BREACH_FILE"
+# Breach lookups interpolate this many times, then bisect down to a window
+# small enough to scan in one call
+INTERPOLATION_PROBES = 4
+SCAN_WINDOW = 4096
+
+# Per-process cipher, set up once by the pool initializer
+_worker_engine = None
+
+def _init_worker(key: bytes, cipher: str):
+    global _worker_engine
+    _worker_engine = CipherEngine(key, cipher)
+
+def _hash_chunk(chunk):
+    return _hash(chunk, _worker_engine)
+
+def _hash(chunk, engine):
+    # chunk: (id, website, token) rows -> (id, SHA-1 digest or None); plaintexts never
+    # leave the worker, and only ever exist in one locked scratch buffer
+    digests = []
+    with SecretBuffer(SCRATCH_SIZE) as scratch:
+        for pw_id, website, token in chunk:
+            try:
+                plaintext = engine.decrypt_into(token, entry_aad(pw_id, website), scratch)
+            except Exception:
+                digests.append((pw_id, None))
+                continue
+            digests.append((pw_id, hashlib.sha1(plaintext).digest()))
+    return digests
+
+
+class BreachIndex:
+    """Lookups in a sorted HIBP-style "SHA1:COUNT" file without reading it into memory.
+
+    The file is memory-mapped and searched on byte offsets, so only the few
+    pages touched by each lookup's probes are ever read. Hashes
+    must be upper-case hex sorted ascending, as in the "ordered by hash"
+    download; line endings may be LF or CRLF.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.getsize(path):
+            raise RuntimeError(f"Breach file {path} is empty.")
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._map, "madvise"):
+            # Probes jump around the file; read-ahead would only waste I/O
+            self._map.madvise(mmap.MADV_RANDOM)
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _search(self, key, lo, lo_value=0):
+        # Returns (count, offset and 64-bit prefix of a line not above key).
+        # SHA-1 digests are uniformly spread, so the first probes interpolate on
+        # the hash prefix; bisection bounds the worst case, and the last few KB
+        # are scanned by mmap.find, since a 40-digit key only matches a line start.
+        data = self._map
+        hi, hi_value = len(data), 1 << 64
+        value = int(key[:16], 16)
+        probes = 0
+        while hi - lo > SCAN_WINDOW:
+            if probes < INTERPOLATION_PROBES:
+                mid = lo + (hi - lo) * (value - lo_value) // max(hi_value - lo_value, 1)
+                mid = min(max(mid, lo), hi - 1)
+            else:
+                mid = (lo + hi) // 2
+            probes += 1
+            start = data.rfind(b"\n", 0, mid) + 1
+            line = data[start:start + 40]
+            if line < key:
+                end = data.find(b"\n", start)
+                lo = end + 1 if end != -1 else hi
+                lo_value = int(line[:16], 16)
+            elif line > key:
+                hi = start
+                hi_value = int(line[:16], 16)
+            else:
+                lo, hi = start, start + 40
+        start = data.find(key, lo, hi)
+        if start == -1:
+            return 0, lo, lo_value
+        end = data.find(b"\n", start)
+        count = data[start + 41:end if end != -1 else len(data)].strip()
+        return int(count or 1), start, value
+
+    def count(self, digest: bytes) -> int:
+        """Times the password with this SHA-1 digest was seen in breaches (0 if never)."""
+        return self._search(digest.hex().upper().encode(), 0)[0]
+
+    def counts(self, digests):
+        """{digest: count} for the breached digests among digests."""
+        found = {}
+        lo, lo_value = 0, 0
+        # Sorted lookups only ever move forward, so each search starts where the last ended
+        for digest in sorted(set(digests)):
+            count, lo, lo_value = self._search(digest.hex().upper().encode(), lo, lo_value)
+            if count:
+                found[digest] = count
+        return found
+
+
+class AuditManager:
+    """Finds reused and breached passwords.
+
+    Every entry is decrypted once and hashed with SHA-1, across a process pool
+    for large vaults. Entries sharing a digest are reported as reused, and the
+    digests are checked against an optional local breach file (BreachIndex).
+    """
+
+    def __init__(self, database, crypto, workers=None, chunk_size=CHUNK_SIZE):
+        self.database = database
+        self.crypto = crypto
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+
+    def run(self, breach_file=None, progress=None):
+        """Audit the vault; breach_file defaults to $LOCKR_BREACH_FILE.
+
+        Returns a dict with entries, reused (lists of entry ids sharing a
+        password), breached ({id: times seen}), undecryptable ids and seconds.
+        """
+        if not self.crypto.key:
+            raise RuntimeError("Fernet instance not initialized.")
+        breach_file = breach_file or os.environ.get(BREACH_FILE_ENV)
+
+        start = time.perf_counter()
+        if self.workers > 1:
+            digests = self._hash_parallel(progress)
+        else:
+            digests = self._hash_serial(progress)
+
+        by_digest = defaultdict(list)
+        undecryptable = []
+        for pw_id, digest in digests:
+            if digest is None:
+                undecryptable.append(pw_id)
+            else:
+                by_digest[digest].append(pw_id)
+
+        breached = {}
+        if breach_file:
+            with BreachIndex(breach_file) as index:
+                for digest, count in index.counts(by_digest).items():
+                    for pw_id in by_digest[digest]:
+                        breached[pw_id] = count
+
+        return {
+            "entries": len(digests),
+            "reused": sorted(ids for ids in by_digest.values() if len(ids) > 1),
+            "breached": dict(sorted(breached.items())),
+            "undecryptable": undecryptable,
+            "breach_file": breach_file,
+            "seconds": time.perf_counter() - start,
+        }
+
+    def _hash_serial(self, progress):
+        digests = []
+        for chunk in self.database.iter_encrypted_chunks(self.chunk_size):
+            digests.extend(_hash(chunk, self.crypto.engine))
+            if progress:
+                progress(len(digests))
+        return digests
+
+    def _hash_parallel(self, progress):
+        digests = []
+        # Bound in-flight chunks so memory stays flat regardless of vault size
+        pending = deque()
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.crypto.key, self.crypto.cipher)) as pool:
+            for chunk in self.database.iter_encrypted_chunks(self.chunk_size):
+                pending.append(pool.submit(_hash_chunk, chunk))
+                if len(pending) >= self.workers * 2:
+                    digests.extend(pending.popleft().result())
+                    if progress:
+                        progress(len(digests))
+
+            while pending:
+                digests.extend(pending.popleft().result())
+                if progress:
+                    progress(len(digests))
+        return digests
@@ -0,0 +1,166 @@
+import base64
+import hmac
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from cryptography.fernet import Fernet, InvalidToken
+
+from .ciphers import entry_aad
+from .crypto import CryptoManager, DEFAULT_KDF, DEFAULT_KDF_PARAMS
+
+ARCHIVE_FORMAT = "lockr-export"
+ARCHIVE_VERSION = 1
+EXPORT_CHUNK = 1000
+
+# Snapshot tuning: pages copied per backup step and the pause between steps
+BACKUP_PAGES = 256
+BACKUP_SLEEP = 0.005
+BACKUP_KEEP = 7
+SNAPSHOT_PREFIX = "lockr-"
+
+
+def read_archive(handle, passphrase: str):
+    """Yield entry dicts from an open export archive, one chunk decrypted at a time."""
+    header = json.loads(handle.readline() or "{}")
+    if header.get("format") != ARCHIVE_FORMAT:
+        raise ValueError("Not a lockr export archive.")
+    if header.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported archive version: {header.get('version')}")
+
+    with CryptoManager.derive_master_secret(
+        passphrase, base64.b64decode(header["salt"]), header["kdf"], header["kdf_params"]
+    ) as secret:
+        verifier, key = CryptoManager.split_master_secret(secret.view())
+    if not hmac.compare_digest(verifier, base64.b64decode(header["verifier"])):
+        raise ValueError("Incorrect archive passphrase.")
+
+    fernet = Fernet(key)
+    for line in handle:
+        if not line.strip():
+            continue
+        try:
+            yield from json.loads(fernet.decrypt(line.strip().encode()))
+        except InvalidToken:
+            raise ValueError("Corrupted export archive.")
+
+
+class BackupManager:
+    """Encrypted exports and online snapshots of the vault.
+
+    Exports stream rows through one cursor and write a passphrase-encrypted
+    archive chunk by chunk. Snapshots use SQLite's online backup API from a
+    separate read connection, copying a few pages per step so a running
+    session keeps reading and writing while the copy is taken.
+    """
+
+    def __init__(self, database, crypto=None, directory=None, keep=BACKUP_KEEP):
+        self.database = database
+        self.crypto = crypto
+        self.directory = directory or os.path.join(os.path.dirname(database.DB_PATH), "backups")
+        self.keep = keep
+
+    # Export
+    def export(self, path, passphrase: str, progress=None):
+        """Write every entry, decrypted, into an archive encrypted under passphrase."""
+        if not self.crypto or not self.crypto.fernet:
+            raise RuntimeError("Fernet instance not initialized.")
+
+        salt = os.urandom(16)
+        with CryptoManager.derive_master_secret(passphrase, salt, DEFAULT_KDF, DEFAULT_KDF_PARAMS) as secret:
+            verifier, key = CryptoManager.split_master_secret(secret.view())
+        archive = Fernet(key)
+        header = {
+            "format": ARCHIVE_FORMAT,
+            "version": ARCHIVE_VERSION,
+            "kdf": DEFAULT_KDF,
+            "kdf_params": DEFAULT_KDF_PARAMS,
+            "salt": base64.b64encode(salt).decode(),
+            "verifier": base64.b64encode(verifier).decode(),
+        }
+
+        start = time.perf_counter()
+        rows = 0
+        partial = path + ".partial"
+        try:
+            with _private_file(partial) as handle:
+                handle.write(json.dumps(header) + "\n")
+                for chunk in self.database.iter_entries(EXPORT_CHUNK):
+                    entries = [
+                        {"website": website, "username": username,
+                         "password": self.crypto.decrypt(enc, entry_aad(pw_id, website)), "created_at": created_at}
+                        for pw_id, website, username, enc, created_at in chunk
+                    ]
+                    handle.write(archive.encrypt(json.dumps(entries).encode()).decode() + "\n")
+                    rows += len(entries)
+                    if progress:
+                        progress(rows)
+        except BaseException:
+            os.remove(partial)
+            raise
+        os.replace(partial, path)
+
+        elapsed = time.perf_counter() - start
+        return {"path": path, "rows": rows, "seconds": elapsed, "rows_per_second": rows / elapsed if elapsed else 0.0}
+
+    # Snapshots
+    def snapshot(self, progress=None):
+        """Copy the live database into a new timestamped snapshot and prune old ones."""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        path = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{datetime.now():%Y%m%d-%H%M%S-%f}.db")
+        partial = path + ".partial"
+
+        start = time.perf_counter()
+        # A dedicated connection, so the session's own connection is never tied up
+        source = sqlite3.connect(self.database.DB_PATH, isolation_level=None)
+        target = sqlite3.connect(partial, isolation_level=None)
+        try:
+            os.chmod(partial, 0o600)
+            # Hold one read transaction across all steps: under WAL the copy sees a
+            # single snapshot and never restarts, and writers are not blocked.
+            source.execute("BEGIN")
+            source.execute("SELECT 1 FROM sqlite_master LIMIT 1")
+            source.backup(
+                target, pages=BACKUP_PAGES, sleep=BACKUP_SLEEP,
+                progress=(lambda status, remaining, total: progress(total - remaining, total)) if progress else None,
+            )
+            source.execute("COMMIT")
+            # A restored snapshot must sync as a new replica, as its journal is behind the live file's
+            target.execute("UPDATE replica SET location = NULL")
+            if target.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                raise RuntimeError("Snapshot failed its integrity check.")
+            pages = target.execute("PRAGMA page_count").fetchone()[0]
+        except BaseException:
+            target.close()
+            os.remove(partial)
+            raise
+        finally:
+            source.close()
+        target.close()
+        os.replace(partial, path)
+
+        return {"path": path, "pages": pages, "seconds": time.perf_counter() - start, "pruned": self.prune()}
+
+    def snapshots(self):
+        # Oldest first; timestamped names sort chronologically
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            os.path.join(self.directory, name) for name in names
+            if name.startswith(SNAPSHOT_PREFIX) and name.endswith(".db")
+        )
+
+    def prune(self):
+        stale = self.snapshots()[:-self.keep] if self.keep > 0 else []
+        for path in stale:
+            os.remove(path)
+        return stale
+
+
+def _private_file(path):
+    # Owner-only file, created fresh
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    return os.fdopen(descriptor, "w", encoding="utf-8")
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .secretbuffer import SecretBuffer
+
+# Opt-in: the cache is disabled unless LOCKR_CACHE_SIZE is a positive entry count
+CACHE_SIZE_ENV = "LOCKR_CACHE_SIZE"
+CACHE_TTL_ENV = "LOCKR_CACHE_TTL"
+DEFAULT_TTL = 30.0
+
+
+class SecretCache:
+    """Bounded LRU of decrypted passwords with a time-to-live.
+
+    Entries are keyed by (entry id, row version) and remember the ciphertext
+    they came from, so a row rewritten behind the cache's back (another
+    process, or an id reused after a delete) is never served stale. Plaintexts
+    are held in locked SecretBuffers and wiped when evicted, invalidated or cleared.
+    """
+
+    def __init__(self, capacity, ttl=DEFAULT_TTL):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """A cache configured from the environment, or None when not enabled."""
+        try:
+            capacity = int(os.environ.get(CACHE_SIZE_ENV, "0"))
+            ttl = float(os.environ.get(CACHE_TTL_ENV, DEFAULT_TTL))
+        except ValueError:
+            return None
+        return cls(capacity, ttl) if capacity > 0 and ttl > 0 else None
+
+    def get(self, key, token):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, cached_token, plaintext = entry
+                if expires > time.monotonic() and cached_token == token:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return plaintext.decode("utf-8")
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, token, plaintext: str):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, token, SecretBuffer.from_str(plaintext))
+            while len(self._entries) > self.capacity:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, pw_id):
+        # Keys carry the row version, so drop every version of the entry
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == pw_id]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "ttl": self.ttl,
+            }
+
+    def _drop(self, key):
+        _, _, plaintext = self._entries.pop(key)
+        plaintext.wipe()
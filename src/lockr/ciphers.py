@@ -0,0 +1,151 @@
+import base64
+import hashlib
+import hmac
+import os
+import struct
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDFExpand
+
+from .secretbuffer import SecretBuffer
+
+# First byte of every stored ciphertext. Raw Fernet tokens already start with
+# their own version byte 0x80, so rows written before the AEAD engine are
+# recognised without any marker of their own.
+FERNET = 0x80
+AES_256_GCM = 0x01
+CHACHA20_POLY1305 = 0x02
+
+CIPHERS = {"aes-256-gcm": AES_256_GCM, "chacha20-poly1305": CHACHA20_POLY1305}
+AEADS = {AES_256_GCM: AESGCM, CHACHA20_POLY1305: ChaCha20Poly1305}
+DEFAULT_CIPHER = "aes-256-gcm"
+CIPHER_ENV = "LOCKR_CIPHER"
+NONCE_SIZE = 12
+TAG_SIZE = 16
+# Truncated HMAC-SHA256 tags for blind indexes; 128 bits keeps collisions out of reach
+BLIND_INDEX_SIZE = 16
+
+
+def entry_aad(pw_id: int, website: str) -> bytes:
+    """Associated data binding a ciphertext to its row, so it cannot be moved to another entry."""
+    return struct.pack(">Q", pw_id) + website.encode("utf-8")
+
+
+def cipher_from_env() -> str:
+    cipher = os.environ.get(CIPHER_ENV, DEFAULT_CIPHER)
+    if cipher not in CIPHERS:
+        raise RuntimeError(f"Unsupported cipher in ${CIPHER_ENV}: {cipher}")
+    return cipher
+
+
+class CipherEngine:
+    """Encrypts entries under one data key with the chosen AEAD and decrypts any known header.
+
+    Each AEAD uses its own 256-bit subkey expanded from the data key with HKDF,
+    so the wrapped data key format is unchanged and old Fernet rows keep
+    decrypting under the same key until they are rewritten. Blind indexes get
+    one HMAC subkey per purpose the same way.
+    """
+
+    def __init__(self, key: bytes, cipher: str = DEFAULT_CIPHER):
+        self.fernet = Fernet(key)
+        self.cipher = cipher
+        self.header = CIPHERS[cipher]
+        self._key = SecretBuffer.from_bytes(base64.urlsafe_b64decode(key))
+        self._aeads = {}
+        self._macs = {}
+
+    def wipe(self):
+        # Only the raw key copy is ours to zero; the AEAD and HMAC objects keep theirs until collected
+        self._key.wipe()
+        self._key = None
+        self._aeads.clear()
+        self._macs.clear()
+
+    def _subkey(self, info: bytes) -> bytes:
+        if self._key is None:
+            # Never derive a subkey from a zeroed key, e.g. in a request racing a lock
+            raise RuntimeError("Cipher engine has been wiped.")
+        return HKDFExpand(algorithm=hashes.SHA256(), length=32, info=info).derive(self._key.view())
+
+    def _aead(self, header):
+        aead = self._aeads.get(header)
+        if aead is None:
+            subkey = self._subkey(b"lockr entry cipher " + bytes((header,)))
+            aead = self._aeads[header] = AEADS[header](subkey)
+        return aead
+
+    def blind_index(self, purpose: bytes, data: bytes) -> bytes:
+        """Keyed HMAC-SHA256 of data, truncated to BLIND_INDEX_SIZE.
+
+        Equal inputs give equal tags under one data key, so tags can be stored
+        and looked up in an index; without the key they reveal only equality.
+        """
+        mac = self._macs.get(purpose)
+        if mac is None:
+            mac = self._macs[purpose] = hmac.new(self._subkey(b"lockr blind index " + purpose), digestmod=hashlib.sha256)
+        mac = mac.copy()
+        mac.update(data)
+        return mac.digest()[:BLIND_INDEX_SIZE]
+
+    def encrypt(self, plaintext, aad: bytes = b"") -> bytes:
+        # plaintext: any bytes-like object, such as a SecretBuffer view
+        header = bytes((self.header,))
+        nonce = os.urandom(NONCE_SIZE)
+        return header + nonce + self._aead(self.header).encrypt(nonce, plaintext, header + aad)
+
+    def decrypt(self, token: bytes, aad: bytes = b"") -> bytes:
+        header = token[0] if token else None
+        if header == FERNET:
+            return self.fernet.decrypt(base64.urlsafe_b64encode(token))
+        if header not in AEADS:
+            raise InvalidToken("unknown ciphertext header")
+        try:
+            return self._aead(header).decrypt(token[1:1 + NONCE_SIZE], token[1 + NONCE_SIZE:], token[:1] + aad)
+        except InvalidTag:
+            raise InvalidToken("ciphertext failed authentication")
+
+    def decrypt_into(self, token: bytes, aad: bytes, buffer: SecretBuffer) -> memoryview:
+        """decrypt() into the front of buffer, growing it if needed; returns a view of the plaintext.
+
+        Bulk callers reuse one buffer for every row, so no per-row plaintext
+        object is allocated or left behind. AEAD rows decrypt in place; Fernet
+        only returns bytes, so legacy rows leave that one copy.
+        """
+        header = token[0] if token else None
+        if header == FERNET:
+            plaintext = self.fernet.decrypt(base64.urlsafe_b64encode(token))
+            buffer.reserve(len(plaintext))
+            view = buffer.prefix(len(plaintext))
+            view[:] = plaintext
+            return view
+        if header not in AEADS:
+            raise InvalidToken("unknown ciphertext header")
+
+        size = len(token) - 1 - NONCE_SIZE - TAG_SIZE
+        if size < 0:
+            raise InvalidToken("truncated ciphertext")
+        buffer.reserve(size)
+        view = buffer.prefix(size)
+        try:
+            self._aead(header).decrypt_into(token[1:1 + NONCE_SIZE], token[1 + NONCE_SIZE:], token[:1] + aad, view)
+        except InvalidTag:
+            raise InvalidToken("ciphertext failed authentication")
+        return view
+
+    def decrypt_secret(self, token: bytes, aad: bytes = b"") -> SecretBuffer:
+        """decrypt() into a new SecretBuffer of exactly the plaintext's length."""
+        secret = SecretBuffer(max(len(token) - 1 - NONCE_SIZE - TAG_SIZE, 0))
+        try:
+            view = self.decrypt_into(token, aad, secret)
+            if len(view) != len(secret):
+                # Fernet padding: the exact length is only known after decrypting
+                exact = SecretBuffer.from_bytes(view)
+                secret.wipe()
+                return exact
+            return secret
+        except BaseException:
+            secret.wipe()
+            raise
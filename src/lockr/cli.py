@@ -0,0 +1,427 @@
+import argparse
+import getpass
+import json
+import os
+import sys
+
+from .agent import AgentClient
+from .generator import CLASSES, MODES, PasswordPolicy, generate, generate_batch
+
+PASSWORD_FILE_ENV = "LOCKR_PASSWORD_FILE"
+
+
+class CLIManager:
+    """Non-interactive subcommands that answer many requests after one unlock.
+
+    Every result is written to stdout as one JSON object per line. Requests go
+    to a running unlock agent when one is available, otherwise the vault is
+    unlocked in-process with a master password read from a file descriptor,
+    a file, or the terminal.
+    """
+
+    def __init__(self, args, stdin=sys.stdin, stdout=sys.stdout):
+        self.args = args
+        self.stdin = stdin
+        self.stdout = stdout
+        self.failed = False
+        self._handler = None
+        self._master_password = None
+
+    def run(self) -> int:
+        try:
+            getattr(self, f"cmd_{self.args.command}")()
+        except (RuntimeError, OSError) as e:
+            print(f"lockr: {e}", file=sys.stderr)
+            return 1
+        return 1 if self.failed else 0
+
+    # Backends
+    def request(self, request: dict) -> dict:
+        if self._handler is None:
+            self._handler = self._open_backend()
+        return self._handler(request)
+
+    def _open_backend(self):
+        if not self.args.no_agent:
+            client = AgentClient()
+            try:
+                status = client.request("status")
+                if status.get("ok") and not status.get("locked"):
+                    return client.send
+            except OSError:
+                pass
+            client.close()
+
+        from .service import VaultService
+
+        return VaultService(*self._unlock_local()).handle
+
+    def _unlock_local(self):
+        # The crypto stack is only needed when unlocking in-process
+        from .crypto import CryptoManager
+        from .database import DatabaseManager
+
+        database = DatabaseManager()
+        crypto = CryptoManager(database)
+        if not crypto.has_master_password():
+            raise RuntimeError("No vault found. Run lockr interactively to create one.")
+        if not crypto.unlock(self._read_master_password()):
+            raise RuntimeError("Incorrect master password.")
+        return database, crypto
+
+    def _read_master_password(self):
+        # Read once: sync may unlock a second vault from the same source
+        if self._master_password is None:
+            self._master_password = self._read_password_source()
+        return self._master_password
+
+    def _read_password_source(self):
+        # Descriptors and files are read straight into a SecretBuffer, never a str
+        from .secretbuffer import SecretBuffer
+
+        if self.args.password_fd is not None:
+            with os.fdopen(self.args.password_fd, "rb", buffering=0, closefd=False) as source:
+                return SecretBuffer.read_line(source)
+
+        path = self.args.password_file or os.environ.get(PASSWORD_FILE_ENV)
+        if path:
+            with open(path, "rb", buffering=0) as source:
+                return SecretBuffer.read_line(source)
+
+        if sys.stdin.isatty():
+            return getpass.getpass("Master password: ")
+        raise RuntimeError(
+            f"No master password source: use --password-fd, --password-file or {PASSWORD_FILE_ENV}, or start the agent."
+        )
+
+    # Output
+    def emit(self, response: dict):
+        if not response.get("ok"):
+            self.failed = True
+        self.stdout.write(json.dumps(response) + "\n")
+        self.stdout.flush()
+
+    # Commands
+    def cmd_get(self):
+        for pw_id in self.args.ids:
+            self.emit(self.request({"op": "get", "id": pw_id}))
+
+    def cmd_list(self):
+        response = self.request({"op": "list"})
+        if not response.get("ok"):
+            self.emit(response)
+            return
+        for entry in response["entries"]:
+            self.emit({"ok": True, **entry})
+
+    def cmd_search(self):
+        if self.args.vault and len(self.args.vault) > 1:
+            self._search_vaults(self.args.vault)
+            return
+        response = self.request({"op": "search", "query": self.args.query, "limit": self.args.limit})
+        if not response.get("ok"):
+            self.emit(response)
+            return
+        for entry in response["entries"]:
+            self.emit({"ok": True, **entry})
+
+    def cmd_find(self):
+        if self.args.website is None and self.args.username is None:
+            raise RuntimeError("Give --website, --username or both.")
+        response = self.request({
+            "op": "find", "website": self.args.website, "username": self.args.username,
+            "exact": self.args.exact, "limit": self.args.limit,
+        })
+        if not response.get("ok"):
+            self.emit(response)
+            return
+        for entry in response["entries"]:
+            self.emit({"ok": True, **entry})
+
+    def _search_vaults(self, names):
+        # Unlocked in-process, with one master password for all of them
+        from .vaults import VaultSet
+
+        vaults = VaultSet()
+        try:
+            results = vaults.unlock(dict.fromkeys(names, self._read_master_password()))
+            failed = [name for name, unlocked in results.items() if not unlocked]
+            if failed:
+                raise RuntimeError(f"Incorrect master password for vault {', '.join(failed)}.")
+            for vault, pw_id, website, username, created_at in vaults.search(self.args.query, self.args.limit):
+                self.emit({
+                    "ok": True, "vault": vault, "id": pw_id, "website": website,
+                    "username": username, "created_at": created_at,
+                })
+        finally:
+            vaults.close()
+
+    def cmd_add(self):
+        if self.args.generate:
+            password = generate(PasswordPolicy(length=self.args.generate))
+        else:
+            password = self.stdin.readline().rstrip("\n")
+        if not password:
+            raise RuntimeError("Password cannot be empty.")
+        self.emit(self.request({
+            "op": "put", "website": self.args.website, "username": self.args.username, "password": password,
+        }))
+
+    def cmd_generate(self):
+        # Needs no vault: passwords are printed, not stored
+        try:
+            policy = PasswordPolicy(
+                length=self.args.length,
+                classes=self.args.classes.split(","),
+                exclude=self.args.exclude,
+                mode=self.args.mode,
+                words=self.args.words,
+                separator=self.args.separator,
+            )
+        except ValueError as e:
+            raise RuntimeError(f"Invalid policy: {e}")
+        for password in generate_batch(self.args.count, policy):
+            self.emit({"ok": True, "password": password})
+
+    def cmd_rm(self):
+        for pw_id in self.args.ids:
+            self.emit(self.request({"op": "rm", "id": pw_id}))
+
+    def cmd_batch(self):
+        # One JSON request per input line, one JSON response per output line
+        for line in self.stdin:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                self.emit({"ok": False, "error": f"invalid request: {e}"})
+                continue
+            try:
+                response = self.request(request)
+            except (TypeError, ValueError) as e:
+                # One bad line gets its error reply; the lines after it still run
+                response = {"ok": False, "error": f"invalid request: {e}"}
+            self.emit(response)
+
+    def cmd_import(self):
+        # Bulk writes need the data key in-process, so the agent is not used
+        from .importer import ImportManager, detect_format
+
+        importer = ImportManager(*self._unlock_local(), workers=self.args.workers)
+        progress = None
+        if self.args.progress:
+            progress = lambda stats: print(json.dumps({"progress": stats}), file=sys.stderr)
+        passphrase = None
+        if (self.args.format or detect_format(self.args.path)) == "lockr":
+            if not sys.stdin.isatty():
+                raise RuntimeError("Importing a lockr archive needs a terminal for the archive passphrase.")
+            passphrase = getpass.getpass("Archive passphrase: ")
+        try:
+            stats = importer.import_file(self.args.path, self.args.format, progress, passphrase)
+        except ValueError as e:
+            raise RuntimeError(f"Import stopped: {e}")
+        self.emit({"ok": True, **stats})
+
+    def cmd_audit(self):
+        # Decrypts every entry in worker processes, so the agent is not used
+        from .audit import AuditManager
+
+        report = AuditManager(*self._unlock_local(), workers=self.args.workers).run(self.args.breach_file)
+        self.emit({"ok": True, **report})
+
+    def cmd_seal(self):
+        # Rewrites every row and the full-text index, so it runs in-process like audit
+        from .metadata import MetadataManager
+
+        self.emit({"ok": True, **MetadataManager(*self._unlock_local()).seal()})
+
+    def cmd_serve(self):
+        import asyncio
+
+        from .api import ApiServer
+        from .service import VaultService
+
+        server = ApiServer(
+            VaultService(*self._unlock_local()),
+            host=self.args.host, port=self.args.port, socket_path=self.args.socket, readers=self.args.readers,
+        )
+
+        async def serve():
+            await server.start()
+            print(f"Serving the vault API on {server.address()}", file=sys.stderr, flush=True)
+            await server.serve_forever()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+
+    def cmd_token(self):
+        # Token management needs the database only; the vault stays locked
+        from .api import hash_token, new_token
+        from .database import DatabaseManager
+
+        database = DatabaseManager()
+        if self.args.token_command == "add":
+            token = new_token()
+            if not database.add_api_token(self.args.name, hash_token(token), self.args.read_only):
+                raise RuntimeError(f"A token named {self.args.name!r} already exists.")
+            # The token itself is never stored, so this is the only time it is shown
+            self.emit({"ok": True, "name": self.args.name, "token": token, "read_only": self.args.read_only})
+        elif self.args.token_command == "list":
+            for name, _, read_only, created_at in database.fetch_api_tokens():
+                self.emit({"ok": True, "name": name, "read_only": bool(read_only), "created_at": created_at})
+        elif not database.delete_api_token(self.args.name):
+            raise RuntimeError(f"No token named {self.args.name!r}.")
+        else:
+            self.emit({"ok": True, "name": self.args.name})
+
+    def cmd_sync(self):
+        from .sync import SyncManager
+
+        if bool(self.args.peer) == bool(self.args.socket):
+            raise RuntimeError("Give either a peer vault or --socket.")
+        peer, close = self._open_peer()
+        try:
+            self.emit({"ok": True, **SyncManager(self.request, peer, page_size=self.args.page_size).run()})
+        finally:
+            close()
+
+    def _open_peer(self):
+        # (request handler, close) for the other replica
+        if self.args.socket:
+            client = AgentClient(self.args.socket)
+            status = client.request("status")
+            if not status.get("ok") or status.get("locked"):
+                client.close()
+                raise RuntimeError(f"The agent at {self.args.socket} is locked.")
+            return client.send, client.close
+
+        from .crypto import CryptoManager
+        from .database import DatabaseManager, list_vaults, vault_db_path
+        from .service import VaultService
+
+        path = vault_db_path(self.args.peer) if self.args.peer in list_vaults() else self.args.peer
+        if not os.path.isfile(path):
+            raise RuntimeError(f"No vault named or stored at {self.args.peer}.")
+        database = DatabaseManager(db_path=path)
+        crypto = CryptoManager(database)
+        if not crypto.has_master_password():
+            database.close()
+            raise RuntimeError(f"{path} is not an initialized vault.")
+        if self.args.peer_password_file:
+            from .secretbuffer import SecretBuffer
+
+            with open(self.args.peer_password_file, "rb", buffering=0) as source:
+                password = SecretBuffer.read_line(source)
+        else:
+            password = self._read_master_password()
+        if not crypto.unlock(password):
+            database.close()
+            raise RuntimeError(f"Incorrect master password for {path}.")
+
+        def close():
+            crypto.lock()
+            database.close()
+        return VaultService(database, crypto).handle, close
+
+    def cmd_backup(self):
+        # Snapshots copy the database file as stored, so no unlock is needed
+        from .backup import BackupManager
+        from .database import DatabaseManager
+
+        manager = BackupManager(DatabaseManager(), directory=self.args.dir, keep=self.args.keep)
+        self.emit({"ok": True, **manager.snapshot()})
+
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def add_script_commands(commands):
+    source = argparse.ArgumentParser(add_help=False)
+    source.add_argument("--password-fd", type=int, help="read the master password from this file descriptor")
+    source.add_argument("--password-file", help=f"read the master password from this file (or ${PASSWORD_FILE_ENV})")
+    source.add_argument("--no-agent", action="store_true", help="do not use a running unlock agent")
+
+    get = commands.add_parser("get", parents=[source], help="print entries with their decrypted passwords")
+    get.add_argument("ids", nargs="+", type=int, metavar="ID")
+
+    commands.add_parser("list", parents=[source], help="print entry metadata")
+
+    search = commands.add_parser("search", parents=[source], help="print entries whose website or username matches")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=20)
+
+    find = commands.add_parser("find", parents=[source], help="print entries for a website and/or username")
+    find.add_argument("--website", help="matches on the domain, ignoring scheme, port, path and www.")
+    find.add_argument("--username", help="matches ignoring case")
+    find.add_argument("--exact", action="store_true", help="match the whole website instead of its domain")
+    find.add_argument("--limit", type=int, default=20)
+
+    add = commands.add_parser("add", parents=[source], help="add an entry; the password is read from stdin")
+    add.add_argument("--website", required=True)
+    add.add_argument("--username", required=True)
+    add.add_argument("--generate", type=int, metavar="LENGTH", help="store a generated password instead")
+
+    generate = commands.add_parser("generate", help="print generated passwords without touching the vault")
+    generate.add_argument("--count", type=_positive_int, default=1)
+    generate.add_argument("--length", type=int, default=16, help="characters (random and pronounceable modes)")
+    generate.add_argument("--mode", choices=MODES, default="random")
+    generate.add_argument("--classes", default=",".join(CLASSES), help="comma-separated classes that must all appear")
+    generate.add_argument("--exclude", default="", help="characters that must never appear")
+    generate.add_argument("--words", type=int, default=6, help="words per passphrase")
+    generate.add_argument("--separator", default="-", help="passphrase word separator")
+
+    rm = commands.add_parser("rm", parents=[source], help="delete entries")
+    rm.add_argument("ids", nargs="+", type=int, metavar="ID")
+
+    commands.add_parser("batch", parents=[source], help="answer JSON-line requests read from stdin")
+
+    imports = commands.add_parser("import", parents=[source], help="import entries from a CSV or JSON export")
+    imports.add_argument("path")
+    imports.add_argument("--format", choices=("csv", "json", "lockr"), help="defaults to the file extension")
+    imports.add_argument("--workers", type=int, help="encryption processes (default: CPU count)")
+    imports.add_argument("--progress", action="store_true", help="report progress as JSON lines on stderr")
+
+    audit = commands.add_parser("audit", parents=[source], help="report reused and breached passwords")
+    audit.add_argument("--breach-file", help="sorted SHA1:COUNT breach file (default: $LOCKR_BREACH_FILE)")
+    audit.add_argument("--workers", type=int, help="decryption processes (default: CPU count)")
+
+    commands.add_parser(
+        "seal", parents=[source], help="encrypt entry websites and usernames, keeping blind indexes for lookups"
+    )
+
+    serve = commands.add_parser("serve", parents=[source], help="serve an HTTP/JSON API over the unlocked vault")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--socket", help="listen on this Unix socket instead of TCP")
+    serve.add_argument("--readers", type=int, default=8, help="threads serving read requests")
+
+    token = commands.add_parser("token", help="manage API server client tokens")
+    token_commands = token.add_subparsers(dest="token_command", required=True)
+    token_add = token_commands.add_parser("add", help="create a token and print it once")
+    token_add.add_argument("name")
+    token_add.add_argument("--read-only", action="store_true", help="allow get, list and search only")
+    token_commands.add_parser("list", help="list token names")
+    token_revoke = token_commands.add_parser("revoke", help="delete a token")
+    token_revoke.add_argument("name")
+
+    sync = commands.add_parser("sync", parents=[source], help="exchange changes with another replica of the vault")
+    sync.add_argument("peer", nargs="?", help="vault name or path of the other vault file")
+    sync.add_argument("--socket", help="sync with the unlock agent listening on this socket instead")
+    sync.add_argument("--peer-password-file", help="master password of the peer vault (default: same as this vault)")
+    sync.add_argument("--page-size", type=int, default=500, help="changes per request")
+
+    backup = commands.add_parser("backup", help="write an online snapshot of the vault database")
+    backup.add_argument("--dir", help="snapshot directory (default: backups/ next to the vault)")
+    backup.add_argument("--keep", type=int, default=7, help="number of snapshots to retain")
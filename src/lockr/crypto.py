@@ -1,62 +1,251 @@
-import bcrypt
 import base64
-from cryptography.fernet import Fernet
+import hmac
+import json
+import os
+from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDFExpand
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 from cryptography.hazmat.primitives import hashes
 
+from .cache import SecretCache
+from .ciphers import CipherEngine, cipher_from_env, entry_aad
+from .metadata import MetadataCodec
+from .secretbuffer import SecretBuffer
+
+# One KDF pass per unlock; HKDF splits its output into a verifier and the key-encryption key
+DEFAULT_KDF = "pbkdf2-sha256"
+DEFAULT_KDF_PARAMS = {"iterations": 600_000}
+VERIFIER_INFO = b"lockr verifier"
+KEK_INFO = b"lockr key-encryption key"
+
 class CryptoManager:
-    def __init__(self, database):
+    def __init__(self, database, cache=None, cipher=None):
         self.database = database
         self.fernet = None
+        # engine encrypts entries with the chosen AEAD and still reads Fernet rows;
+        # fernet (the same data key) is kept for the unlocked check and key wrapping.
+        self.cipher = cipher or cipher_from_env()
+        self.engine = None
+        # Seals websites and usernames in vaults that encrypt them; handed to
+        # the database while unlocked so it can read and write those rows
+        self.metadata = None
+        # key: data-encryption key for password rows
+        # kek: key-encryption key derived from the master password, wraps key
+        self.key = None
+        self.kek = None
+        # Decrypted-password cache, opt-in via LOCKR_CACHE_SIZE
+        self.cache = cache if cache is not None else SecretCache.from_env()
+        if self.cache:
+            database.add_change_listener(self.cache.invalidate)
+
+    def has_master_password(self) -> bool:
+        _, _, verifier = self.database.get_kdf_settings()
+        return bool(verifier or self.database.get_master_hash())
+
+    #  Key derivation and Fernet
+    @staticmethod
+    def _password_bytes(password):
+        # password: a str, or a SecretBuffer read without ever becoming one
+        return password.view() if isinstance(password, SecretBuffer) else password.encode()
+
+    @staticmethod
+    def derive_master_secret(password, salt: bytes, kdf: str, params: dict) -> SecretBuffer:
+        """The KDF output, derived straight into a SecretBuffer the caller wipes."""
+        if kdf == "pbkdf2-sha256":
+            derivation = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=params["iterations"])
+        elif kdf == "scrypt":
+            derivation = Scrypt(salt=salt, length=32, n=params["n"], r=params["r"], p=params["p"])
+        else:
+            raise RuntimeError(f"Unsupported key derivation function: {kdf}")
+
+        secret = SecretBuffer(32)
+        derivation.derive_into(CryptoManager._password_bytes(password), secret.view())
+        return secret
+
+    @staticmethod
+    def split_master_secret(secret: bytes):
+        # (verifier, Fernet-encoded kek) from a single KDF output
+        verifier = HKDFExpand(algorithm=hashes.SHA256(), length=32, info=VERIFIER_INFO).derive(secret)
+        kek = HKDFExpand(algorithm=hashes.SHA256(), length=32, info=KEK_INFO).derive(secret)
+        return verifier, base64.urlsafe_b64encode(kek)
+
+    def unlock(self, password: str) -> bool:
+        """Check the master password and unwrap the data key in one KDF pass."""
+        kdf, params, stored_verifier = self.database.get_kdf_settings()
+        if not stored_verifier:
+            return self._unlock_legacy(password)
+
+        salt = self.database.get_encryption_salt()
+        if not salt:
+            raise RuntimeError("Encryption salt not found in database.")
+        with self.derive_master_secret(password, salt, kdf, json.loads(params)) as secret:
+            verifier, kek = self.split_master_secret(secret.view())
+        if not hmac.compare_digest(verifier, base64.b64decode(stored_verifier)):
+            return False
+
+        try:
+            key = Fernet(kek).decrypt(self.database.get_wrapped_key().encode())
+        except (InvalidToken, AttributeError):
+            raise RuntimeError("Failed to unwrap data key: corrupted vault.")
+        self.kek = kek
+        self.set_key(key)
+        return True
+
+    def _unlock_legacy(self, password: str) -> bool:
+        # Vaults from before the single-pass KDF: bcrypt verifier plus a PBKDF2 key.
+        import bcrypt
 
-    # Master password hashing
-    def hash_master_password(self, password: str) -> bytes:
-        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        self.database.set_master_hash(hashed)
-        return hashed
-    
-    def verify_master_password(self, attempt: str) -> bool:
         stored = self.database.get_master_hash()
         if not stored:
             return False
         try:
-            return bcrypt.checkpw(attempt.encode('utf-8'), stored)
-        except Exception:
+            if not bcrypt.checkpw(bytes(self._password_bytes(password)), stored):
+                return False
+        except ValueError:
             return False
-        
-    #  Key derivation and Fernet
-    def dervive_key(self, password: str) -> bytes:
+
         salt = self.database.get_encryption_salt()
         if not salt:
             raise RuntimeError("Encryption salt not found in database.")
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=600_000,
+        with self.derive_master_secret(password, salt, DEFAULT_KDF, DEFAULT_KDF_PARAMS) as secret:
+            legacy_kek = base64.urlsafe_b64encode(secret.view())
+            wrapped = self.database.get_wrapped_key()
+            if wrapped:
+                try:
+                    key = Fernet(legacy_kek).decrypt(wrapped.encode())
+                except InvalidToken:
+                    raise RuntimeError("Failed to unwrap data key: corrupted vault.")
+            else:
+                # Pre-envelope vault: rows are encrypted directly under the
+                # password-derived key, so adopt it as the data key.
+                key = legacy_kek
+
+            # Upgrade in place, reusing this KDF output so no extra derivation is paid
+            with self.database.transaction():
+                self._store_key_material(salt, secret, key, DEFAULT_KDF, DEFAULT_KDF_PARAMS)
+                if not self.database.delete_master_hash():
+                    raise RuntimeError("Failed to remove legacy master password hash.")
+        self.set_key(key)
+        return True
+
+    def initialize_key(self, password):
+        """Generate a fresh data key for a new vault and wrap it under the master password."""
+        salt = os.urandom(16)
+        key = Fernet.generate_key()
+        with self.derive_master_secret(password, salt, DEFAULT_KDF, DEFAULT_KDF_PARAMS) as secret:
+            self._store_key_material(salt, secret, key, DEFAULT_KDF, DEFAULT_KDF_PARAMS)
+
+        return self.set_key(key)
+
+    def change_master_password(self, password):
+        """Rewrap the data key under a new master password; rows are untouched."""
+        if not self.key:
+            raise RuntimeError("Fernet instance not initialized.")
+
+        salt = os.urandom(16)
+        with self.derive_master_secret(password, salt, DEFAULT_KDF, DEFAULT_KDF_PARAMS) as secret, \
+                self.database.transaction():
+            self._store_key_material(salt, secret, self.key, DEFAULT_KDF, DEFAULT_KDF_PARAMS)
+            self.database.delete_master_hash()
+
+    def store_data_key(self, key: bytes):
+        # Persist a replacement data key under the current master password
+        if not self.kek:
+            raise RuntimeError("Fernet instance not initialized.")
+        if not self.database.set_wrapped_key(Fernet(self.kek).encrypt(key).decode('utf-8')):
+            raise RuntimeError("Failed to store wrapped data key.")
+
+    def _store_key_material(self, salt: bytes, secret: SecretBuffer, key: bytes, kdf: str, params: dict):
+        verifier, kek = self.split_master_secret(secret.view())
+        wrapped = Fernet(kek).encrypt(key).decode('utf-8')
+        stored = self.database.set_key_material(
+            salt, wrapped, kdf, json.dumps(params), base64.b64encode(verifier).decode()
         )
+        if not stored:
+            raise RuntimeError("Failed to store wrapped data key.")
+        self.kek = kek
 
-        return base64.urlsafe_b64encode(kdf.derive(password.encode()))
+    def lock(self):
+        if self.engine:
+            self.engine.wipe()
+        self.key = None
+        self.kek = None
+        self.fernet = None
+        self.engine = None
+        self.metadata = None
+        self.database.metadata_codec = None
+        if self.cache:
+            self.cache.clear()
 
-    def create_fernet(self, password: str):
-        key = self.dervive_key(password)
-        self.fernet = Fernet(key)
+    def set_key(self, key: bytes):
+        if self.engine:
+            self.engine.wipe()
+        self.key = key
+        self.engine = CipherEngine(key, self.cipher)
+        self.fernet = self.engine.fernet
+        self.metadata = MetadataCodec(self.engine)
+        self.database.metadata_codec = self.metadata
+        if self.cache:
+            self.cache.clear()
 
         return self.fernet
-    
-    def encrypt(self, plaintext: str) -> str:
-        if not self.fernet:
+
+    # Entry ciphertexts carry a one-byte cipher header (see ciphers.py) and are
+    # bound to their row through entry_aad(id, website).
+    @staticmethod
+    def reencrypt_token(token: bytes, aad: bytes, old_engine: CipherEngine, new_engine: CipherEngine,
+                        scratch: SecretBuffer) -> bytes:
+        # The plaintext only ever exists in scratch, which bulk callers reuse across rows
+        return new_engine.encrypt(old_engine.decrypt_into(token, aad, scratch), aad)
+
+    @staticmethod
+    def encrypt_token(engine: CipherEngine, plaintext, aad: bytes = b"") -> bytes:
+        return engine.encrypt(CryptoManager._password_bytes(plaintext), aad)
+
+    def encrypt(self, plaintext, aad: bytes = b"") -> bytes:
+        # plaintext: a str or a SecretBuffer
+        if not self.engine:
+            raise RuntimeError("Fernet instance not initialized.")
+
+        return self.encrypt_token(self.engine, plaintext, aad)
+
+    def encrypt_entry(self, pw_id: int, website: str, plaintext) -> bytes:
+        return self.encrypt(plaintext, entry_aad(pw_id, website))
+
+    def decrypt(self, token: bytes, aad: bytes = b"") -> str:
+        if not self.engine:
             raise RuntimeError("Fernet instance not initialized.")
-        
-        token = self.fernet.encrypt(plaintext.encode())
-        return base64.b64encode(token).decode('utf-8')
 
-    def decrypt(self, token_b64: str) -> str:
-        if not self.fernet:
+        try:
+            return self.engine.decrypt(token, aad).decode('utf-8')
+        except Exception as e:
+            raise RuntimeError(f"Decryption failed: {str(e)}")
+
+    def decrypt_secret(self, token: bytes, aad: bytes = b"") -> SecretBuffer:
+        """decrypt() into a SecretBuffer, for callers that never need a str."""
+        if not self.engine:
             raise RuntimeError("Fernet instance not initialized.")
-        
+
         try:
-            token = base64.b64decode(token_b64) 
-            return self.fernet.decrypt(token).decode('utf-8')
+            return self.engine.decrypt_secret(token, aad)
         except Exception as e:
-            raise RuntimeError(f"Decryption failed: {str(e)}")
\ No newline at end of file
+            raise RuntimeError(f"Decryption failed: {str(e)}")
+
+    def decrypt_entry_secret(self, pw_id: int, website: str, token: bytes) -> SecretBuffer:
+        # Bypasses the cache, which would hand back a str
+        return self.decrypt_secret(token, entry_aad(pw_id, website))
+
+    def decrypt_entry(self, pw_id: int, website: str, version: int, token: bytes) -> str:
+        """decrypt() for a stored row, served from the cache when enabled."""
+        if not self.cache:
+            return self.decrypt(token, entry_aad(pw_id, website))
+
+        plaintext = self.cache.get((pw_id, version), token)
+        if plaintext is None:
+            plaintext = self.decrypt(token, entry_aad(pw_id, website))
+            self.cache.put((pw_id, version), token, plaintext)
+        return plaintext
+
+    def cache_stats(self):
+        return self.cache.stats() if self.cache else None
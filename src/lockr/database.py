@@ -1,212 +1,1270 @@
 import sqlite3
+import hashlib
 import os
 import platform
 import base64
+import threading
+import functools
+import difflib
+import random
+import re
+import time
+from contextlib import contextmanager
 
 APP_NAME="lockr"
 DB_FILENAME="lockr.db"
+# Named vaults are separate files under vaults/; the default vault keeps lockr.db
+VAULT_ENV = "LOCKR_VAULT"
+DEFAULT_VAULT = "default"
+VAULT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]{0,63}")
+# Ordered schema migrations: (version, DatabaseManager method). Append new
+# steps with the next version number; never edit or reorder released ones.
+MIGRATIONS = (
+    (5, "_migrate_base_schema"),
+    (6, "_migrate_ciphertext_blobs"),
+    (7, "_migrate_id_sequence"),
+    (8, "_migrate_api_tokens"),
+    (9, "_migrate_change_journal"),
+    (10, "_migrate_sealed_metadata"),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Search tuning
+SEARCH_TERM = re.compile(r"[\w\-]+")
+SEARCH_CANDIDATES = 500
+FUZZY_WINDOW = 100
+FUZZY_ALTERNATIVES = 5
+FUZZY_CUTOFF = 0.75
+
+# secrets.metadata of a vault whose websites and usernames are encrypted (see metadata.py)
+SEALED = "sealed"
+# Blind index kinds, each backing a <kind>_index column
+BLIND_INDEXES = ("site", "domain", "user")
+# Columns written for every entry; see _stored_metadata
+METADATA_COLUMNS = "website, username, meta, site_index, domain_index, user_index"
+
+# Connection tuning. Every statement waits up to $LOCKR_BUSY_TIMEOUT seconds for
+# another process's lock in SQLite's busy handler; the few busy errors SQLite
+# returns without waiting are retried with jittered, doubling sleeps.
+BUSY_TIMEOUT_ENV = "LOCKR_BUSY_TIMEOUT"
+DEFAULT_BUSY_TIMEOUT = 10.0
+BACKOFF_MIN = 0.005
+BACKOFF_MAX = 0.25
+STATEMENT_CACHE_SIZE = 256
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA mmap_size=67108864",
+)
+
+@functools.lru_cache(maxsize=None)
+def resolve_db_path(app_name=APP_NAME, db_filename=DB_FILENAME):
+    # Resolved once per process; an os.access check replaces the old write probe
+    system = platform.system()
+    if system == "Windows":
+        try:
+            document_path = os.path.expanduser('~/Documents')
+            if os.path.exists(document_path) and os.access(document_path, os.W_OK):
+                base_path = document_path
+            else:
+                raise OSError("Docemnts folder is not accessible.")
+        except OSError:
+            try:
+                user_profile = os.environ.get('USERPROFILE')
+                if user_profile:
+                    base_path = os.path.join(user_profile, 'AppData', 'Roaming')
+                else:
+                    base_path = os.path.expanduser('~\\AppData\\Roaming')
+
+                if not os.access(base_path, os.W_OK):
+                    raise OSError("AppData folder is not ediatable")
+            except OSError:
+                # Fallback to current working
+                return os.path.join(os.getcwd(), db_filename)
+            
+    elif system == "Darwin":
+        base_path = os.path.expanduser('~/Library/Application Support')
+    else:
+        base_path = os.environ.get('XDG_DATA_HOME')
+        if not base_path:
+            base_path = os.path.expanduser('~/.local/share')
+
+    app_data_directory = os.path.join(base_path, app_name)
+
+    try:
+        os.makedirs(app_data_directory, exist_ok=True)
+        if not os.access(app_data_directory, os.W_OK):
+            raise OSError("App data folder is not writable")
+    except OSError:
+        return os.path.join(os.getcwd(), db_filename)
+    
+    return os.path.join(app_data_directory, db_filename)
+
+def vault_db_path(vault=None, app_name=APP_NAME, db_filename=DB_FILENAME):
+    """Database file for a named vault ($LOCKR_VAULT, else the default vault)."""
+    vault = vault or os.environ.get(VAULT_ENV) or DEFAULT_VAULT
+    default_path = resolve_db_path(app_name, db_filename)
+    if vault == DEFAULT_VAULT:
+        return default_path
+    if not VAULT_NAME.fullmatch(vault):
+        raise RuntimeError(f"Invalid vault name {vault!r}: use letters, digits, '-' and '_'.")
+    directory = os.path.join(os.path.dirname(default_path), "vaults")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return os.path.join(directory, f"{vault}.db")
+
+def list_vaults(app_name=APP_NAME, db_filename=DB_FILENAME):
+    """Names of the vaults that exist on disk, default first."""
+    default_path = resolve_db_path(app_name, db_filename)
+    names = [DEFAULT_VAULT] if os.path.exists(default_path) else []
+    directory = os.path.join(os.path.dirname(default_path), "vaults")
+    if os.path.isdir(directory):
+        names.extend(sorted(
+            name[:-3] for name in os.listdir(directory)
+            if name.endswith(".db") and VAULT_NAME.fullmatch(name[:-3])
+        ))
+    return names
+
+def _search_rank(row, terms):
+    website_words = SEARCH_TERM.findall(row[1].lower())
+    words = website_words + SEARCH_TERM.findall(row[2].lower())
+    exact = sum(term in words for term in terms)
+    website_prefix = any(word.startswith(terms[0]) for word in website_words[:1])
+    return (-exact, not website_prefix, len(row[1]), row[0])
+
+
+def _raw_token(value):
+    # Pre-BLOB rows hold base64 text of the urlsafe-base64 Fernet token
+    if isinstance(value, bytes):
+        return value
+    return base64.urlsafe_b64decode(base64.b64decode(value))
+
+
+def _new_uid():
+    return os.urandom(16).hex()
+
+
+def _legacy_uid(pw_id, website, username, created_at):
+    # Derived from the row rather than random, so copies of one vault taken before
+    # the change journal existed still agree on which entries are the same
+    return hashlib.sha256(f"{pw_id}\0{website}\0{username}\0{created_at}".encode()).hexdigest()[:32]
+
+
+def _escape_like(text):
+    # Escape wildcards for LIKE ... ESCAPE '\'
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _busy_timeout():
+    try:
+        return max(float(os.environ.get(BUSY_TIMEOUT_ENV, DEFAULT_BUSY_TIMEOUT)), 0.0)
+    except ValueError:
+        return DEFAULT_BUSY_TIMEOUT
+
+
+def _is_busy(error):
+    # SQLITE_BUSY and its extended codes: another connection holds the lock
+    return (getattr(error, "sqlite_errorcode", 0) & 0xFF) == sqlite3.SQLITE_BUSY
+
+
+class VaultError(RuntimeError):
+    """A vault read or write failed. Raised rather than returned as an empty result."""
+
+
+class VaultBusyError(VaultError):
+    """Another process kept the vault locked for longer than the busy timeout."""
+
+
+class ConflictError(VaultError):
+    """An entry changed after it was read, so writing it would lose that change."""
+
+
+def parse_entry_id(value):
+    """An entry id as typed by the user, as an int; VaultError if it is not one."""
+    try:
+        pw_id = int(value.strip())
+    except ValueError:
+        raise VaultError(f"Invalid entry ID: {value!r}. IDs are whole numbers.") from None
+    if pw_id < 1:
+        raise VaultError(f"Invalid entry ID: {value!r}. IDs are whole numbers.")
+    return pw_id
+
 
 class DatabaseManager:
-    def __init__(self, app_name=APP_NAME, db_filename=DB_FILENAME):
+    def __init__(self, app_name=APP_NAME, db_filename=DB_FILENAME, db_path=None, vault=None):
         self.app_name = app_name
         self.db_filename = db_filename
-        self.DB_PATH = self._get_app_data_directory()
+        self.vault = vault or os.environ.get(VAULT_ENV) or DEFAULT_VAULT
+        self.DB_PATH = db_path or self._get_app_data_directory()
+        self.busy_timeout = _busy_timeout()
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._search_index = None
+        self._replica_id = None
+        # metadata.MetadataCodec of the unlocked vault, set by CryptoManager
+        self.metadata_codec = None
+        # Called with an entry id after it is updated or deleted
+        self._change_listeners = []
         self._initialize_database()
 
-    def _get_app_data_directory(self):
-        # Fetch os and app details
-        app_name = self.app_name
-        db_filename = self.db_filename
+    # Connection handling
+    def _connect(self):
+        # isolation_level=None keeps single statements in autocommit mode;
+        # multi-statement writes go through transaction().
+        connection = sqlite3.connect(
+            self.DB_PATH,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in PRAGMAS:
+            # Switching a file to WAL needs a moment of exclusive access
+            self._retry_busy(connection.execute, pragma)
+        return connection
 
-        system = platform.system()
-        if system == "Windows":
-            try:
-                document_path = os.path.expanduser('~/Documents')
-                if os.path.exists(document_path) and os.access(document_path, os.W_OK):
-                    base_path = document_path
-                else:
-                    raise OSError("Docemnts folder is not accessible.")
-            except OSError:
-                try:
-                    user_profile = os.environ('USERPROFILE')
-                    if user_profile:
-                        base_path = os.path.join(user_profile, 'AppData', 'Roaming')
-                    else:
-                        base_path = os.path.expanduser('~\\AppData\\Roaming')
-
-                    if not os.access(base_path, os.W_OK):
-                        raise OSError("AppData folder is not ediatable")
-                except OSError:
-                    # Fallback to current working
-                    return os.path.join(os.getcwd(), db_filename)
-                
-        elif system == "Darwin":
-            base_path = os.path.expanduser('~/Library/Application Support')
-        else:
-            base_path = os.environ.get('XDG_DATA_HOME')
-            if not base_path:
-                base_path = os.path.expanduser('~/.local/share')
+    @property
+    def connection(self):
+        """Long-lived connection for the calling thread, opened on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
 
-        app_data_directory = os.path.join(base_path, app_name)
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed writes atomically; nested blocks join the outer transaction."""
+        connection = self.connection
+        if connection.in_transaction:
+            yield connection
+            return
 
+        # The write lock is taken up front, so a transaction never fails half way
+        # because another process started writing after it read
         try:
-            os.makedirs(app_data_directory, exist_ok=True)
-            test_file = os.path.join(app_data_directory, '.write_test')
-            with open(test_file, 'w') as f:
-                f.write('test')
-            
-            os.remove(test_file)  
-        except OSError:
-            return os.path.join(os.getcwd(), db_filename)
-        
-        return os.path.join(app_data_directory, db_filename)
+            self._retry_busy(connection.execute, "BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            raise self._error("start a write", e) from e
+        try:
+            yield connection
+            connection.commit()
+        except BaseException:
+            if connection.in_transaction:
+                connection.rollback()
+            raise
+
+    def _backoff(self, deadline=None):
+        """Sleeps between retries: jittered and doubling, until busy_timeout has passed.
+
+        Yields True after each sleep and stops once the timeout is used up, or
+        at deadline (a time.monotonic() value) when one is given.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.busy_timeout
+        delay = BACKOFF_MIN
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            # Full jitter keeps processes that collided once from retrying in lockstep
+            time.sleep(min(random.uniform(0, delay), remaining))
+            delay = min(delay * 2, BACKOFF_MAX)
+            yield True
+
+    def _retry_busy(self, func, *args):
+        # Time spent in SQLite's busy handler counts against the same timeout
+        retries = self._backoff(time.monotonic() + self.busy_timeout)
+        while True:
+            try:
+                return func(*args)
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or not next(retries, False):
+                    raise
+
+    def _error(self, action, error):
+        # What a failed statement surfaces as, instead of an empty result
+        if _is_busy(error):
+            return VaultBusyError(
+                f"Could not {action}: another lockr process kept the vault locked for over "
+                f"{self.busy_timeout:g}s (set {BUSY_TIMEOUT_ENV} to wait longer)."
+            )
+        return VaultError(f"Could not {action}: {error}")
+
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def _get_app_data_directory(self):
+        return vault_db_path(self.vault, self.app_name, self.db_filename)
+
+    def _stored_schema_version(self):
+        # None for a new file or one older than schema_version; any other error
+        # propagates, since guessing a version could re-run released migrations
+        connection = self.connection
+        if not connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+        ).fetchone():
+            return None
+        row = connection.execute("SELECT version FROM schema_version").fetchone()
+        return row[0] if row else None
 
     def _initialize_database(self):
-        """Create tables and initial salt row when missing."""
+        """Create a new vault or bring an existing one up to SCHEMA_VERSION."""
+        try:
+            stored = self._stored_schema_version() or 0
+        except sqlite3.Error as e:
+            raise self._error(f"open {self.DB_PATH}", e) from e
+        # Fast path: an up-to-date vault needs no DDL at all
+        if stored == SCHEMA_VERSION:
+            return
+        if stored > SCHEMA_VERSION:
+            raise RuntimeError(f"Vault schema version {stored} is newer than this version of lockr supports.")
+
+        # Every pending migration runs in one transaction: a failure leaves the vault untouched
         try:
-            with sqlite3.connect(self.DB_PATH) as connection:
+            with self.transaction() as connection:
+                # Another process may have upgraded the file while this one waited for the lock
+                stored = self._stored_schema_version() or 0
+                if stored >= SCHEMA_VERSION:
+                    return
                 cursor = connection.cursor()
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS secrets (
-                        id INTEGER PRIMARY KEY,
-                        encryption_salt TEXT NOT NULL
-                    )
-                ''')
-
-                cursor.execute("SELECT encryption_salt FROM secrets WHERE id = 1")
-                if not cursor.fetchone():
-                    import os, base64
-                    new_salt = os.urandom(16)
-                    cursor.execute(
-                        "INSERT INTO secrets (id, encryption_salt) VALUES (1, ?)",
-                        (base64.b64encode(new_salt).decode(),)
-                    )
+                for version, migration in MIGRATIONS:
+                    if version > stored:
+                        getattr(self, migration)(cursor)
+                cursor.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+                cursor.execute("DELETE FROM schema_version")
+                cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (SCHEMA_VERSION,))
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to upgrade vault to schema version {SCHEMA_VERSION}: {e}")
 
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS master_password (
-                        id INTEGER PRIMARY KEY,
-                        password_hash BLOB NOT NULL,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS passwords (
-                        id INTEGER PRIMARY KEY,
-                        website TEXT NOT NULL,
-                        username TEXT NOT NULL,
-                        password TEXT NOT NULL,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP    
-                    )
-                ''')
+    # Migrations
+    def _migrate_base_schema(self, cursor):
+        # Versions up to 5 predate ordered migrations and were applied idempotently,
+        # so this step brings an empty file or any of them to version 5.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS secrets (
+                id INTEGER PRIMARY KEY,
+                encryption_salt TEXT NOT NULL,
+                wrapped_key TEXT,
+                kdf TEXT,
+                kdf_params TEXT,
+                verifier TEXT
+            )
+        ''')
 
-                connection.commit()
-        except sqlite3.Error:
-            pass
+        # Older vaults lack these columns; their key material is wrapped
+        # and upgraded on the next successful unlock.
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(secrets)")]
+        for column in ("wrapped_key", "kdf", "kdf_params", "verifier"):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE secrets ADD COLUMN {column} TEXT")
+
+        cursor.execute("SELECT encryption_salt FROM secrets WHERE id = 1")
+        if not cursor.fetchone():
+            new_salt = os.urandom(16)
+            cursor.execute(
+                "INSERT INTO secrets (id, encryption_salt) VALUES (1, ?)",
+                (base64.b64encode(new_salt).decode(),)
+            )
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS master_password (
+                id INTEGER PRIMARY KEY,
+                password_hash BLOB NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS passwords (
+                id INTEGER PRIMARY KEY,
+                website TEXT NOT NULL,
+                username TEXT NOT NULL,
+                password TEXT NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                version INTEGER NOT NULL DEFAULT 1
+            )
+        ''')
+        # Bumped on every rewrite of a row, so readers can key caches on it
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(passwords)")]
+        if "version" not in columns:
+            cursor.execute("ALTER TABLE passwords ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+        self._create_password_indexes(cursor)
+        self._create_search_index(cursor)
+
+    def _migrate_ciphertext_blobs(self, cursor):
+        # Store raw Fernet token bytes in a BLOB column instead of base64 text of the
+        # (already base64) token. SQLite cannot change a column type in place, so the
+        # table is rebuilt with the same rowids and its indexes and triggers recreated.
+        self.connection.create_function("lockr_raw_token", 1, _raw_token, deterministic=True)
+        cursor.execute('''
+            CREATE TABLE passwords_blob (
+                id INTEGER PRIMARY KEY,
+                website TEXT NOT NULL,
+                username TEXT NOT NULL,
+                password BLOB NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                version INTEGER NOT NULL DEFAULT 1
+            )
+        ''')
+        cursor.execute('''
+            INSERT INTO passwords_blob (id, website, username, password, created_at, version)
+            SELECT id, website, username, lockr_raw_token(password), created_at, version FROM passwords
+        ''')
+        cursor.execute("DROP TABLE passwords")
+        cursor.execute("ALTER TABLE passwords_blob RENAME TO passwords")
+        self._create_password_indexes(cursor)
+        self._create_search_triggers(cursor)
+
+    def _migrate_id_sequence(self, cursor):
+        # Entry ids are reserved before encryption (ciphertexts are bound to them)
+        # and never reused, even after the newest entry is deleted.
+        cursor.execute("CREATE TABLE IF NOT EXISTS password_ids (next_id INTEGER NOT NULL)")
+        cursor.execute("DELETE FROM password_ids")
+        cursor.execute("INSERT INTO password_ids (next_id) SELECT coalesce(max(id), 0) + 1 FROM passwords")
+
+    def _migrate_api_tokens(self, cursor):
+        # Clients of the API server; only a SHA-256 of each token is stored
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS api_tokens (
+                name TEXT PRIMARY KEY,
+                token_hash BLOB NOT NULL UNIQUE,
+                read_only INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    def _migrate_change_journal(self, cursor):
+        # Sync metadata. Ids are local to a vault file (and ciphertexts are bound to
+        # them), so uid names an entry on every replica; clock and origin (a Lamport
+        # clock and the replica that wrote it) order concurrent changes; change_seq is
+        # this file's journal position of the row's last change.
+        for column in (
+            "uid TEXT", "updated_at TIMESTAMP", "clock INTEGER NOT NULL DEFAULT 0",
+            "origin TEXT", "change_seq INTEGER NOT NULL DEFAULT 0",
+        ):
+            cursor.execute(f"ALTER TABLE passwords ADD COLUMN {column}")
+        rows = cursor.execute("SELECT id, website, username, created_at FROM passwords").fetchall()
+        cursor.executemany(
+            "UPDATE passwords SET uid = ?, updated_at = created_at, change_seq = id WHERE id = ?",
+            [(_legacy_uid(*row), row[0]) for row in rows]
+        )
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_passwords_uid ON passwords (uid)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_passwords_change_seq ON passwords (change_seq)")
+
+        # Deleted entries, so deletes replicate instead of being resurrected by a peer
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tombstones (
+                uid TEXT PRIMARY KEY,
+                clock INTEGER NOT NULL,
+                origin TEXT,
+                change_seq INTEGER NOT NULL,
+                deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tombstones_change_seq ON tombstones (change_seq)")
+
+        # This file's identity, clock and journal head; location detects copies
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS replica (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                replica_id TEXT NOT NULL,
+                location TEXT,
+                clock INTEGER NOT NULL DEFAULT 0,
+                change_seq INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute(
+            "INSERT OR IGNORE INTO replica (id, replica_id, location, change_seq) "
+            "SELECT 1, ?, ?, coalesce(max(id), 0) FROM passwords",
+            (os.urandom(8).hex(), self._location())
+        )
+
+        # How far each peer's journal has been applied here
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_peers (
+                replica_id TEXT PRIMARY KEY,
+                received_seq INTEGER NOT NULL DEFAULT 0,
+                synced_at TIMESTAMP
+            )
+        """)
+
+    def _migrate_sealed_metadata(self, cursor):
+        # Optional encrypted metadata: meta holds the sealed website and username and
+        # the *_index columns their blind indexes. Vaults that keep plaintext leave
+        # them NULL, so the partial indexes stay empty.
+        for column in ("meta BLOB", "site_index BLOB", "domain_index BLOB", "user_index BLOB"):
+            cursor.execute(f"ALTER TABLE passwords ADD COLUMN {column}")
+        for kind in ("site", "domain", "user"):
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_passwords_{kind}_index ON passwords ({kind}_index) "
+                f"WHERE {kind}_index IS NOT NULL"
+            )
+        cursor.execute("ALTER TABLE secrets ADD COLUMN metadata TEXT")
+
+    def _create_password_indexes(self, cursor):
+        # Backs keyset pagination in newest-first order
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_passwords_created ON passwords (created_at DESC, id DESC)"
+        )
+        # Backs duplicate detection on import
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_passwords_site_user ON passwords (website, username)"
+        )
+
+    def _create_search_index(self, cursor):
+        # External-content FTS5 index over website/username, kept in sync by
+        # triggers. Prefix indexes make "term*" queries a direct lookup and the
+        # vocab table lets typo-tolerant search find nearby terms.
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'passwords_fts'"
+        ).fetchone()
+        if exists:
+            return
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE passwords_fts USING fts5(
+                    website, username, content='passwords', content_rowid='id',
+                    tokenize="unicode61 tokenchars '-_'", prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search falls back to a LIKE scan
+            return
+        cursor.execute("CREATE VIRTUAL TABLE passwords_fts_vocab USING fts5vocab(passwords_fts, 'row')")
+
+        self._create_search_triggers(cursor)
+        cursor.execute("INSERT INTO passwords_fts (passwords_fts) VALUES ('rebuild')")
+
+    def _create_search_triggers(self, cursor):
+        if not cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'passwords_fts'"
+        ).fetchone():
+            return
+        # Separate execute() calls: executescript() would commit the open transaction
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS passwords_fts_insert AFTER INSERT ON passwords BEGIN
+                INSERT INTO passwords_fts (rowid, website, username) VALUES (new.id, new.website, new.username);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS passwords_fts_delete AFTER DELETE ON passwords BEGIN
+                INSERT INTO passwords_fts (passwords_fts, rowid, website, username)
+                VALUES ('delete', old.id, old.website, old.username);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS passwords_fts_update AFTER UPDATE OF website, username ON passwords BEGIN
+                INSERT INTO passwords_fts (passwords_fts, rowid, website, username)
+                VALUES ('delete', old.id, old.website, old.username);
+                INSERT INTO passwords_fts (rowid, website, username) VALUES (new.id, new.website, new.username);
+            END
+        ''')
 
     # Master password storage
     def get_master_hash(self):
         try:
-            with sqlite3.connect(self.DB_PATH) as connection:
-                cursor = connection.cursor()
-                cursor.execute("SELECT password_hash FROM master_password WHERE id = 1")
-                row = cursor.fetchone()
-                return row[0] if row else None
-        except sqlite3.Error:
-            return None
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT password_hash FROM master_password WHERE id = 1")
+            row = cursor.fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            raise self._error("read the master password hash", e) from e
 
     def set_master_hash(self, hash_bytes):
         try:
-            with sqlite3.connect(self.DB_PATH) as connection:
-                cursor = connection.cursor()
-                cursor.execute(
+            with self.transaction() as connection:
+                connection.execute(
                     "INSERT OR REPLACE INTO master_password (id, password_hash) VALUES (1, ?)",
                     (hash_bytes,)
                 )
+            return True
+        except sqlite3.Error as e:
+            raise self._error("store the master password hash", e) from e
 
-                connection.commit()
-                return True
-        except sqlite3.Error:
-            return False
+    def delete_master_hash(self):
+        try:
+            with self.transaction() as connection:
+                connection.execute("DELETE FROM master_password")
+            return True
+        except sqlite3.Error as e:
+            raise self._error("remove the master password hash", e) from e
 
     # Salt storage
     def get_encryption_salt(self):
         try:
-            with sqlite3.connect(self.DB_PATH) as connection:
-                cursor = connection.cursor()
-                cursor.execute("SELECT encryption_salt FROM secrets WHERE id = 1")
-                row = cursor.fetchone()
-                if not row:
-                    return None
-                return base64.b64decode(row[0].encode())
-        except sqlite3.Error:
-            return None
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT encryption_salt FROM secrets WHERE id = 1")
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return base64.b64decode(row[0].encode())
+        except sqlite3.Error as e:
+            raise self._error("read the encryption salt", e) from e
+
+    # Wrapped data key storage
+    def get_wrapped_key(self):
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT wrapped_key FROM secrets WHERE id = 1")
+            row = cursor.fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            raise self._error("read the wrapped data key", e) from e
+
+    def get_kdf_settings(self):
+        # (kdf, kdf_params, verifier); all None for vaults still on bcrypt
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT kdf, kdf_params, verifier FROM secrets WHERE id = 1")
+            return cursor.fetchone() or (None, None, None)
+        except sqlite3.Error as e:
+            raise self._error("read the key derivation settings", e) from e
+
+    def set_wrapped_key(self, wrapped_key):
+        try:
+            with self.transaction() as connection:
+                cursor = connection.execute("UPDATE secrets SET wrapped_key = ? WHERE id = 1", (wrapped_key,))
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            raise self._error("store the wrapped data key", e) from e
+
+    def set_key_material(self, salt, wrapped_key, kdf=None, kdf_params=None, verifier=None):
+        try:
+            with self.transaction() as connection:
+                cursor = connection.execute(
+                    "UPDATE secrets SET encryption_salt = ?, wrapped_key = ?, kdf = ?, kdf_params = ?, verifier = ? WHERE id = 1",
+                    (base64.b64encode(salt).decode(), wrapped_key, kdf, kdf_params, verifier)
+                )
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            raise self._error("store the wrapped data key", e) from e
+
+    # API client tokens
+    def add_api_token(self, name, token_hash, read_only=False):
+        # False when a token with this name already exists
+        try:
+            with self.transaction() as connection:
+                connection.execute(
+                    "INSERT INTO api_tokens (name, token_hash, read_only) VALUES (?, ?, ?)",
+                    (name, token_hash, int(read_only))
+                )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+        except sqlite3.Error as e:
+            raise self._error("store the API token", e) from e
+
+    def fetch_api_tokens(self):
+        # (name, token_hash, read_only, created_at) rows
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT name, token_hash, read_only, created_at FROM api_tokens ORDER BY name")
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            raise self._error("read the API tokens", e) from e
+
+    def delete_api_token(self, name):
+        try:
+            with self.transaction() as connection:
+                cursor = connection.execute("DELETE FROM api_tokens WHERE name = ?", (name,))
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            raise self._error("remove the API token", e) from e
+
+    # Sealed metadata
+    def metadata_sealed(self):
+        """Whether entry websites and usernames are encrypted. Read on every call, so
+        a vault sealed by another process is never written to in plaintext."""
+        row = self.connection.execute("SELECT metadata FROM secrets WHERE id = 1").fetchone()
+        return bool(row) and row[0] == SEALED
+
+    def set_metadata_sealed(self):
+        self.connection.execute("UPDATE secrets SET metadata = ? WHERE id = 1", (SEALED,))
+
+    def _codec(self):
+        if self.metadata_codec is None:
+            raise RuntimeError("Vault is locked; its entry metadata is encrypted.")
+        return self.metadata_codec
+
+    def _stored_metadata(self, pw_id, website, username, sealed):
+        # Values for METADATA_COLUMNS: plaintext, or empty plaintext columns beside the sealed pair
+        if not sealed:
+            return website, username, None, None, None, None
+        return ("", "", *self._codec().seal(pw_id, website, username))
+
+    @staticmethod
+    def _meta_column(sealed):
+        return ", meta" if sealed else ""
+
+    def _open_rows(self, rows, sealed, website_column=1, username=True):
+        # Sealed queries select meta as an extra last column (_meta_column). It is
+        # decrypted into the website column, which follows the id, and the username
+        # after it, so callers get the same rows from either kind of vault.
+        if not sealed:
+            return rows
+        codec = self._codec()
+        opened = []
+        for row in rows:
+            *row, meta = row
+            if meta is not None:
+                website, user = codec.open(row[website_column - 1], meta)
+                row[website_column] = website
+                if username:
+                    row[website_column + 1] = user
+            opened.append(tuple(row))
+        return opened
+
+    def _index_match(self, value, kinds=BLIND_INDEXES):
+        # SQL condition and parameters matching value against any of the blind indexes
+        codec = self._codec()
+        return (
+            "(" + " OR ".join(f"{kind}_index = ?" for kind in kinds) + ")",
+            [codec.index(kind, value) for kind in kinds],
+        )
+
+    def _find_sealed(self, condition, params, limit):
+        cursor = self.connection.execute(
+            f"SELECT id, website, username, created_at, meta FROM passwords WHERE {condition} "
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*params, limit)
+        )
+        return self._open_rows(cursor.fetchall(), True)
+
+    def find_passwords(self, website=None, username=None, exact=False, limit=20):
+        """Newest-first (id, website, username, created_at) rows for a website and/or username.
+
+        website matches on its domain (scheme, port, path and "www." ignored),
+        or on the whole website when exact; username ignores case. Sealed
+        vaults answer with one query on the blind indexes; plaintext vaults
+        normalize every row.
+        """
+        lookups = []
+        if website is not None:
+            lookups.append(("site" if exact else "domain", website))
+        if username is not None:
+            lookups.append(("user", username))
+        if not lookups:
+            raise ValueError("find needs a website or a username")
+        try:
+            if self.metadata_sealed():
+                codec = self._codec()
+                return self._find_sealed(
+                    " AND ".join(f"{kind}_index = ?" for kind, _ in lookups),
+                    [codec.index(kind, value) for kind, value in lookups],
+                    limit,
+                )
+
+            from .metadata import NORMALIZERS
+
+            connection = self.connection
+            for kind, normalize in NORMALIZERS.items():
+                connection.create_function(f"lockr_{kind}_key", 1, normalize, deterministic=True)
+            condition = " AND ".join(
+                f"lockr_{kind}_key({'username' if kind == 'user' else 'website'}) = ?" for kind, _ in lookups
+            )
+            cursor = connection.execute(
+                f"SELECT id, website, username, created_at FROM passwords WHERE {condition} "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                (*(NORMALIZERS[kind](value) for kind, value in lookups), limit)
+            )
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            raise self._error("look up entries", e) from e
+
+    def iter_metadata_chunks(self, chunk_size=1000):
+        # (id, website, username) rows in id order, keyset-scanned so callers can
+        # rewrite rows between chunks. Errors propagate.
+        sealed = self.metadata_sealed()
+        last_id = 0
+        while True:
+            chunk = self.connection.execute(
+                f"SELECT id, website, username{self._meta_column(sealed)} FROM passwords "
+                "WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size)
+            ).fetchall()
+            if not chunk:
+                return
+            yield self._open_rows(chunk, sealed)
+            last_id = chunk[-1][0]
+
+    def fetch_metadata_range(self, first_id, last_id):
+        # (id, website, username) rows with first_id <= id <= last_id. Errors propagate.
+        sealed = self.metadata_sealed()
+        cursor = self.connection.execute(
+            f"SELECT id, website, username{self._meta_column(sealed)} FROM passwords "
+            "WHERE id BETWEEN ? AND ? ORDER BY id",
+            (first_id, last_id)
+        )
+        return self._open_rows(cursor.fetchall(), sealed)
+
+    def store_metadata_bulk(self, codec, rows):
+        # rows: (id, website, username), sealed with codec and the plaintext columns
+        # cleared. Sealing a vault or rotating its key changes no entry, so this is
+        # not journaled. Callers hold a transaction; errors propagate.
+        self.connection.executemany(
+            "UPDATE passwords SET website = '', username = '', meta = ?, site_index = ?, domain_index = ?, "
+            "user_index = ? WHERE id = ?",
+            [(*codec.seal(pw_id, website, username), pw_id) for pw_id, website, username in rows]
+        )
+
+    def drop_search_index(self):
+        # The full-text index stores every website and username word in plaintext
+        for trigger in ("passwords_fts_insert", "passwords_fts_delete", "passwords_fts_update"):
+            self.connection.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        self.connection.execute("DROP TABLE IF EXISTS passwords_fts_vocab")
+        self.connection.execute("DROP TABLE IF EXISTS passwords_fts")
+        self._search_index = False
+
+    @contextmanager
+    def secure_delete(self):
+        """Zero whatever SQLite frees inside the block, then checkpoint the WAL.
+
+        Rows rewritten in the block leave no old copy behind, neither in free
+        pages of the database file nor in the write-ahead log.
+        """
+        connection = self.connection
+        previous = connection.execute("PRAGMA secure_delete").fetchone()[0]
+        connection.execute("PRAGMA secure_delete = ON")
+        try:
+            yield
+        finally:
+            connection.execute(f"PRAGMA secure_delete = {int(previous)}")
+        # The checkpoint reports busy rather than failing while other processes read
+        retries = self._backoff()
+        while connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0] and next(retries, False):
+            pass
 
     # Password CRUD
     def fetch_passwords_meta(self):
         try:
-            with sqlite3.connect(self.DB_PATH) as connection:
-                cursor = connection.cursor()
-                cursor.execute("SELECT id, website, username, created_at FROM passwords ORDER BY created_at DESC")
-                return cursor.fetchall()
-        except sqlite3.Error:
-            return []
+            sealed = self.metadata_sealed()
+            cursor = self.connection.cursor()
+            cursor.execute(
+                f"SELECT id, website, username, created_at{self._meta_column(sealed)} FROM passwords "
+                "ORDER BY created_at DESC"
+            )
+            return self._open_rows(cursor.fetchall(), sealed)
+        except sqlite3.Error as e:
+            raise self._error("list entries", e) from e
         
-    def fetch_passwords_by_id(self, pw_id):
+    def fetch_passwords_page(self, limit, after=None, pattern=None):
+        """Newest-first page of (id, website, username, created_at) rows.
+
+        after is the (created_at, id) of the last row on the previous page, so
+        each page is one indexed range scan regardless of how deep it is. In a
+        sealed vault pattern must be a whole website, domain or username.
+        """
         try:
-            with sqlite3.connect(self.DB_PATH) as connection:
-                cursor = connection.cursor()
-                cursor.execute("SELECT password FROM passwords WHERE id = ?", (pw_id,))
-                row = cursor.fetchone()
-                return row[0] if row else None
-        except sqlite3.Error:
+            sealed = self.metadata_sealed()
+            clauses, params = [], []
+            if after is not None:
+                clauses.append("(created_at, id) < (?, ?)")
+                params.extend(after)
+            if pattern and sealed:
+                clause, values = self._index_match(pattern.strip())
+                clauses.append(clause)
+                params.extend(values)
+            elif pattern:
+                like = "%" + _escape_like(pattern) + "%"
+                clauses.append("(website LIKE ? ESCAPE '\\' OR username LIKE ? ESCAPE '\\')")
+                params.extend((like, like))
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            cursor = self.connection.cursor()
+            cursor.execute(
+                f"SELECT id, website, username, created_at{self._meta_column(sealed)} FROM passwords {where} "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                (*params, limit)
+            )
+            return self._open_rows(cursor.fetchall(), sealed)
+        except sqlite3.Error as e:
+            raise self._error("list entries", e) from e
+
+    def search_passwords(self, query, limit=20):
+        """Ranked (id, website, username, created_at) matches for query.
+
+        Every word in query must prefix-match a word of the website or
+        username. When nothing matches, each word is swapped for the closest
+        indexed terms so small typos (best towards the end of a word) still
+        find the entry. Sealed vaults have no word index: there the whole
+        query must equal a website, domain or username.
+        """
+        terms = [term.lower() for term in SEARCH_TERM.findall(query)]
+        if not terms:
             return []
+        try:
+            if self.metadata_sealed():
+                return self._find_sealed(*self._index_match(query.strip()), limit)
+            if not self._has_search_index():
+                return self.fetch_passwords_page(limit, pattern=query.strip())
+
+            rows = self._match_passwords(" AND ".join(f'"{term}"*' for term in terms), terms, limit)
+            if rows:
+                return rows
+
+            alternatives = [self._close_terms(term) for term in terms]
+            if not all(alternatives):
+                return []
+            match = " AND ".join(
+                "(" + " OR ".join(f'"{candidate}"' for candidate in candidates) + ")" for candidates in alternatives
+            )
+            return self._match_passwords(match, [candidates[0] for candidates in alternatives], limit)
+        except sqlite3.Error as e:
+            raise self._error("search entries", e) from e
+
+    def _has_search_index(self):
+        if self._search_index is None:
+            self._search_index = self.connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'passwords_fts'"
+            ).fetchone() is not None
+        return self._search_index
+
+    def _match_passwords(self, match, terms, limit):
+        # bm25 over every hit is linear in the hit count, so rank a bounded
+        # candidate set instead: exact words, then website prefixes, then shorter sites.
+        cursor = self.connection.execute('''
+            SELECT id, website, username, created_at FROM passwords
+            WHERE id IN (SELECT rowid FROM passwords_fts WHERE passwords_fts MATCH ? LIMIT ?)
+        ''', (match, SEARCH_CANDIDATES))
+        return sorted(cursor.fetchall(), key=lambda row: _search_rank(row, terms))[:limit]
+
+    def _close_terms(self, term):
+        # fts5vocab only scans forward efficiently, so read short ascending
+        # windows starting at a few prefixes of term and keep the similar words.
+        anchors = {term, term[:2], term[:len(term) // 2], term[:-1]}
+        vocabulary = set()
+        for anchor in anchors:
+            cursor = self.connection.execute(
+                "SELECT term FROM passwords_fts_vocab WHERE term >= ? LIMIT ?", (anchor, FUZZY_WINDOW)
+            )
+            vocabulary.update(row[0] for row in cursor.fetchall())
+        return difflib.get_close_matches(term, vocabulary, n=FUZZY_ALTERNATIVES, cutoff=FUZZY_CUTOFF)
+
+    def add_change_listener(self, callback):
+        self._change_listeners.append(callback)
+
+    def _notify_change(self, pw_id):
+        for callback in self._change_listeners:
+            callback(pw_id)
+
+    def fetch_passwords_by_id(self, pw_id):
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT password FROM passwords WHERE id = ?", (pw_id,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            raise self._error(f"read entry {pw_id}", e) from e
         
-    def insert_passsword(self, website, username, encrypted_password):
+    def fetch_password_entry(self, pw_id):
         try:
-            with sqlite3.connect(self.DB_PATH) as connection:
-                cursor = connection.cursor()
-                cursor.execute(
-                    "INSERT INTO passwords (website, username, password) VALUES (?, ?, ?)",
-                    (website, username, encrypted_password)
+            sealed = self.metadata_sealed()
+            cursor = self.connection.cursor()
+            cursor.execute(
+                f"SELECT id, website, username, password, version{self._meta_column(sealed)} FROM passwords WHERE id = ?",
+                (pw_id,)
+            )
+            row = cursor.fetchone()
+            return self._open_rows([row], sealed)[0] if row else None
+        except sqlite3.Error as e:
+            raise self._error(f"read entry {pw_id}", e) from e
+
+    def reserve_password_ids(self, count=1):
+        """First of count consecutive unused entry ids, claimed atomically."""
+        # max(id) guards against rows inserted without a reservation
+        try:
+            cursor = self.connection.execute(
+                "UPDATE password_ids SET next_id = max(next_id, (SELECT coalesce(max(id), 0) + 1 FROM passwords)) + ? "
+                "RETURNING next_id - ?",
+                (count, count)
+            )
+            return cursor.fetchall()[0][0]
+        except sqlite3.Error as e:
+            raise self._error("reserve entry ids", e) from e
+
+    def next_password_id(self):
+        """The id reserve_password_ids would hand out next, without claiming it."""
+        try:
+            return self.connection.execute(
+                "SELECT max(next_id, (SELECT coalesce(max(id), 0) + 1 FROM passwords)) FROM password_ids"
+            ).fetchone()[0]
+        except sqlite3.Error as e:
+            raise self._error("read the next entry id", e) from e
+
+    def insert_passsword(self, website, username, encrypted_password, pw_id=None):
+        try:
+            with self.transaction() as connection:
+                sealed = self.metadata_sealed()
+                if sealed and pw_id is None:
+                    # Sealed metadata is bound to the id, so it is needed up front
+                    pw_id = self.reserve_password_ids()
+                origin, clock, change_seq = self._journal()
+                cursor = connection.execute(
+                    f"INSERT INTO passwords (id, {METADATA_COLUMNS}, password, uid, updated_at, clock, origin, change_seq) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?)",
+                    (pw_id, *self._stored_metadata(pw_id, website, username, sealed), encrypted_password,
+                     _new_uid(), clock, origin, change_seq)
                 )
-                connection.commit()
-                return cursor.lastrowid
-        except sqlite3.Error:
-            return None
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            raise self._error("add the entry", e) from e
         
-    def update_password(self, pw_id, username=None, encrypted_password=None):
+    def update_password(self, pw_id, username=None, encrypted_password=None, expected_version=None):
+        """Rewrite an entry's username and/or ciphertext; False if there is no such entry.
+
+        expected_version is the version the caller read the entry at. If another
+        session or process has written the entry since, nothing is changed and
+        ConflictError is raised, so a stale edit never overwrites a newer one.
+        """
+        if username is None and encrypted_password is None:
+            return False
         try:
-            with sqlite3.connect(self.DB_PATH) as connection:
-                cursor = connection.cursor()
-                if username is not None and encrypted_password is not None:
-                    cursor.execute(
-                        "UPDATE passwords SET username = ?, password = ? WHERE id = ?", (username, encrypted_password, pw_id))
-                elif username is not None:
-                    cursor.execute("UPDATE passwords SET username = ? WHERE id = ?", (username, pw_id))
-                elif encrypted_password is not None:
-                    cursor.execute("UPDATE passwords SET password = ? WHERE id = ?", (encrypted_password, pw_id))
-                else:
+            with self.transaction() as connection:
+                # The write lock is held from here on, so the version cannot move under us
+                row = connection.execute("SELECT version FROM passwords WHERE id = ?", (pw_id,)).fetchone()
+                if row is None:
                     return False
-                connection.commit()
-        except sqlite3.Error:
-            return False
+                if expected_version is not None and row[0] != expected_version:
+                    raise ConflictError(
+                        f"Entry {pw_id} was changed by another session since it was read "
+                        f"(version {expected_version}, now {row[0]}); reload it and try again."
+                    )
+                assignments, params = [], []
+                if username is not None and self.metadata_sealed():
+                    # Website and username are sealed together, so both are rewritten
+                    entry = self.fetch_metadata_range(pw_id, pw_id)
+                    assignments.append("meta = ?, site_index = ?, domain_index = ?, user_index = ?")
+                    params.extend(self._codec().seal(pw_id, entry[0][1], username))
+                elif username is not None:
+                    assignments.append("username = ?")
+                    params.append(username)
+                if encrypted_password is not None:
+                    assignments.append("password = ?")
+                    params.append(encrypted_password)
+                origin, clock, change_seq = self._journal()
+                connection.execute(
+                    f"UPDATE passwords SET {', '.join(assignments)}, version = version + 1, "
+                    "updated_at = CURRENT_TIMESTAMP, clock = ?, origin = ?, change_seq = ? WHERE id = ?",
+                    (*params, clock, origin, change_seq, pw_id)
+                )
+            self._notify_change(pw_id)
+            return True
+        except sqlite3.Error as e:
+            raise self._error(f"update entry {pw_id}", e) from e
         
     def delete_password(self, pw_id):
         try:
-            with sqlite3.connect(self.DB_PATH) as connection:
-                cursor = connection.cursor()
-                cursor.execute("DELETE FROM passwords WHERE id = ?", (pw_id,))
-                connection.commit()
-                return True
-        except sqlite3.Error:
-            return False
+            with self.transaction() as connection:
+                # The tombstone carries the delete to other replicas
+                deleted = connection.execute("DELETE FROM passwords WHERE id = ? RETURNING id, uid", (pw_id,)).fetchall()
+                for _, uid in deleted:
+                    origin, clock, change_seq = self._journal()
+                    connection.execute(
+                        "INSERT OR REPLACE INTO tombstones (uid, clock, origin, change_seq) VALUES (?, ?, ?, ?)",
+                        (uid, clock, origin, change_seq)
+                    )
+            # Listeners only hear about a row that was actually removed
+            for deleted_id, _ in deleted:
+                self._notify_change(deleted_id)
+            return bool(deleted)
+        except sqlite3.Error as e:
+            raise self._error(f"delete entry {pw_id}", e) from e
         
-    def fetch_all_encrypted(self):
+    def iter_encrypted_chunks(self, chunk_size=1000):
+        # Keyset scan by id so callers can rewrite rows between chunks.
+        # Errors propagate: bulk callers run inside transaction() and must roll back.
+        sealed = self.metadata_sealed()
+        last_id = 0
+        while True:
+            cursor = self.connection.execute(
+                f"SELECT id, website, password{self._meta_column(sealed)} FROM passwords WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size)
+            )
+            chunk = cursor.fetchall()
+            if not chunk:
+                return
+            yield self._open_rows(chunk, sealed, username=False)
+            last_id = chunk[-1][0]
+
+    def find_existing_pairs(self, pairs):
+        # Subset of (website, username) pairs already stored; errors propagate to bulk callers
+        pairs = set(pairs)
+        sealed = self.metadata_sealed()
+        if sealed:
+            # Sealed vaults seek the exact-website blind index instead
+            column, keys = "site_index", sorted({self._codec().index("site", website) for website, _ in pairs})
+        else:
+            column, keys = "website", sorted({website for website, _ in pairs})
+        existing = set()
+        # Seek the index per website, staying under SQLite's parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            cursor = self.connection.execute(
+                f"SELECT id, website, username{self._meta_column(sealed)} FROM passwords "
+                f"WHERE {column} IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            existing.update(row[1:] for row in self._open_rows(cursor.fetchall(), sealed) if row[1:] in pairs)
+        return existing
+
+    def insert_passwords_bulk(self, rows):
+        # rows: iterable of (id, website, username, encrypted_password)
+        rows = list(rows)
+        with self.transaction() as connection:
+            sealed = self.metadata_sealed()
+            origin, clock, first_seq = self._journal(len(rows))
+            connection.executemany(
+                f"INSERT INTO passwords (id, {METADATA_COLUMNS}, password, uid, updated_at, clock, origin, change_seq) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?)",
+                [
+                    (pw_id, *self._stored_metadata(pw_id, website, username, sealed), token,
+                     _new_uid(), clock, origin, first_seq + offset)
+                    for offset, (pw_id, website, username, token) in enumerate(rows)
+                ]
+            )
+
+    def update_passwords_bulk(self, rows):
+        # rows: iterable of (encrypted_password, id). Re-encryption under a new key
+        # leaves the plaintext unchanged, so it is not journaled for sync.
+        self.connection.executemany("UPDATE passwords SET password = ?, version = version + 1 WHERE id = ?", rows)
+
+    def iter_entries(self, chunk_size=1000):
+        # One cursor stepped with fetchmany: a single statement reads one consistent
+        # snapshot and only chunk_size rows are held at a time. Errors propagate.
+        sealed = self.metadata_sealed()
+        cursor = self.connection.execute(
+            f"SELECT id, website, username, password, created_at{self._meta_column(sealed)} FROM passwords ORDER BY id"
+        )
         try:
-            with sqlite3.connect(self.DB_PATH) as connection:
-                cursor = connection.cursor()
-                cursor.execute("SELECT id, password FROM passwords")
-                return cursor.fetchall()
-        except sqlite3.Error:
-            return []
\ No newline at end of file
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    return
+                yield self._open_rows(chunk, sealed)
+        finally:
+            cursor.close()
+
+    # Change journal
+    def _location(self):
+        return f"{platform.node()}:{os.path.realpath(self.DB_PATH)}"
+
+    def replica_id(self):
+        """This file's id as a sync replica.
+
+        A file that was copied or moved (including a restored snapshot) gets a new
+        id the first time it is opened at its new location, so two copies of one
+        vault never write under the same id.
+        """
+        if self._replica_id is None:
+            location = self._location()
+            replica_id, stored = self.connection.execute("SELECT replica_id, location FROM replica").fetchone()
+            if stored != location:
+                with self.transaction() as connection:
+                    # Read again under the write lock, in case another process just did this
+                    replica_id, stored = connection.execute("SELECT replica_id, location FROM replica").fetchone()
+                    if stored != location:
+                        replica_id = os.urandom(8).hex()
+                        connection.execute("UPDATE replica SET replica_id = ?, location = ?", (replica_id, location))
+            self._replica_id = replica_id
+        return self._replica_id
+
+    def _journal(self, count=1, seen_clock=0):
+        # (origin, clock, first change_seq) for count changes written in the caller's
+        # transaction; the Lamport clock also moves past any clock seen from a peer
+        origin = self.replica_id()
+        clock, first_seq = self.connection.execute(
+            "UPDATE replica SET clock = max(clock, ?) + 1, change_seq = change_seq + ? "
+            "RETURNING clock, change_seq - ? + 1",
+            (seen_clock, count, count)
+        ).fetchall()[0]
+        return origin, clock, first_seq
+
+    def journal_head(self):
+        return self.connection.execute("SELECT change_seq FROM replica").fetchone()[0]
+
+    def received_seq(self, peer):
+        """Position in peer's journal up to which its changes have been applied here."""
+        row = self.connection.execute("SELECT received_seq FROM sync_peers WHERE replica_id = ?", (peer,)).fetchone()
+        return row[0] if row else 0
+
+    def fetch_changes(self, since, exclude=None, limit=500):
+        """(rows, head): up to limit journal entries after since, in journal order.
+
+        Rows are (change_seq, uid, id, website, username, password, version,
+        created_at, updated_at, clock, origin) with id None for tombstones.
+        Changes last written by the exclude replica are left out. head is the
+        journal position the rows were read at. Errors propagate.
+        """
+        connection = self.connection
+        owns_snapshot = not connection.in_transaction
+        # One read snapshot, so head never covers a change the query missed
+        if owns_snapshot:
+            connection.execute("BEGIN")
+        try:
+            sealed = self.metadata_sealed()
+            rows = connection.execute(f"""
+                SELECT change_seq, uid, id, website, username, password, version, created_at, updated_at, clock,
+                    origin{self._meta_column(sealed)}
+                FROM passwords WHERE change_seq > ? AND coalesce(origin, '') != ?
+                UNION ALL
+                SELECT change_seq, uid, NULL, NULL, NULL, NULL, NULL, NULL, deleted_at, clock,
+                    origin{", NULL" if sealed else ""}
+                FROM tombstones WHERE change_seq > ? AND coalesce(origin, '') != ?
+                ORDER BY change_seq LIMIT ?
+            """, (since, exclude or "", since, exclude or "", limit)).fetchall()
+            head = self.journal_head()
+        finally:
+            if owns_snapshot:
+                connection.execute("COMMIT")
+        return self._open_rows(rows, sealed, website_column=3), head
+
+    def fetch_sync_stamp(self, uid):
+        """(id, clock, origin) of the entry or tombstone with this uid (id None if deleted), or None."""
+        row = self.connection.execute("SELECT id, clock, origin FROM passwords WHERE uid = ?", (uid,)).fetchone()
+        return row or self.connection.execute(
+            "SELECT NULL, clock, origin FROM tombstones WHERE uid = ?", (uid,)
+        ).fetchone()
+
+    def store_synced_entry(self, pw_id, uid, website, username, encrypted_password, created_at, updated_at, clock, origin):
+        # Writes a peer's version of an entry, keeping its clock and origin; pw_id is
+        # reserved by the caller for new entries. Callers hold a transaction.
+        stored = self._stored_metadata(pw_id, website, username, self.metadata_sealed())
+        _, _, change_seq = self._journal(seen_clock=clock)
+        self.connection.execute("DELETE FROM tombstones WHERE uid = ?", (uid,))
+        self.connection.execute(f"""
+            INSERT INTO passwords (id, {METADATA_COLUMNS}, password, created_at, uid, updated_at, clock, origin, change_seq)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                website = excluded.website, username = excluded.username, meta = excluded.meta,
+                site_index = excluded.site_index, domain_index = excluded.domain_index,
+                user_index = excluded.user_index, password = excluded.password,
+                version = version + 1, updated_at = excluded.updated_at,
+                clock = excluded.clock, origin = excluded.origin, change_seq = excluded.change_seq
+        """, (pw_id, *stored, encrypted_password, created_at, uid, updated_at, clock, origin, change_seq))
+        self._notify_change(pw_id)
+
+    def store_synced_delete(self, uid, deleted_at, clock, origin):
+        # Applies a peer's delete; the tombstone is kept even if the entry was never
+        # seen here, so an older copy arriving later stays deleted
+        _, _, change_seq = self._journal(seen_clock=clock)
+        for (pw_id,) in self.connection.execute("DELETE FROM passwords WHERE uid = ? RETURNING id", (uid,)).fetchall():
+            self._notify_change(pw_id)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO tombstones (uid, clock, origin, change_seq, deleted_at) VALUES (?, ?, ?, ?, ?)",
+            (uid, clock, origin, change_seq, deleted_at)
+        )
+
+    def mark_received(self, peer, received_seq):
+        self.connection.execute("""
+            INSERT INTO sync_peers (replica_id, received_seq, synced_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (replica_id) DO UPDATE SET received_seq = excluded.received_seq, synced_at = excluded.synced_at
+        """, (peer, received_seq))
@@ -0,0 +1,209 @@
+import functools
+import os
+import string
+
+from .wordlist import WORDS
+
+CLASSES = {
+    "lower": string.ascii_lowercase,
+    "upper": string.ascii_uppercase,
+    "digits": string.digits,
+    "symbols": string.punctuation,
+}
+MODES = ("random", "pronounceable", "passphrase")
+CONSONANTS = "bcdfghjklmnprstvz"
+VOWELS = "aeiou"
+
+
+@functools.lru_cache(maxsize=64)
+def _translation_table(alphabet):
+    # Byte b maps to alphabet[b % n] when b falls below the largest multiple of n
+    # that fits in a byte; the rest map to NUL and are dropped, so every character
+    # is equally likely (rejection sampling without a Python-level loop per byte)
+    accepted = len(alphabet) * (256 // len(alphabet))
+    return bytes(ord(alphabet[b % len(alphabet)]) if b < accepted else 0 for b in range(256)), accepted
+
+
+class EntropyPool:
+    """Bytes from os.urandom fetched in bulk and turned into unbiased choices."""
+
+    def __init__(self, chunk=4096):
+        self.chunk = chunk
+        self._buffer = b""
+        self._offset = 0
+
+    def take(self, count):
+        if self._offset + count > len(self._buffer):
+            self._buffer = self._buffer[self._offset:] + os.urandom(max(self.chunk, count))
+            self._offset = 0
+        data = self._buffer[self._offset:self._offset + count]
+        self._offset += count
+        return data
+
+    def below(self, n):
+        """A uniform integer in [0, n)."""
+        if n <= 1:
+            return 0
+        bits = (n - 1).bit_length()
+        size = (bits + 7) // 8
+        mask = (1 << bits) - 1
+        while True:
+            value = int.from_bytes(self.take(size), "big") & mask
+            if value < n:
+                return value
+
+    def choices(self, alphabet, k):
+        """k characters drawn independently and uniformly from an ASCII alphabet."""
+        table, accepted = _translation_table(alphabet)
+        drawn = b""
+        while len(drawn) < k:
+            # Enough bytes for the expected rejection rate, plus a little slack
+            raw = self.take((k - len(drawn)) * 256 // accepted + 8)
+            drawn += raw.translate(table).replace(b"\0", b"")
+        return drawn[:k].decode("ascii")
+
+
+class PasswordPolicy:
+    """What a generated password must look like.
+
+    Every class in classes is guaranteed to appear at least once, characters in
+    exclude never appear, and mode picks between uniformly random characters,
+    pronounceable consonant-vowel syllables, or a passphrase of words from the
+    bundled wordlist (words and separator apply to passphrases only).
+    """
+
+    def __init__(self, length=16, classes=tuple(CLASSES), exclude="", mode="random", words=6, separator="-"):
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode!r} (expected one of {', '.join(MODES)})")
+        unknown = set(classes) - set(CLASSES)
+        if unknown:
+            raise ValueError(f"unknown character classes: {', '.join(sorted(unknown))}")
+        if not classes:
+            raise ValueError("at least one character class is required")
+
+        self.length = length
+        self.classes = tuple(name for name in CLASSES if name in classes)
+        self.exclude = set(exclude)
+        self.mode = mode
+        self.words = words
+        self.separator = separator
+
+        self.alphabets = {name: self._allowed(CLASSES[name]) for name in self.classes}
+        for name, alphabet in self.alphabets.items():
+            if not alphabet:
+                raise ValueError(f"every {name} character is excluded")
+        self.alphabet = "".join(self.alphabets.values())
+
+        if mode == "random" and length < len(self.classes):
+            raise ValueError(f"length {length} is too short for {len(self.classes)} required classes")
+        if mode == "pronounceable":
+            if "lower" not in self.classes and "upper" not in self.classes:
+                raise ValueError("pronounceable passwords need lower or upper case letters")
+            # Letters whose upper or lower case is excluded are left out entirely
+            self.consonants = "".join(c for c in self._allowed(CONSONANTS) if c.upper() not in self.exclude)
+            self.vowels = "".join(c for c in self._allowed(VOWELS) if c.upper() not in self.exclude)
+            if not self.consonants or not self.vowels:
+                raise ValueError("too many letters excluded for pronounceable passwords")
+            if self._letters() < 2:
+                raise ValueError(f"length {length} is too short for a pronounceable password")
+        if mode == "passphrase":
+            if words < 1:
+                raise ValueError("a passphrase needs at least one word")
+            if "lower" not in self.classes and "upper" not in self.classes:
+                raise ValueError("passphrases need lower or upper case letters")
+            if self.exclude & set(separator):
+                raise ValueError("the separator uses an excluded character")
+            self.wordlist = tuple(word for word in WORDS if not self.exclude & set(word + word.upper()))
+            if not self.wordlist:
+                raise ValueError("every word in the wordlist uses an excluded character")
+
+    def _allowed(self, characters):
+        return "".join(c for c in characters if c not in self.exclude)
+
+    def _letters(self):
+        # Pronounceable passwords end with one digit and/or one symbol when required
+        return self.length - ("digits" in self.classes) - ("symbols" in self.classes)
+
+
+class PasswordGenerator:
+    """Passwords that satisfy a PasswordPolicy by construction.
+
+    No generate-then-check loop is needed: one character of every required
+    class is placed at a uniformly random position among characters drawn from
+    the combined alphabet. batch() draws the entropy for all passwords at once.
+    """
+
+    def __init__(self, policy=None, pool=None):
+        self.policy = policy or PasswordPolicy()
+        self.pool = pool or EntropyPool()
+
+    def generate(self):
+        return self.batch(1)[0]
+
+    def batch(self, count):
+        mode = self.policy.mode
+        if mode == "pronounceable":
+            return [self._pronounceable() for _ in range(count)]
+        if mode == "passphrase":
+            return [self._passphrase() for _ in range(count)]
+        return self._random(count)
+
+    def _random(self, count):
+        policy = self.policy
+        fill = policy.length - len(policy.classes)
+        filler = self.pool.choices(policy.alphabet, count * fill)
+        required = [self.pool.choices(alphabet, count) for alphabet in policy.alphabets.values()]
+
+        passwords = []
+        for i in range(count):
+            chars = list(filler[i * fill:(i + 1) * fill])
+            # Inserting each required character at a uniform position gives a
+            # uniform placement; the filler is i.i.d. so its order needs no shuffle
+            for drawn in required:
+                chars.insert(self.pool.below(len(chars) + 1), drawn[i])
+            passwords.append("".join(chars))
+        return passwords
+
+    def _pronounceable(self):
+        policy = self.policy
+        letters = policy._letters()
+        consonants = self.pool.choices(policy.consonants, (letters + 1) // 2)
+        vowels = self.pool.choices(policy.vowels, letters // 2)
+        word = "".join(c + v for c, v in zip(consonants, vowels)) + consonants[len(vowels):]
+        word = self._case(word)
+        for name in ("digits", "symbols"):
+            if name in policy.classes:
+                word += self.pool.choices(policy.alphabets[name], 1)
+        return word
+
+    def _passphrase(self):
+        policy = self.policy
+        words = [self._case(policy.wordlist[self.pool.below(len(policy.wordlist))]) for _ in range(policy.words)]
+        if "digits" in policy.classes:
+            words[-1] += self.pool.choices(policy.alphabets["digits"], 1)
+        phrase = policy.separator.join(words)
+        # The separator only supplies the symbol if it appears, which needs two words
+        separated = len(words) > 1 and set(policy.separator) & set(policy.alphabets["symbols"])
+        if "symbols" in policy.classes and not separated:
+            phrase += self.pool.choices(policy.alphabets["symbols"], 1)
+        return phrase
+
+    def _case(self, word):
+        classes = self.policy.classes
+        if "lower" not in classes:
+            return word.upper()
+        if "upper" in classes:
+            return word[0].upper() + word[1:]
+        return word
+
+
+def generate(policy=None):
+    return PasswordGenerator(policy).generate()
+
+
+def generate_batch(count, policy=None):
+    """count passwords for one policy, drawing their entropy in bulk."""
+    policy = policy or PasswordPolicy()
+    # Roughly the bytes the batch needs, so os.urandom is called only a few times
+    pool = EntropyPool(chunk=max(4096, count * max(policy.length, 16) * 2))
+    return PasswordGenerator(policy, pool).batch(count)
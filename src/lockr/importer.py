@@ -0,0 +1,232 @@
+import csv
+import itertools
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+from .ciphers import CipherEngine, entry_aad
+from .crypto import CryptoManager
+
+BATCH_SIZE = 500
+READ_CHUNK = 64 * 1024
+
+# Column names used by browser and password-manager exports, most specific first
+WEBSITE_FIELDS = ("website", "url", "login_uri", "uri", "origin", "name", "title")
+USERNAME_FIELDS = ("username", "login_username", "login", "user", "email")
+PASSWORD_FIELDS = ("password", "login_password")
+
+# Per-process cipher, set up once by the pool initializer
+_worker_engine = None
+
+def _init_worker(key: bytes, cipher: str):
+    global _worker_engine
+    _worker_engine = CipherEngine(key, cipher)
+
+def _encrypt_batch(rows):
+    return _encrypt(rows, _worker_engine)
+
+def _encrypt(rows, engine):
+    # rows: (id, website, username, password) with ids already reserved
+    return [
+        CryptoManager.encrypt_token(engine, password, entry_aad(pw_id, website))
+        for pw_id, website, _, password in rows
+    ]
+
+
+def read_records(handle, fmt, passphrase=None):
+    """Yield raw records from an open CSV, JSON (array or JSON lines) or lockr export, one at a time."""
+    if fmt == "lockr":
+        from .backup import read_archive
+
+        yield from read_archive(handle, passphrase or "")
+    elif fmt == "csv":
+        for row in csv.DictReader(handle):
+            yield {(key or "").strip().lower(): value for key, value in row.items()}
+    elif fmt == "json":
+        yield from _read_json(handle)
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    return {".csv": "csv", ".lockr": "lockr"}.get(extension, "json")
+
+def _read_json(handle):
+    first = handle.read(1)
+    while first.isspace():
+        first = handle.read(1)
+    if first != "[":
+        # JSON lines
+        for line in itertools.chain([first + handle.readline()], handle):
+            if line.strip():
+                yield json.loads(line)
+        return
+
+    # Top-level array, decoded element by element so the file is never held in memory
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while True:
+        buffer = buffer.lstrip().removeprefix(",").lstrip()
+        if buffer.startswith("]"):
+            return
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            more = handle.read(READ_CHUNK)
+            if not more:
+                raise ValueError("Truncated JSON array in import file.")
+            buffer += more
+            continue
+        yield record
+        buffer = buffer[end:]
+
+def normalize_record(record):
+    """(website, username, password) from one export record, or None when incomplete."""
+    if not isinstance(record, dict):
+        return None
+    # Bitwarden-style items nest credentials under "login"
+    login = record.get("login")
+    if isinstance(login, dict):
+        uris = login.get("uris") or []
+        record = {
+            "website": (uris[0].get("uri") if uris and isinstance(uris[0], dict) else None) or record.get("name"),
+            "username": login.get("username"),
+            "password": login.get("password"),
+        }
+
+    website = _first_field(record, WEBSITE_FIELDS)
+    username = _first_field(record, USERNAME_FIELDS)
+    password = _first_field(record, PASSWORD_FIELDS)
+    if not website or not username or not password:
+        return None
+    if "://" in website:
+        website = urlsplit(website).hostname or website
+    return website, username, password
+
+def _first_field(record, names):
+    for name in names:
+        value = record.get(name)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return None
+
+
+class ImportManager:
+    """Streams an export file into the vault.
+
+    Records are read lazily, deduplicated against stored website/username pairs,
+    encrypted in a process pool and inserted with executemany, one transaction
+    per batch. Only a bounded number of batches is in flight at a time, so
+    memory stays flat however large the export is.
+    """
+
+    def __init__(self, database, crypto, workers=None, batch_size=BATCH_SIZE):
+        self.database = database
+        self.crypto = crypto
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+
+    def import_file(self, path, fmt=None, progress=None, passphrase=None):
+        """Import path; progress receives the running stats dict after each batch.
+
+        passphrase is only used for lockr export archives.
+        """
+        if not self.crypto.key:
+            raise RuntimeError("Fernet instance not initialized.")
+        fmt = fmt or detect_format(path)
+
+        self.stats = {"read": 0, "imported": 0, "duplicates": 0, "invalid": 0, "seconds": 0.0, "rows_per_second": 0.0}
+        self._start = time.perf_counter()
+        self._progress = progress
+        # (website, username) pairs encrypted but not yet committed
+        self._pending_pairs = set()
+        # Ids are predicted for encryption and claimed when each batch is written
+        self._next_id = self.database.next_password_id()
+        self._unclaimed = 0
+
+        with open(path, newline="", encoding="utf-8-sig") as handle:
+            batches = itertools.batched(read_records(handle, fmt, passphrase), self.batch_size)
+            if self.workers > 1:
+                self._import_parallel(batches)
+            else:
+                for batch in batches:
+                    rows = self._prepare(batch)
+                    self._write(rows, _encrypt(rows, self.crypto.engine))
+        return self._update_rate()
+
+    def _import_parallel(self, batches):
+        pending = deque()
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.crypto.key, self.crypto.cipher)) as pool:
+            for batch in batches:
+                rows = self._prepare(batch)
+                pending.append((rows, pool.submit(_encrypt_batch, rows)))
+                if len(pending) >= self.workers * 2:
+                    rows, future = pending.popleft()
+                    self._write(rows, future.result())
+
+            while pending:
+                rows, future = pending.popleft()
+                self._write(rows, future.result())
+
+    def _prepare(self, batch):
+        # Normalize and drop records that are incomplete or already present
+        self.stats["read"] += len(batch)
+        rows = []
+        for record in batch:
+            row = normalize_record(record)
+            if row is None:
+                self.stats["invalid"] += 1
+            else:
+                rows.append(row)
+
+        pairs = {(website, username) for website, username, _ in rows}
+        taken = self.database.find_existing_pairs(pairs) | (pairs & self._pending_pairs)
+        fresh = []
+        for row in rows:
+            pair = row[:2]
+            if pair in taken:
+                self.stats["duplicates"] += 1
+                continue
+            taken.add(pair)
+            fresh.append(row)
+            self._pending_pairs.add(pair)
+        if not fresh:
+            return []
+
+        # Ciphertexts are bound to their entry id, so ids are predicted before encrypting
+        first_id = self._next_id
+        self._next_id += len(fresh)
+        self._unclaimed += len(fresh)
+        return [(first_id + offset, *row) for offset, row in enumerate(fresh)]
+
+    def _claim_ids(self, rows, tokens):
+        # Claimed in the transaction that inserts the rows, so a failed batch claims nothing
+        first_id = self.database.reserve_password_ids(len(rows))
+        if first_id != rows[0][0]:
+            # Another process added entries since the ids were predicted
+            rows = [(first_id + offset, *row[1:]) for offset, row in enumerate(rows)]
+            tokens = _encrypt(rows, self.crypto.engine)
+        self._unclaimed -= len(rows)
+        # Batches prepared from here on follow the ids actually claimed
+        self._next_id = first_id + len(rows) + self._unclaimed
+        return rows, tokens
+
+    def _write(self, rows, tokens):
+        with self.database.transaction():
+            if rows:
+                rows, tokens = self._claim_ids(rows, tokens)
+            self.database.insert_passwords_bulk(
+                (pw_id, website, username, token) for (pw_id, website, username, _), token in zip(rows, tokens)
+            )
+        self._pending_pairs.difference_update((website, username) for _, website, username, _ in rows)
+        self.stats["imported"] += len(rows)
+        if self._progress:
+            self._progress(self._update_rate())
+
+    def _update_rate(self):
+        elapsed = time.perf_counter() - self._start
+        self.stats["seconds"] = elapsed
+        self.stats["rows_per_second"] = self.stats["read"] / elapsed if elapsed else 0.0
+        return dict(self.stats)
@@ -1,8 +1,160 @@
-from .manager import Server
+import argparse
+import getpass
+import json
+import os
+import sys
 
-def main():
-    manager = Server()
+# Keep this module light: heavy imports happen inside the command that needs them
+from .cli import CLIManager, add_script_commands
+from .agent import AgentClient, DEFAULT_IDLE_TIMEOUT, SOCKET_ENV
+from .tracing import dump, install_from_env
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="lockr", description="Secure command-line password manager.")
+    parser.add_argument(
+        "--vault", action="append",
+        help="named vault to use (default: $LOCKR_VAULT or the default vault); "
+             "repeat to open several in the interactive session or to search them all",
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    agent = commands.add_parser("agent", help="background process that keeps the vault unlocked")
+    agent_commands = agent.add_subparsers(dest="agent_command", required=True)
+    start = agent_commands.add_parser("start", help="unlock the vault and start the agent")
+    start.add_argument("--timeout", type=int, default=DEFAULT_IDLE_TIMEOUT, help="idle seconds before the key is dropped")
+    start.add_argument("--foreground", action="store_true", help="do not detach from the terminal")
+    for name, description in (
+        ("status", "show whether the agent is running and unlocked"),
+        ("lock", "drop the key from agent memory"),
+        ("unlock", "unlock a locked agent again"),
+        ("stop", "lock and shut the agent down"),
+    ):
+        agent_commands.add_parser(name, help=description)
+
+    add_script_commands(commands)
+    return parser
+
+def _unlocked_agent(args, password):
+    # (agent bound to its socket, None), or (None, why it could not start)
+    from .agent import AgentServer
+    from .crypto import CryptoManager
+    from .database import DatabaseManager
+    from .service import VaultService
+
+    try:
+        database = DatabaseManager()
+        crypto = CryptoManager(database)
+        if not crypto.unlock(password):
+            return None, "Incorrect master password."
+        agent = AgentServer(VaultService(database, crypto), idle_timeout=args.timeout)
+        agent.bind()
+    except (RuntimeError, OSError) as e:
+        return None, str(e)
+    return agent, None
+
+def _agent_start(args):
+    password = getpass.getpass("Master password: ")
+    if args.foreground:
+        agent, error = _unlocked_agent(args, password)
+        if error:
+            print(error, file=sys.stderr)
+            return 1
+        _print_agent_env(agent.socket_path, os.getpid())
+        agent.serve_forever()
+        return 0
+
+    # Fork before unlocking: a forked child does not inherit mlock, so the key
+    # must be derived in the process that keeps it. The child reports back
+    # over a pipe once it is unlocked and listening.
+    ready_fd, report_fd = os.pipe()
+    pid = os.fork()
+    if pid:
+        os.close(report_fd)
+        with os.fdopen(ready_fd) as ready:
+            status = json.loads(ready.read() or '{"error": "The agent exited before it was ready."}')
+        if "socket" in status:
+            _print_agent_env(status["socket"], pid)
+            return 0
+        os.waitpid(pid, 0)
+        print(status["error"], file=sys.stderr)
+        return 1
+
+    code = 1
+    try:
+        os.close(ready_fd)
+        os.setsid()
+        agent, error = _unlocked_agent(args, password)
+        del password
+        with os.fdopen(report_fd, "w") as report:
+            report.write(json.dumps({"error": error} if error else {"socket": agent.socket_path}))
+        if error:
+            return 1
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        agent.serve_forever()
+        code = 0
+    finally:
+        # os._exit skips atexit handlers, so write any trace now; the child
+        # must never return into the parent's code path
+        dump()
+        os._exit(code)
+
+def _print_agent_env(socket_path, pid):
+    # Shell-evaluable, like ssh-agent: eval "$(lockr agent start)"
+    print(f"{SOCKET_ENV}={socket_path}; export {SOCKET_ENV};")
+    print(f"echo Agent pid {pid};", flush=True)
+
+def _agent_command(args):
+    if args.agent_command == "start":
+        return _agent_start(args)
+
+    client = AgentClient()
+    fields = {}
+    if args.agent_command == "unlock":
+        fields["password"] = getpass.getpass("Master password: ")
+    try:
+        response = client.request(args.agent_command, **fields)
+    except OSError:
+        print(f"No agent is listening on {client.socket_path}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+
+    if not response.get("ok"):
+        print(response.get("error"), file=sys.stderr)
+        return 1
+    if args.agent_command == "status":
+        state = "locked" if response["locked"] else "unlocked"
+        print(f"Agent pid {response['pid']} is {state}.")
+        cache = response.get("cache")
+        if cache:
+            print(
+                f"Secret cache: {cache['size']}/{cache['capacity']} entries, "
+                f"{cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate']:.0%} hit rate)."
+            )
+    return 0
+
+def main(argv=None):
+    install_from_env()
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.vault:
+        if len(args.vault) > 1 and args.command not in (None, "search"):
+            parser.error("--vault can only be repeated for the interactive session and search")
+        # The first vault is the one every component opens by default
+        from .database import VAULT_ENV
+
+        os.environ[VAULT_ENV] = args.vault[0]
+    if args.command == "agent":
+        return _agent_command(args)
+    if args.command:
+        return CLIManager(args).run()
+
+    from .manager import Server
+
+    manager = Server(vaults=args.vault or ())
     manager.run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
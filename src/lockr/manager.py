@@ -1,27 +1,43 @@
-import time
-import pyperclip
-from rich.console import Console
-from rich.table import Table
+import asyncio
+import sqlite3
 
 from .database import DatabaseManager
 from .ui import UIManager
+from .pager import EntryPager, entries_table
 from .crypto import CryptoManager
-from .utils import generate_password, check_complexity
+from .database import VaultError, list_vaults, parse_entry_id
+from .vaults import VaultSet
+from .generator import PasswordPolicy, generate
+from .utils import check_complexity, clear_clipboard, copy_secret
+from .repl import (
+    BackgroundTasks, PromptThread, ReplConsole, timeout_from_env,
+    CLIPBOARD_CLEAR_ENV, DEFAULT_CLIPBOARD_CLEAR, DEFAULT_IDLE_LOCK, IDLE_LOCK_ENV, REVEAL_SECONDS,
+)
 
 class Server:
-    def __init__(self):
+    def __init__(self, vaults=()):
         self.version = "1.0.0"
-        self.console = Console()
+        self.console = ReplConsole(on_prompt=self._arm_idle_lock, on_answer=self._pause_idle_lock)
+        # Timers and page loads run on the event loop started by run()
+        self.tasks = None
+        self.idle_lock = timeout_from_env(IDLE_LOCK_ENV, DEFAULT_IDLE_LOCK)
+        self.clipboard_clear = timeout_from_env(CLIPBOARD_CLEAR_ENV, DEFAULT_CLIPBOARD_CLEAR)
         self.database = DatabaseManager()
         self.crypto = CryptoManager(self.database)
+        # Every vault open in this session; the active one is self.database/self.crypto
+        self.vaults = VaultSet()
+        self.vaults.add(self.database.vault, self.database, self.crypto)
+        # Further vaults to unlock alongside the active one at startup
+        self.startup_vaults = [name for name in vaults if name != self.database.vault]
         self.ui = UIManager()
+        self.pager = EntryPager(self.database, self.console)
         self.is_authenticated = False
         self.fernet = None
         self.most_recent_id = None
 
 
     def _check_master_password_exist(self):
-        return True if self.database.get_master_hash() else False
+        return self.crypto.has_master_password()
         
     def authenticate(self):
         while not self.is_authenticated:
@@ -29,15 +45,20 @@ class Server:
             if attempt in ("/quit", "/q"):
                 print("Exiting...")
                 raise SystemExit()
-            if self.crypto.verify_master_password(attempt):
-                self.crypto.create_fernet(attempt)
+            passwords = {self.database.vault: attempt}
+            passwords.update(self._prompt_vault_passwords(self.startup_vaults, reuse=attempt))
+            # All KDFs run at once, so extra vaults add no unlock latency
+            results = self._unlock_vaults(passwords)
+            if results.get(self.database.vault):
                 self.is_authenticated = True
+                self.startup_vaults = []
                 self.console.print("Authentication successful!", style="green")
-            else:
+            elif results:
+                # Empty when the vault could not be read; _unlock_vaults printed why
                 self.console.print("Incorrect master password. Access denied.", style="red")
                 print("Please try again or type /quit to exit.")
             
-    def create_master_password(self):
+    def _prompt_new_master_password(self):
         while True:
             choice = self.console.input("[yellow]> [/yellow]Choose master password method - /create to type your own, /generate for a random one: ").strip()
 
@@ -51,29 +72,34 @@ class Server:
                         self.console.print(f"Password must contain: {', '.join(reqs)}", style="red")
                 break
             elif choice in ("/generate", "/g"):
-                while True:
-                    length = self.console.input("[yellow]> [/yellow]Enter password length (min 16): ").strip()
-
-                    if not length.isdigit():
-                        print("Please enter a valid number.")
-
-                    if int(length) < 16:
-                        print("Password must have atleast 16 characters.")
-                        continue
-
-                    pwd = generate_password(int(length))
-                    self.console.print(f"Generated master password: [bold]{pwd}[/bold]\n", style="green")
-                    self.console.print("The password will be visible only for 10 seconds; please securely store it as it cannot be recovered later.\n", style="red")
-
-                    time.sleep(10)
-                    break
+                pwd = self._generate_password()
+                self.console.print(f"Generated master password: [bold]{pwd}[/bold]\n", style="green")
+                self.console.print(f"The password will be visible only for {REVEAL_SECONDS} seconds; please securely store it as it cannot be recovered later.\n", style="red")
+                self._hide_later()
                 break
             else:
                 self.console.print("Invalid input. Enter '/create' or '/generate'", style="red")
+        return pwd
 
-        # hash & store
-        self.crypto.hash_master_password(pwd)
-        self.crypto.create_fernet(pwd)
+    def _generate_password(self):
+        # Generated passwords satisfy check_complexity by construction
+        while True:
+            length = self.console.input("[yellow]> [/yellow]Enter password length (min 16), or /passphrase for words: ").strip()
+            if length in ("/passphrase", "/p"):
+                return generate(PasswordPolicy(mode="passphrase"))
+            if not length.isdigit():
+                self.console.print("Please enter a valid number.", style="red")
+                continue
+            if int(length) < 16:
+                self.console.print("Password must have atleast 16 characters.", style="red")
+                continue
+            return generate(PasswordPolicy(length=int(length)))
+
+    def create_master_password(self):
+        pwd = self._prompt_new_master_password()
+
+        # derive & store, generating the vault's data key
+        self.crypto.initialize_key(pwd)
         self.is_authenticated = True
 
     def _validate_input(self, value, field_name):
@@ -83,37 +109,65 @@ class Server:
         return True
 
     def handle_view(self):
-        entries = self.database.fetch_passwords_meta()
-        if not entries:
-            self.console.print("No passwords found.", style="yellow")
-            return 
-        
-        table = Table(title="\nStored password entries")
-        table.add_column("ID", justify="center", style="cyan", no_wrap=True)
-        table.add_column("Website", justify="center", style="cyan", no_wrap=True)
-        table.add_column("Username", justify="center", style="cyan", no_wrap=True)
-        table.add_column("Creation Date", justify="center", style="cyan", no_wrap=True)
-
-        for entry in entries:
-            table.add_row(f"{entry[0]}", f"{entry[1]}", f"{entry[2]}", f"{entry[3]}")
-        self.console.print(table)
-        print("")
-
-        id = self.console.input("[yellow]> [/yellow]Enter the ID of the password you want to view: ").strip()
-        if not self._validate_input(id, "ID"):
-            print("")
+        id = self.pager.select("Enter the ID of the password you want to view")
+        if id is None:
             return
-        enc = self.database.fetch_passwords_by_id(id)
-        if not enc:
+        self._show_password(id)
+
+    def _show_password(self, id, vault=None):
+        database, crypto = self.vaults.get(vault) if vault else (self.database, self.crypto)
+        entry = database.fetch_password_entry(id)
+        if not entry:
             print(f"No password found for the given ID: {id}\n")
             return
+        pw_id, website, _, enc, version = entry
         try:
-            dec = self.crypto.decrypt(enc)
+            dec = crypto.decrypt_entry(pw_id, website, version, enc)
             self.console.print(f"Decrypted password: [bold]{dec}[/bold]")
-            self.most_recent_id = id
+            self._hide_later()
+            if database is self.database:
+                self.most_recent_id = id
         except Exception:
             self.console.print("Decryption failed.\n", style="red")
 
+    def handle_search(self, query=None):
+        if query is None:
+            query = self.console.input("[yellow]> [/yellow]Search websites and usernames: ").strip()
+        if not self._validate_input(query, "Search"):
+            return
+        if len(self.vaults) > 1:
+            self._search_vaults(query)
+            return
+        rows = self.database.search_passwords(query)
+        if not rows:
+            self.console.print(f"No entries match '{query}'.\n", style="yellow")
+            return
+
+        self.console.print(entries_table(rows, f"\nSearch results for '{query}'"))
+        print("")
+        id = self.console.input("[yellow]> [/yellow]Enter the ID of the password you want to view (leave empty to skip): ").strip()
+        if id:
+            self._show_password(parse_entry_id(id))
+
+    def _search_vaults(self, query):
+        # Every open vault is searched concurrently
+        rows = self.vaults.search(query)
+        if not rows:
+            self.console.print(f"No entries match '{query}' in {len(self.vaults)} vaults.\n", style="yellow")
+            return
+
+        self.console.print(entries_table(rows, f"\nSearch results for '{query}'", vaults=True))
+        print("")
+        choice = self.console.input("[yellow]> [/yellow]Enter vault:ID of the password you want to view (leave empty to skip): ").strip()
+        if not choice:
+            return
+        vault, _, id = choice.rpartition(":")
+        vault = vault or self.database.vault
+        if vault not in self.vaults:
+            self.console.print(f"Vault '{vault}' is not open.\n", style="red")
+            return
+        self._show_password(parse_entry_id(id), vault)
+
     def handle_add(self):
         while True:
             website = self.console.input("[yellow]> [/yellow]Enter website: ").strip()
@@ -135,66 +189,45 @@ class Server:
                         self.console.print(f"Password must contain: {', '.join(reqs)}", style="red")
                 break
             elif choice in ("/generate", "/g"):
-                while True:
-                    length = self.console.input("[yellow]> [/yellow]Enter password length (min 16): ").strip()
-                    if not length.isdigit():
-                        self.console.print("Please enter a valid number.", style="red")
-                    if int(length) < 16:
-                        self.console.print("Password must have 16 characters", style="red")
-                        continue
-                    pwd = generate_password(int(length))
-                    self.console.print(f"Generated passord for {website}: {pwd}", style="green")
-                    break
+                pwd = self._generate_password()
+                self.console.print(f"Generated passord for {website}: {pwd}", style="green")
                 break
             else:
                 self.console.print("Invalid input. Enter '/create' or '/generate'", style="red")
 
+        # the id is reserved first because the ciphertext is bound to it
         try:
-            enc = self.crypto.encrypt(pwd)
-        except Exception:
-            self.console.print("Encryption failed. Password not added.\n")
-            return 
-        
-        lastest_id = self.database.insert_passsword(website, username, enc)
+            with self.database.transaction():
+                pw_id = self.database.reserve_password_ids()
+                enc = self.crypto.encrypt_entry(pw_id, website, pwd)
+                lastest_id = self.database.insert_passsword(website, username, enc, pw_id)
+        except Exception as e:
+            self.console.print(f"Password not added: {e}\n", style="red")
+            return
+
         self.most_recent_id = lastest_id
         self.console.print("Password added successfully!\n", style="green")
 
     def handle_update(self):
-        entries = self.database.fetch_passwords_meta()
-        if not entries:
-            self.console.print("No passwords found.", style="yellow")
-            return 
-        
-        table = Table(title="\nStored password entries")
-        table.add_column("ID", justify="center", style="cyan", no_wrap=True)
-        table.add_column("Website", justify="center", style="cyan", no_wrap=True)
-        table.add_column("Username", justify="center", style="cyan", no_wrap=True)
-        table.add_column("Creation Date", justify="center", style="cyan", no_wrap=True)
-        for entry in entries:
-            table.add_row(f"{entry[0]}", f"{entry[1]}", f"{entry[2]}", f"{entry[3]}")
-        self.console.print(table)
-
-        for entry in entries:
-            table.add_row(f"{entry[0]}", f"{entry[1]}", f"{entry[2]}", f"{entry[3]}")
-        self.console.print(table)
-        print("")
-
-        id = self.console.input("[yellow]> [/yellow]Enter the ID of the password you want to update: ").strip()
-        if not self._validate_input(id, "ID"):
-            print("")
+        id = self.pager.select("Enter the ID of the password you want to update")
+        if id is None:
             return
-        isExists = self.database.fetch_passwords_by_id(id)
-        if not isExists:
+        entry = self.database.fetch_password_entry(id)
+        if not entry:
             self.console.print("No password found for the given ID: {id}\n", style="red")
             return 
-        
+        # Both writes below are conditional on the version read here, so an edit made
+        # meanwhile by another session is reported instead of overwritten
+        version = entry[4]
+
         while True:
             udec = self.console.input("[yellow]> [/yellow]Do you want to update the username? (yes/no): ").strip()
             if udec == "yes":
                 while True:
                     new_username = self.console.input(f"[yellow]> [/yellow]Enter new username: ").strip()
                     if self._validate_input(new_username, "Username"):
-                        self.database.update_password(id, username=new_username)
+                        self.database.update_password(id, username=new_username, expected_version=version)
+                        version += 1
                         print("Username updated successfully.")
                         break
                 break
@@ -218,22 +251,13 @@ class Server:
                                 self.console.print(f"Password must contain: {', '.join(reqs)}", style="red")
                         break
                     elif choice in ("/generate", "/g"):
-                        while True:
-                            length = self.console.input("[yellow]> [/yellow]Enter password length (min 16): ").strip()
-                            if not length.isdigit():
-                                print("Password must be an integer.")
-                                continue
-                            if int(length) < 16:
-                                print("Password must be atleast 16 characters.")
-                                continue
-                            new_pwd = generate_password(int(length))
-                            print(f"This is the generated password: {new_pwd}")
-                            break
+                        new_pwd = self._generate_password()
+                        print(f"This is the generated password: {new_pwd}")
                         break
                     else:
                         self.console.print("Invalid input. Enter '/create' or '/generate'", style="red")
-                enc = self.crypto.encrypt(new_pwd)
-                self.database.update_password(id, encrypted_password=enc)
+                enc = self.crypto.encrypt_entry(entry[0], entry[1], new_pwd)
+                self.database.update_password(entry[0], encrypted_password=enc, expected_version=version)
                 print("Password updated successfully")
                 break
             elif pdec == "no":
@@ -245,30 +269,16 @@ class Server:
         print(f"Update for ID {id} complete.\n")
 
     def handle_delete(self):
-        entries = self.database.fetch_passwords_meta()
-        if not entries:
-            print("No passwords stored yet.\n")
+        id = self.pager.select("Enter the ID of the password you want to delete")
+        if id is None:
             return
-        table = Table(title="\nStored password entries")
-        table.add_column("ID", justify="center", style="cyan", no_wrap=True)
-        table.add_column("Website", justify="center", style="cyan", no_wrap=True)
-        table.add_column("Username", justify="center", style="cyan", no_wrap=True)
-        table.add_column("Creation Date", justify="center", style="cyan", no_wrap=True)
-
-        for entry in entries:
-            table.add_row(f"{entry[0]}", f"{entry[1]}", f"{entry[2]}", f"{entry[3]}")
-        self.console.print(table)
-        print("")
-        while True:
-            id = self.console.input("[yellow]> [/yellow]Enter the ID of the password you want to delete: ").strip()
-            if not self._validate_input(id, "ID"):
-                continue
 
+        while True:
             confirm = self.console.input(f"[yellow]> [/yellow][red]Are you sure you want to delete ID: {id}? (yes/no): [/red]").strip()
 
             if confirm == "yes":
-                meta = [m for m in entries if str(m[0]) == str(id)]
-                website_name = meta[0][1] if meta else None
+                entry = self.database.fetch_password_entry(id)
+                website_name = entry[1] if entry else None
                 success = self.database.delete_password(id)
                 if success:
                     print(f"Password for website '{website_name}' (ID: {id}) has been deleted.\n")
@@ -283,37 +293,273 @@ class Server:
     def handle_copy(self):
         if not self.most_recent_id:
             print("No recently viewed password to copy.\n")
-        enc = self.database.fetch_passwords_by_id(self.most_recent_id)
-        if not enc:
+            return
+        entry = self.database.fetch_password_entry(self.most_recent_id)
+        if not entry:
             print("Failed to copy most recent password.\n")
             return
+        pw_id, website, _, enc, _ = entry
         try:
-            dec = self.crypto.decrypt(enc)
-            pyperclip.copy(dec)
-            self.console.print("Password copied to clipboard.", style="green")
+            with self.crypto.decrypt_entry_secret(pw_id, website, enc) as secret:
+                copy_secret(secret)
+            if self.clipboard_clear:
+                self.tasks.schedule("clipboard", self.clipboard_clear, clear_clipboard)
+                self.console.print(f"Password copied to clipboard; it will be cleared in {self.clipboard_clear:.0f}s.", style="green")
+            else:
+                self.console.print("Password copied to clipboard.", style="green")
         except Exception:
             self.console.print("Decryption failed. Cannot copy password.\n", style="red")
 
     def handle_master_change(self):
-        # decrypt all with old fernet, collect plaintexts
-        all_enc = self.database.fetch_all_encrypted()
-        decrypted = []
-        for pw_id, enc in all_enc:
-            try:
-                dec = self.crypto.decrypt(enc)
-                decrypted.append((pw_id, dec))
-            except Exception:
-                self.console.print(f"Decryption failed for ID: {pw_id}. Skipping master password change.\n", style="red")
-        
-        self.create_master_password()
+        pwd = self._prompt_new_master_password()
 
-        # re-encrypt all with new fernet
-        for pw_id, plain in decrypted:
-            enc = self.crypto.encrypt(plain)
-            self.database.update_password(pw_id, encrypted_password=enc)
+        # only the wrapped data key changes, whatever the vault size
+        try:
+            self.crypto.change_master_password(pwd)
+        except Exception as e:
+            self.console.print(f"Master password change failed, nothing was modified: {e}\n", style="red")
+            return
         self.console.print("Master password changed successfully!\n", style="green")
 
-    def run(self):
+    def handle_rekey(self):
+        confirm = self.console.input("[yellow]> [/yellow]Re-encrypt every entry under a new data key? (yes/no): ").strip()
+        if confirm != "yes":
+            return
+
+        from cryptography.fernet import Fernet
+        from .rotation import RotationEngine
+
+        new_key = Fernet.generate_key()
+        # re-encrypt every row and store the new wrapped key in one transaction
+        engine = RotationEngine(self.database, self.crypto)
+        try:
+            stats = engine.rotate(new_key, on_commit=lambda: self.crypto.store_data_key(new_key))
+        except Exception as e:
+            self.console.print(f"Data key rotation failed, nothing was modified: {e}\n", style="red")
+            return
+
+        self.crypto.set_key(new_key)
+        self.console.print(
+            f"Re-encrypted {stats['rows']} entries in {stats['seconds']:.2f}s ({stats['rows_per_second']:.0f} rows/s).",
+            style="dim white"
+        )
+        self.console.print("Data key rotated successfully!\n", style="green")
+
+    def handle_import(self, path=None):
+        path = path or self.console.input("[yellow]> [/yellow]Path to CSV or JSON export: ").strip()
+        if not path:
+            return
+
+        from .importer import ImportManager, detect_format
+
+        passphrase = None
+        if detect_format(path) == "lockr":
+            passphrase = self.console.input("[yellow]> [/yellow]Archive passphrase: ", password=True)
+
+        importer = ImportManager(self.database, self.crypto)
+        with self.console.status("Importing...") as status:
+            def progress(stats):
+                status.update(f"Imported {stats['imported']} of {stats['read']} records ({stats['rows_per_second']:.0f} rows/s)")
+            try:
+                stats = importer.import_file(path, progress=progress, passphrase=passphrase)
+            except (OSError, ValueError, RuntimeError) as e:
+                self.console.print(f"Import stopped: {e}\n", style="red")
+                return
+
+        self.console.print(
+            f"Read {stats['read']} records in {stats['seconds']:.2f}s ({stats['rows_per_second']:.0f} rows/s): "
+            f"{stats['duplicates']} duplicates and {stats['invalid']} incomplete records skipped.",
+            style="dim white"
+        )
+        self.console.print(f"Imported {stats['imported']} entries successfully!\n", style="green")
+
+    def handle_export(self, path=None):
+        path = path or self.console.input("[yellow]> [/yellow]Archive path (e.g. vault.lockr): ").strip()
+        if not path:
+            return
+        passphrase = self.console.input("[yellow]> [/yellow]Archive passphrase: ", password=True)
+        if len(passphrase) < 8:
+            self.console.print("Archive passphrase must be at least 8 characters long.\n", style="red")
+            return
+        if self.console.input("[yellow]> [/yellow]Confirm archive passphrase: ", password=True) != passphrase:
+            self.console.print("Passphrases do not match.\n", style="red")
+            return
+
+        from .backup import BackupManager
+
+        with self.console.status("Exporting...") as status:
+            try:
+                stats = BackupManager(self.database, self.crypto).export(
+                    path, passphrase, progress=lambda rows: status.update(f"Exported {rows} entries")
+                )
+            except (OSError, RuntimeError) as e:
+                self.console.print(f"Export failed: {e}\n", style="red")
+                return
+        self.console.print(f"Exported {stats['rows']} entries to {stats['path']} in {stats['seconds']:.2f}s.\n", style="green")
+
+    def handle_backup(self):
+        from .backup import BackupManager
+
+        try:
+            stats = BackupManager(self.database).snapshot()
+        except (OSError, RuntimeError, sqlite3.Error) as e:
+            self.console.print(f"Backup failed: {e}\n", style="red")
+            return
+        self.console.print(f"Snapshot written to {stats['path']} in {stats['seconds']:.2f}s.", style="dim white")
+        if stats["pruned"]:
+            self.console.print(f"Removed {len(stats['pruned'])} older snapshots.", style="dim white")
+        self.console.print("Backup completed successfully!\n", style="green")
+
+    def handle_audit(self, breach_file=None):
+        from .audit import AuditManager
+
+        with self.console.status("Auditing...") as status:
+            try:
+                report = AuditManager(self.database, self.crypto).run(
+                    breach_file, progress=lambda rows: status.update(f"Checked {rows} entries")
+                )
+            except (OSError, RuntimeError) as e:
+                self.console.print(f"Audit failed: {e}\n", style="red")
+                return
+
+        issues = {}
+        for ids in report["reused"]:
+            for pw_id in ids:
+                issues.setdefault(pw_id, []).append(f"reused across {len(ids)} entries")
+        for pw_id, count in report["breached"].items():
+            issues.setdefault(pw_id, []).append(f"seen {count} times in breaches")
+        if issues:
+            meta = {row[0]: row for row in self.database.fetch_passwords_meta()}
+            rows = [(pw_id, *meta[pw_id][1:3], "; ".join(found)) for pw_id, found in sorted(issues.items()) if pw_id in meta]
+            self.console.print(self.ui.audit_table(rows))
+
+        self.console.print(
+            f"Checked {report['entries']} entries in {report['seconds']:.2f}s"
+            + ("" if report["breach_file"] else " (no breach file; set LOCKR_BREACH_FILE or pass /audit <path>)")
+            + ".",
+            style="dim white"
+        )
+        if report["undecryptable"]:
+            self.console.print(f"{len(report['undecryptable'])} entries could not be decrypted.", style="red")
+        if issues:
+            self.console.print(f"{len(issues)} entries need a new password.\n", style="yellow")
+        else:
+            self.console.print("No reused or breached passwords found.\n", style="green")
+
+    def _prompt_vault_passwords(self, names, reuse=None):
+        passwords = {}
+        for name in names:
+            hint = " (leave empty to reuse the one above)" if reuse else ""
+            password = self.console.input(f"[yellow]> [/yellow]Master password for vault '{name}'{hint}: ", password=True)
+            passwords[name] = password or reuse
+        return passwords
+
+    def _unlock_vaults(self, passwords):
+        try:
+            results = self.vaults.unlock(passwords)
+        except RuntimeError as e:
+            self.console.print(f"{e}\n", style="red")
+            return {}
+        for name, unlocked in results.items():
+            if name != self.database.vault and not unlocked:
+                self.vaults.remove(name)
+                self.console.print(f"Incorrect master password for vault '{name}'; it was not opened.", style="red")
+        return results
+
+    def handle_vault(self, argument=""):
+        action, _, names = argument.partition(" ")
+        names = names.split()
+        if action == "open" and names:
+            names = [name for name in names if name not in self.vaults]
+            passwords = self._prompt_vault_passwords(names)
+            with self.console.status(f"Unlocking {len(passwords)} vaults..."):
+                results = self._unlock_vaults(passwords)
+            opened = [name for name, unlocked in results.items() if unlocked]
+            if opened:
+                self.console.print(f"Opened {', '.join(opened)}. /search now covers {len(self.vaults)} vaults.\n", style="green")
+        elif action == "use" and len(names) == 1:
+            if names[0] not in self.vaults:
+                self.console.print(f"Vault '{names[0]}' is not open; use /vault open {names[0]} first.\n", style="red")
+                return
+            self.database, self.crypto = self.vaults.get(names[0])
+            self.pager = EntryPager(self.database, self.console, tasks=self.tasks)
+            self.most_recent_id = None
+            self.console.print(f"Now using vault '{names[0]}'.\n", style="green")
+        elif action == "close" and names:
+            for name in names:
+                if name == self.database.vault:
+                    self.console.print("The active vault cannot be closed; /vault use another one first.", style="red")
+                elif name in self.vaults:
+                    self.vaults.remove(name)
+            print("")
+        elif not action:
+            self.console.print(self.ui.vaults_table(list_vaults(), self.vaults.names(), self.database.vault))
+        else:
+            self.console.print("Usage: /vault [open <names> | use <name> | close <names>]\n", style="red")
+
+    def handle_stats(self, argument=""):
+        from .tracing import TRACE_ENV, install, tracer
+
+        if argument == "on":
+            install()
+            self.console.print("Timing enabled for this session.\n", style="green")
+            return
+        if argument == "off":
+            tracer.uninstrument()
+            self.console.print("Timing disabled.\n", style="green")
+            return
+        if argument == "reset":
+            tracer.reset()
+            self.console.print("Timings cleared.\n", style="green")
+            return
+
+        operations = tracer.snapshot()
+        if not operations:
+            hint = "/stats on" if not tracer.enabled else "run some commands first"
+            self.console.print(f"No timings recorded yet ({hint}, or start lockr with {TRACE_ENV}=<file>).\n", style="yellow")
+        else:
+            self.console.print(self.ui.stats_table(operations))
+        cache = self.crypto.cache_stats()
+        if cache:
+            self.console.print(
+                f"Secret cache: {cache['size']}/{cache['capacity']} entries, "
+                f"{cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate']:.0%} hit rate).\n",
+                style="dim white"
+            )
+
+    def _hide_later(self):
+        # Wipe a secret shown on screen after REVEAL_SECONDS, without blocking the prompt
+        if self.tasks:
+            self.tasks.schedule("reveal", REVEAL_SECONDS, self.console.clear_secrets)
+
+    def _arm_idle_lock(self):
+        # Every prompt restarts the idle timer
+        if self.tasks and self.idle_lock and self.is_authenticated:
+            self.tasks.schedule("idle-lock", self.idle_lock, self._lock_idle)
+
+    def _pause_idle_lock(self):
+        # A command may run as long as it needs; the next prompt arms the timer again
+        if self.tasks:
+            self.tasks.cancel("idle-lock")
+
+    def _lock_idle(self):
+        # Runs on a worker thread while the prompt thread waits for input
+        if self.console.prompt is None:
+            # Answered just as the timer fired: a command is running on these keys
+            return
+        self.tasks.flush("clipboard")
+        self.tasks.flush("reveal")
+        for name in self.vaults.names():
+            self.vaults.get(name)[1].lock()
+        self.is_authenticated = False
+        self.console.print(f"\nLocked after {self.idle_lock:.0f}s without input. Press Enter to unlock.", style="yellow")
+
+    def _unlock_again(self):
+        # The active vault's password is asked first; other open vaults can reuse it
+        self.startup_vaults = [name for name in self.vaults.names() if name != self.database.vault]
+        self.authenticate()
+
+    def _start(self):
         self.console.print("Welcome to Lockr - Your Secure Password Manager\n", style="bold blue")
 
         if self._check_master_password_exist():
@@ -323,30 +569,78 @@ class Server:
             self.create_master_password()
 
         if self.is_authenticated:
-            self.console.clear()
-            self.ui.startup_text(self.version)
+            # A freshly generated master password stays up until its reveal timer hides it
+            if not self.tasks.pending("reveal"):
+                self.console.clear()
+                self.ui.startup_text(self.version)
             self.console.print("Access granted to password database!", style="green")
 
-        while True:
-            manager_process = self.console.input("[yellow]> [/yellow]").strip()
-            if manager_process in ("/help", "/h"):
-                self.ui.show_help()
-            elif manager_process in ("/info", "/i"):
-                self.ui.show_info(self.version)
-            elif manager_process in ("/view", "/v"):
-                self.handle_view()
-            elif manager_process in ("/add", "/a"):
-                self.handle_add()
-            elif manager_process in ("/update", "/u"):
-                self.handle_update()
-            elif manager_process in ("/delete", "/d"):
-                self.handle_delete()
-            elif manager_process in ("/copy", "/c"):
-                self.handle_copy()
-            elif manager_process in ("/master", "/m"):
-                self.handle_master_change()
-            elif manager_process in ("/quit", "/q"):
-                print("Goodbye, friend.")
-                break
-            else:
-                pass
\ No newline at end of file
+    def run(self):
+        try:
+            asyncio.run(self._main())
+        except VaultError as e:
+            self.console.print(str(e), style="red")
+
+    async def _main(self):
+        # Prompts and commands run on one thread; the loop keeps timers going meanwhile
+        self.tasks = BackgroundTasks(asyncio.get_running_loop())
+        self.pager.tasks = self.tasks
+        prompt = PromptThread()
+        try:
+            await prompt.call(self._start)
+            while True:
+                line = await prompt.call(self.console.input, "[yellow]> [/yellow]")
+                if not self.is_authenticated:
+                    # Locked while idle; whatever was typed is dropped
+                    await prompt.call(self._unlock_again)
+                    continue
+                try:
+                    if not await prompt.call(self.dispatch, line.strip()):
+                        break
+                except VaultError as e:
+                    # Busy, conflicting or failed writes are reported, never passed off as done
+                    self.console.print(f"{e}\n", style="red")
+        finally:
+            self.tasks.flush("clipboard")
+            self.tasks.cancel_all()
+
+    def dispatch(self, manager_process):
+        """Run one REPL command; False once the session should end."""
+        manager_process, _, argument = manager_process.partition(" ")
+        if manager_process in ("/help", "/h"):
+            self.ui.show_help()
+        elif manager_process in ("/info", "/i"):
+            self.ui.show_info(self.version)
+        elif manager_process in ("/view", "/v"):
+            self.handle_view()
+        elif manager_process in ("/search", "/s"):
+            self.handle_search(argument.strip() or None)
+        elif manager_process in ("/add", "/a"):
+            self.handle_add()
+        elif manager_process in ("/update", "/u"):
+            self.handle_update()
+        elif manager_process in ("/delete", "/d"):
+            self.handle_delete()
+        elif manager_process in ("/copy", "/c"):
+            self.handle_copy()
+        elif manager_process in ("/master", "/m"):
+            self.handle_master_change()
+        elif manager_process in ("/rekey", "/r"):
+            self.handle_rekey()
+        elif manager_process in ("/import", "/im"):
+            self.handle_import(argument.strip() or None)
+        elif manager_process in ("/export", "/e"):
+            self.handle_export(argument.strip() or None)
+        elif manager_process in ("/backup", "/b"):
+            self.handle_backup()
+        elif manager_process in ("/audit", "/au"):
+            self.handle_audit(argument.strip() or None)
+        elif manager_process in ("/vault", "/vt"):
+            self.handle_vault(argument.strip())
+        elif manager_process in ("/stats", "/st"):
+            self.handle_stats(argument.strip())
+        elif manager_process in ("/quit", "/q"):
+            print("Goodbye, friend.")
+            self.vaults.close()
+            return False
+        return True
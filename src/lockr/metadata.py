@@ -0,0 +1,109 @@
+import json
+import struct
+import time
+
+from cryptography.fernet import InvalidToken
+
+CHUNK_SIZE = 1000
+
+
+def site_key(website: str) -> str:
+    return website.strip().casefold()
+
+
+def domain_key(website: str) -> str:
+    """The host a website names: scheme, credentials, port, path and a leading "www." dropped."""
+    host = website.strip().casefold()
+    host = host.split("://", 1)[-1]
+    for separator in "/?#":
+        host = host.split(separator, 1)[0]
+    host = host.rsplit("@", 1)[-1].split(":", 1)[0].rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host
+
+
+def user_key(username: str) -> str:
+    return username.strip().casefold()
+
+
+NORMALIZERS = {"site": site_key, "domain": domain_key, "user": user_key}
+
+
+def _metadata_aad(pw_id: int) -> bytes:
+    # Bound to the row like entry ciphertexts, so metadata cannot be swapped between entries
+    return b"lockr metadata" + struct.pack(">Q", pw_id)
+
+
+class MetadataCodec:
+    """Seals an entry's website and username under one CipherEngine.
+
+    The pair is stored as a single AEAD ciphertext bound to the entry id. Next
+    to it go keyed HMAC blind indexes of the exact website, its normalized
+    domain and the username, so lookups are indexed equality matches that
+    never decrypt a row. Tags are deterministic under a data key: they reveal
+    which entries share a site or user, but not what it is.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def index(self, kind: str, value: str) -> bytes:
+        return self.engine.blind_index(kind.encode(), NORMALIZERS[kind](value).encode("utf-8"))
+
+    def seal(self, pw_id: int, website: str, username: str):
+        # (meta, site_index, domain_index, user_index) as stored
+        meta = self.engine.encrypt(json.dumps([website, username]).encode("utf-8"), _metadata_aad(pw_id))
+        return meta, self.index("site", website), self.index("domain", website), self.index("user", username)
+
+    def open(self, pw_id: int, meta: bytes):
+        # (website, username) of a sealed row
+        try:
+            website, username = json.loads(self.engine.decrypt(meta, _metadata_aad(pw_id)))
+        except (InvalidToken, ValueError) as e:
+            raise RuntimeError(f"Metadata of entry {pw_id} failed to decrypt: {e or 'authentication failed'}")
+        return website, username
+
+
+class MetadataManager:
+    """Moves a vault's websites and usernames from plaintext columns into sealed metadata.
+
+    Every row is sealed in one transaction with SQLite's secure_delete on, the
+    full-text index (which holds the plaintext words) is dropped, and the WAL is
+    checkpointed afterwards, so no plaintext copy is left in the database file.
+    From then on search and lookups go through the blind indexes: they match
+    whole sites, domains and usernames, not prefixes or typos.
+    """
+
+    def __init__(self, database, crypto, chunk_size=CHUNK_SIZE):
+        self.database = database
+        self.crypto = crypto
+        self.chunk_size = chunk_size
+
+    def seal(self, progress=None):
+        """Seal every entry; returns a dict with rows, seconds and rows_per_second."""
+        if not self.crypto.metadata:
+            raise RuntimeError("Fernet instance not initialized.")
+        if self.database.metadata_sealed():
+            raise RuntimeError("Vault metadata is already encrypted.")
+
+        start = time.perf_counter()
+        rows = 0
+        with self.database.secure_delete(), self.database.transaction():
+            self.database.drop_search_index()
+            for chunk in self.database.iter_metadata_chunks(self.chunk_size):
+                self.database.store_metadata_bulk(self.crypto.metadata, chunk)
+                rows += len(chunk)
+                if progress:
+                    progress(rows)
+            self.database.set_metadata_sealed()
+        elapsed = time.perf_counter() - start
+
+        return {
+            "rows": rows,
+            "seconds": elapsed,
+            "rows_per_second": rows / elapsed if elapsed else 0.0,
+        }
@@ -0,0 +1,138 @@
+from concurrent.futures import CancelledError
+
+from rich.table import Table
+
+from .database import parse_entry_id
+
+PAGE_SIZE = 20
+
+
+def entries_table(rows, title, caption=None, vaults=False):
+    # With vaults=True each row starts with the name of the vault it came from
+    table = Table(title=title, caption=caption)
+    if vaults:
+        table.add_column("Vault", justify="center", style="magenta", no_wrap=True)
+    table.add_column("ID", justify="center", style="cyan", no_wrap=True)
+    table.add_column("Website", justify="center", style="cyan", no_wrap=True)
+    table.add_column("Username", justify="center", style="cyan", no_wrap=True)
+    table.add_column("Creation Date", justify="center", style="cyan", no_wrap=True)
+
+    for entry in rows:
+        table.add_row(*(f"{value}" for value in entry))
+    return table
+
+
+class EntryPager:
+    """Keyset-paginated entry browser; only the visible page is ever loaded.
+
+    The pager remembers the (created_at, id) key that starts each page it has
+    visited, so moving back or jumping to a seen page is a single indexed
+    query and unseen pages are reached by walking forward page by page.
+    Given the REPL's BackgroundTasks, the page after the one on screen is
+    loaded while the user reads, so /n usually needs no query at all.
+    """
+
+    def __init__(self, database, console, page_size=PAGE_SIZE, tasks=None):
+        self.database = database
+        self.console = console
+        self.page_size = page_size
+        self.tasks = tasks
+        # ((after, pattern), future) for the page being loaded in the background
+        self._warmed = None
+
+    def select(self, prompt):
+        try:
+            return self._select(prompt)
+        finally:
+            # Pages loaded ahead are only trusted while nothing can write to the vault
+            self._take_warmed()
+
+    def _select(self, prompt):
+        page_starts = [None]
+        page = 0
+        pattern = None
+
+        while True:
+            rows = self._fetch(page_starts[page], pattern)
+            has_next = len(rows) > self.page_size
+            rows = rows[:self.page_size]
+            if not rows and page == 0:
+                self.console.print("No matching passwords found." if pattern else "No passwords found.", style="yellow")
+                if not pattern:
+                    return None
+            else:
+                self._render(rows, page, has_next, pattern)
+            if has_next and len(page_starts) == page + 1:
+                page_starts.append((rows[-1][3], rows[-1][0]))
+            if has_next and self.tasks:
+                self._warm(page_starts[page + 1], pattern)
+
+            choice = self.console.input(
+                f"[yellow]> [/yellow]{prompt} [dim](/n next, /p previous, /g <page> jump, /f <text> filter)[/dim]: "
+            ).strip()
+
+            if choice in ("/n", "/next"):
+                if has_next:
+                    page += 1
+                else:
+                    self.console.print("Already on the last page.", style="yellow")
+            elif choice in ("/p", "/prev"):
+                if page > 0:
+                    page -= 1
+                else:
+                    self.console.print("Already on the first page.", style="yellow")
+            elif choice.startswith(("/g ", "/goto ")):
+                target = choice.split(maxsplit=1)[1]
+                if not target.isdigit() or int(target) < 1:
+                    self.console.print("Please enter a valid page number.", style="red")
+                    continue
+                page = self._walk_to(page_starts, int(target) - 1, pattern)
+            elif choice == "/f" or choice.startswith("/f "):
+                pattern = choice[3:].strip() or None
+                page_starts, page = [None], 0
+            elif not choice:
+                self.console.print("ID cannot be empty.\n", style="red")
+                return None
+            else:
+                # Ids leave the pager as ints, so a bad one fails here before anything is written
+                return parse_entry_id(choice)
+
+    def _warm(self, after, pattern):
+        future = self.tasks.start("warm-page", self.database.fetch_passwords_page, self.page_size + 1, after, pattern)
+        self._warmed = ((after, pattern), future)
+
+    def _take_warmed(self, key=None):
+        # The warmed page if it is the one for key; anything else is cancelled
+        warmed, self._warmed = self._warmed, None
+        if warmed is None:
+            return None
+        if warmed[0] == key:
+            try:
+                return warmed[1].result()
+            except CancelledError:
+                return None
+        warmed[1].cancel()
+        return None
+
+    def _fetch(self, after, pattern):
+        rows = self._take_warmed((after, pattern))
+        if rows is None:
+            rows = self.database.fetch_passwords_page(self.page_size + 1, after, pattern)
+        return rows
+
+    def _walk_to(self, page_starts, target, pattern):
+        # Extend the known page keys forward until target or the last page
+        while len(page_starts) <= target:
+            rows = self.database.fetch_passwords_page(self.page_size + 1, page_starts[-1], pattern)
+            if len(rows) <= self.page_size:
+                break
+            last = rows[self.page_size - 1]
+            page_starts.append((last[3], last[0]))
+        return min(target, len(page_starts) - 1)
+
+    def _render(self, rows, page, has_next, pattern):
+        title = f"\nStored password entries - page {page + 1}"
+        if pattern:
+            title += f" matching '{pattern}'"
+        self.console.print(entries_table(rows, title, "more entries: /n" if has_next else None))
+        print("")
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import queue
+import threading
+
+from rich.console import Console
+
+# Seconds before idle sessions lock, the clipboard is cleared and a shown
+# secret is hidden; 0 turns the first two off
+IDLE_LOCK_ENV = "LOCKR_IDLE_LOCK"
+CLIPBOARD_CLEAR_ENV = "LOCKR_CLIPBOARD_CLEAR"
+DEFAULT_IDLE_LOCK = 5 * 60
+DEFAULT_CLIPBOARD_CLEAR = 20
+REVEAL_SECONDS = 10
+
+
+def timeout_from_env(name, default):
+    try:
+        return max(float(os.environ.get(name, default)), 0.0)
+    except ValueError:
+        return float(default)
+
+
+def _settle(future, result, error):
+    # Runs on the loop; the awaiting side may have been cancelled meanwhile
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class PromptThread:
+    """The one thread that runs the REPL's blocking calls, in order.
+
+    Prompts and commands block on input, so they run here while the event
+    loop stays free for timers. Always the same thread, so each vault keeps
+    a single SQLite connection for the session; a daemon, unlike an executor
+    worker, so a prompt still waiting for input never holds up exit.
+    """
+
+    def __init__(self):
+        self._calls = queue.SimpleQueue()
+        threading.Thread(target=self._serve, name="lockr-repl", daemon=True).start()
+
+    def _serve(self):
+        while True:
+            loop, future, func, args = self._calls.get()
+            try:
+                result = func(*args)
+            except BaseException as error:
+                loop.call_soon_threadsafe(_settle, future, None, error)
+            else:
+                loop.call_soon_threadsafe(_settle, future, result, None)
+
+    def call(self, func, *args) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._calls.put((loop, future, func, args))
+        return future
+
+
+class BackgroundTasks:
+    """Named, cancellable background work on the REPL's event loop.
+
+    Every method is safe to call from the prompt thread. Scheduling a name
+    that is already pending replaces it, so re-arming a timer is one call.
+    Blocking callbacks run on the loop's default executor, never on the
+    prompt thread.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        # name -> (concurrent future, callback, args)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    async def _later(self, delay, func, args):
+        if delay:
+            await asyncio.sleep(delay)
+        return await asyncio.to_thread(func, *args)
+
+    def schedule(self, name, delay, func, *args):
+        """Run func(*args) after delay seconds unless cancelled or replaced first."""
+        future = asyncio.run_coroutine_threadsafe(self._later(delay, func, args), self.loop)
+        with self._lock:
+            previous = self._pending.get(name)
+            self._pending[name] = (future, func, args)
+        if previous:
+            previous[0].cancel()
+        future.add_done_callback(lambda done: self._forget(name, done))
+        return future
+
+    def start(self, name, func, *args):
+        """Run func(*args) in the background now; result() on the returned future waits for it."""
+        return self.schedule(name, 0, func, *args)
+
+    def _forget(self, name, future):
+        with self._lock:
+            if self._pending.get(name, (None,))[0] is future:
+                del self._pending[name]
+
+    def pending(self, name) -> bool:
+        with self._lock:
+            return name in self._pending
+
+    def cancel(self, name):
+        with self._lock:
+            entry = self._pending.pop(name, None)
+        if entry:
+            entry[0].cancel()
+
+    def flush(self, name):
+        """Run a pending timer's callback right away, on the calling thread."""
+        with self._lock:
+            entry = self._pending.pop(name, None)
+        if entry and entry[0].cancel():
+            entry[1](*entry[2])
+
+    def cancel_all(self):
+        with self._lock:
+            entries, self._pending = list(self._pending.values()), {}
+        for future, _, _ in entries:
+            future.cancel()
+
+
+class ReplConsole(Console):
+    """Console that reports prompts opening and being answered, and remembers the one being shown.
+
+    on_prompt runs when a prompt opens and on_answer once it returns, so the
+    idle timer covers only time spent waiting at a prompt, never a command
+    that is still running.
+    """
+
+    def __init__(self, on_prompt=None, on_answer=None, **kwargs):
+        super().__init__(**kwargs)
+        self.on_prompt = on_prompt
+        self.on_answer = on_answer
+        self.prompt = None
+
+    def input(self, prompt="", **kwargs):
+        if self.on_prompt:
+            self.on_prompt()
+        self.prompt = prompt
+        try:
+            return super().input(prompt, **kwargs)
+        finally:
+            self.prompt = None
+            if self.on_answer:
+                self.on_answer()
+
+    def clear_secrets(self):
+        """Wipe the screen and scrollback, then redraw the prompt that is waiting for input."""
+        if not self.is_terminal:
+            return
+        self.file.write("\033[3J\033[H\033[2J")
+        self.file.flush()
+        if self.prompt is not None:
+            self.print(self.prompt, end="")
@@ -0,0 +1,121 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .ciphers import CipherEngine, entry_aad
+from .crypto import CryptoManager
+from .metadata import MetadataCodec
+from .secretbuffer import SecretBuffer
+
+CHUNK_SIZE = 1000
+# Initial plaintext scratch per chunk; grows for longer entries
+SCRATCH_SIZE = 256
+
+# Per-process cipher pair, set up once by the pool initializer
+_worker_engines = None
+
+def _init_worker(old_key: bytes, new_key: bytes, cipher: str):
+    global _worker_engines
+    _worker_engines = (CipherEngine(old_key, cipher), CipherEngine(new_key, cipher))
+
+def _reencrypt_chunk(chunk):
+    return _reencrypt(chunk, *_worker_engines)
+
+def _reencrypt(chunk, old_engine, new_engine):
+    # chunk: (id, website, token) rows; Fernet rows come out under the current AEAD.
+    # One locked scratch buffer holds each plaintext in turn and is wiped afterwards.
+    with SecretBuffer(SCRATCH_SIZE) as scratch:
+        return [
+            CryptoManager.reencrypt_token(token, entry_aad(pw_id, website), old_engine, new_engine, scratch)
+            for pw_id, website, token in chunk
+        ]
+
+
+class RotationEngine:
+    """Re-encrypts every stored password from the current key to a new one.
+
+    Rows are streamed in id-ordered chunks, re-encrypted across a process pool
+    and written back inside a single transaction, so a crash leaves the vault
+    entirely under the old key. Sealed websites and usernames, and their
+    blind indexes, move to the new key in the same pass.
+    """
+
+    def __init__(self, database, crypto, workers=None, chunk_size=CHUNK_SIZE):
+        self.database = database
+        self.crypto = crypto
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        # Seals metadata under the new key while a sealed vault is rotated
+        self._metadata = None
+
+    def rotate(self, new_key: bytes, on_commit=None, progress=None):
+        """Re-encrypt all rows under new_key.
+
+        on_commit runs inside the same transaction after the last chunk (e.g. to
+        store the new master hash); progress is called with the running row count.
+        Returns a dict with rows, seconds and rows_per_second.
+        """
+        if not self.crypto.key:
+            raise RuntimeError("Fernet instance not initialized.")
+
+        start = time.perf_counter()
+        try:
+            with self.database.transaction():
+                if self.database.metadata_sealed():
+                    self._metadata = MetadataCodec(CipherEngine(new_key, self.crypto.cipher))
+                if self.workers > 1:
+                    rows = self._rotate_parallel(new_key, progress)
+                else:
+                    rows = self._rotate_serial(new_key, progress)
+                if on_commit:
+                    on_commit()
+        finally:
+            if self._metadata:
+                self._metadata.engine.wipe()
+                self._metadata = None
+        elapsed = time.perf_counter() - start
+
+        return {
+            "rows": rows,
+            "seconds": elapsed,
+            "rows_per_second": rows / elapsed if elapsed else 0.0,
+        }
+
+    def _write_chunk(self, ids, tokens):
+        self.database.update_passwords_bulk(zip(tokens, ids))
+        if self._metadata:
+            # Chunks are id-ordered, so the chunk's metadata is one range read
+            self.database.store_metadata_bulk(self._metadata, self.database.fetch_metadata_range(ids[0], ids[-1]))
+
+    def _rotate_serial(self, new_key, progress):
+        old_engine, new_engine = self.crypto.engine, CipherEngine(new_key, self.crypto.cipher)
+        rows = 0
+        for chunk in self.database.iter_encrypted_chunks(self.chunk_size):
+            ids = [row[0] for row in chunk]
+            self._write_chunk(ids, _reencrypt(chunk, old_engine, new_engine))
+            rows += len(chunk)
+            if progress:
+                progress(rows)
+        return rows
+
+    def _rotate_parallel(self, new_key, progress):
+        rows = 0
+        # Bound in-flight chunks so memory stays flat regardless of vault size
+        pending = deque()
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.crypto.key, new_key, self.crypto.cipher)) as pool:
+            for chunk in self.database.iter_encrypted_chunks(self.chunk_size):
+                ids = [row[0] for row in chunk]
+                pending.append((ids, pool.submit(_reencrypt_chunk, chunk)))
+                if len(pending) >= self.workers * 2:
+                    rows += self._drain_one(pending, progress, rows)
+
+            while pending:
+                rows += self._drain_one(pending, progress, rows)
+        return rows
+
+    def _drain_one(self, pending, progress, rows):
+        ids, future = pending.popleft()
+        self._write_chunk(ids, future.result())
+        if progress:
+            progress(rows + len(ids))
+        return len(ids)
@@ -0,0 +1,134 @@
+import ctypes
+import functools
+import os
+
+# Longest line read by SecretBuffer.read_line
+MAX_LINE = 4096
+
+
+@functools.lru_cache(maxsize=None)
+def _memory_locking():
+    # (mlock, munlock) from the C library, or None where they are unavailable
+    if os.name != "posix":
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        mlock, munlock = libc.mlock, libc.munlock
+    except (OSError, AttributeError):
+        return None
+    for function in (mlock, munlock):
+        function.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+        function.restype = ctypes.c_int
+    return mlock, munlock
+
+
+class SecretBuffer:
+    """Wipeable memory for master secrets and decrypted passwords.
+
+    A fixed-size bytearray that is pinned (so it is never resized, which would
+    leave a stale copy behind) and mlock'ed where the platform allows, so it
+    never reaches swap. wipe() zeroes it in place; leaving a with block or
+    garbage collection does the same. Pass view() to anything that accepts a
+    bytes-like object; decode() is the one explicit copy, for APIs that need a
+    str. Locking is best effort: past RLIMIT_MEMLOCK buffers are just unlocked.
+    """
+
+    __slots__ = ("_data", "_view", "_prefixes", "_pin", "locked")
+
+    def __init__(self, size: int):
+        self._allocate(size)
+
+    def _allocate(self, size):
+        if size < 0:
+            raise ValueError("negative buffer size")
+        self._data = bytearray(size)
+        # One view for the buffer's lifetime, so view() allocates nothing per call
+        self._view = memoryview(self._data)
+        self._prefixes = {}
+        self._pin = None
+        self.locked = False
+        locking = _memory_locking()
+        if size and locking:
+            # Exporting the buffer to ctypes also stops the bytearray from being resized
+            self._pin = (ctypes.c_char * size).from_buffer(self._data)
+            self.locked = locking[0](ctypes.addressof(self._pin), size) == 0
+
+    @classmethod
+    def from_bytes(cls, data) -> "SecretBuffer":
+        """A copy of data; the source itself is left as it is."""
+        secret = cls(len(data))
+        secret._data[:] = data
+        return secret
+
+    @classmethod
+    def from_str(cls, text: str) -> "SecretBuffer":
+        # The str and its encoded form are immutable and cannot be wiped; prefer
+        # read_line() or a *_into API to fill the buffer directly
+        return cls.from_bytes(text.encode("utf-8"))
+
+    @classmethod
+    def read_line(cls, stream, limit=MAX_LINE) -> "SecretBuffer":
+        """First line of a raw binary stream (without its line ending), read straight into locked memory."""
+        with cls(limit) as scratch:
+            view = scratch.view()
+            size, newline = 0, -1
+            while size < limit and newline == -1:
+                count = stream.readinto(view[size:])
+                if not count:
+                    break
+                newline = scratch._data.find(b"\n", size, size + count)
+                size += count
+            end = newline if newline != -1 else size
+            # Like text-mode reads, accept CRLF line endings
+            if end and scratch._data[end - 1] == 0x0D:
+                end -= 1
+            line = cls(end)
+            line.view()[:] = view[:end]
+        return line
+
+    def __len__(self):
+        return len(self._data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.wipe()
+
+    def __del__(self):
+        try:
+            self.wipe()
+        except Exception:
+            # Interpreter shutdown may already have torn down ctypes
+            pass
+
+    def view(self) -> memoryview:
+        return self._view
+
+    def prefix(self, size) -> memoryview:
+        """A view of the first size bytes, cached so bulk callers reusing one buffer allocate nothing per row."""
+        view = self._prefixes.get(size)
+        if view is None:
+            view = self._prefixes[size] = self._view[:size]
+        return view
+
+    def decode(self, encoding="utf-8") -> str:
+        return self._data.decode(encoding)
+
+    def reserve(self, size):
+        """Grow to at least size bytes. Contents are wiped, not carried over."""
+        if size > len(self._data):
+            self.wipe()
+            self._allocate(max(size, 2 * len(self._data)))
+
+    def wipe(self):
+        size = len(self._data)
+        if self._pin is not None:
+            address = ctypes.addressof(self._pin)
+            ctypes.memset(address, 0, size)
+            if self.locked:
+                _memory_locking()[1](address, size)
+            self._pin = None
+            self.locked = False
+        elif size:
+            self._data[:] = bytes(size)
@@ -0,0 +1,115 @@
+from . import sync
+
+
+class VaultService:
+    """Request/response operations over an unlocked vault.
+
+    Requests and responses are plain dicts so the same handler can sit behind
+    the agent socket or be called in-process.
+    """
+
+    def __init__(self, database, crypto):
+        self.database = database
+        self.crypto = crypto
+        self.operations = {
+            "get": self.get,
+            "put": self.put,
+            "list": self.list,
+            "search": self.search,
+            "find": self.find,
+            "rm": self.remove,
+            "sync_state": self.sync_state,
+            "sync_changes": self.sync_changes,
+            "sync_apply": self.sync_apply,
+        }
+
+    def handle(self, request: dict) -> dict:
+        return self.respond(request)[1]
+
+    def respond(self, request: dict):
+        """(malformed, response): malformed is True when the request itself was at fault."""
+        op = request.get("op")
+        operation = self.operations.get(op)
+        if operation is None:
+            return True, {"ok": False, "error": f"unknown operation: {op}"}
+        if not self.crypto.fernet:
+            return False, {"ok": False, "error": "vault is locked"}
+        try:
+            return False, {"ok": True, **operation(request)}
+        except (KeyError, TypeError, ValueError) as e:
+            # Missing fields, or fields of the wrong type such as {"id": [1]}
+            return True, {"ok": False, "error": f"invalid request: {e}"}
+        except RuntimeError as e:
+            return False, {"ok": False, "error": str(e)}
+
+    def get(self, request):
+        entry = self.database.fetch_password_entry(int(request["id"]))
+        if not entry:
+            raise RuntimeError(f"No password found for the given ID: {request['id']}")
+        pw_id, website, username, enc, version = entry
+        password = self.crypto.decrypt_entry(pw_id, website, version, enc)
+        return {"id": pw_id, "website": website, "username": username, "password": password, "version": version}
+
+    def put(self, request):
+        if request.get("id") is not None:
+            pw_id = int(request["id"])
+            entry = self.database.fetch_password_entry(pw_id)
+            if not entry:
+                raise RuntimeError(f"No password found for the given ID: {pw_id}")
+            # A version from an earlier get makes the write fail if the entry changed since
+            version = entry[4] if request.get("version") is None else int(request["version"])
+            enc = self.crypto.encrypt_entry(pw_id, entry[1], request["password"])
+            if not self.database.update_password(
+                pw_id, username=request.get("username"), encrypted_password=enc, expected_version=version
+            ):
+                raise RuntimeError(f"No password found for the given ID: {pw_id}")
+            return {"id": pw_id}
+
+        # Ciphertexts are bound to their id, so it is reserved before encrypting
+        with self.database.transaction():
+            pw_id = self.database.reserve_password_ids()
+            enc = self.crypto.encrypt_entry(pw_id, request["website"], request["password"])
+            if self.database.insert_passsword(request["website"], request["username"], enc, pw_id) is None:
+                raise RuntimeError("Failed to add password.")
+        return {"id": pw_id}
+
+    def list(self, request):
+        return self._entries(self.database.fetch_passwords_meta())
+
+    def search(self, request):
+        return self._entries(self.database.search_passwords(request["query"], int(request.get("limit", 20))))
+
+    def find(self, request):
+        return self._entries(self.database.find_passwords(
+            request.get("website"), request.get("username"), bool(request.get("exact")), int(request.get("limit", 20)),
+        ))
+
+    @staticmethod
+    def _entries(rows):
+        return {
+            "entries": [
+                {"id": pw_id, "website": website, "username": username, "created_at": created_at}
+                for pw_id, website, username, created_at in rows
+            ]
+        }
+
+    def remove(self, request):
+        pw_id = int(request["id"])
+        if not self.database.fetch_passwords_by_id(pw_id):
+            raise RuntimeError(f"No password found for the given ID: {pw_id}")
+        if not self.database.delete_password(pw_id):
+            raise RuntimeError("Failed to delete password.")
+        return {"id": pw_id}
+
+    # Replication; see sync.SyncManager
+    def sync_state(self, request):
+        return sync.replica_state(self.database, request.get("peer"))
+
+    def sync_changes(self, request):
+        return sync.export_changes(
+            self.database, self.crypto, int(request["since"]), request.get("exclude"),
+            int(request.get("limit", sync.PAGE_SIZE)),
+        )
+
+    def sync_apply(self, request):
+        return sync.apply_changes(self.database, self.crypto, request["changes"], request["peer"], int(request["seq"]))
@@ -0,0 +1,128 @@
+import time
+
+# Journal entries exchanged per request
+PAGE_SIZE = 500
+
+
+def _stamp(clock, origin):
+    # Total order on versions: Lamport clock first, then writer id, so every
+    # replica picks the same winner whichever side syncs first
+    return clock, origin or ""
+
+
+def replica_state(database, peer=None):
+    state = {"replica": database.replica_id(), "seq": database.journal_head()}
+    if peer:
+        state["received"] = database.received_seq(peer)
+    return state
+
+
+def export_changes(database, crypto, since, exclude=None, limit=PAGE_SIZE):
+    """Journal entries after since as plaintext change dicts.
+
+    Ciphertexts are bound to local ids and keys, so entries travel decrypted
+    and the receiver encrypts them under its own.
+    """
+    rows, head = database.fetch_changes(since, exclude, limit)
+    changes = []
+    for _, uid, pw_id, website, username, token, version, created_at, updated_at, clock, origin in rows:
+        change = {"uid": uid, "clock": clock, "origin": origin, "updated_at": updated_at}
+        if pw_id is None:
+            change["deleted"] = True
+        else:
+            change.update(
+                website=website, username=username, created_at=created_at,
+                password=crypto.decrypt_entry(pw_id, website, version, token),
+            )
+        changes.append(change)
+    more = len(rows) == limit
+    return {"changes": changes, "seq": rows[-1][0] if more else head, "more": more}
+
+
+def apply_changes(database, crypto, changes, peer, seq):
+    """Apply a page of peer's changes and record seq as received, atomically.
+
+    A change wins over the local version only if its stamp is newer, so
+    replaying a page or receiving a change twice is harmless.
+    """
+    applied = stale = 0
+    with database.transaction():
+        for change in changes:
+            stamp = _stamp(change["clock"], change["origin"])
+            local = database.fetch_sync_stamp(change["uid"])
+            if local and stamp <= _stamp(local[1], local[2]):
+                stale += 1
+                continue
+
+            if change.get("deleted"):
+                database.store_synced_delete(change["uid"], change["updated_at"], *stamp)
+            else:
+                pw_id = local[0] if local and local[0] is not None else database.reserve_password_ids()
+                enc = crypto.encrypt_entry(pw_id, change["website"], change["password"])
+                database.store_synced_entry(
+                    pw_id, change["uid"], change["website"], change["username"], enc,
+                    change["created_at"], change["updated_at"], *stamp,
+                )
+            applied += 1
+        database.mark_received(peer, seq)
+    return {"applied": applied, "stale": stale}
+
+
+class SyncManager:
+    """Two-way incremental sync between two replicas of a vault.
+
+    Each side is a VaultService request handler: an in-process vault, another
+    vault file, or an unlock agent reached over its socket. Every replica
+    journals its changes and deletes by sequence number and remembers how far
+    it has applied each peer's journal, so a sync only moves the changes made
+    since the last one. Conflicting edits resolve to the higher (clock,
+    replica) stamp, the same answer on both sides.
+    """
+
+    def __init__(self, local, remote, page_size=PAGE_SIZE):
+        self.local = local
+        self.remote = remote
+        self.page_size = page_size
+
+    @staticmethod
+    def _call(handler, request):
+        response = handler(request)
+        if not response.get("ok"):
+            raise RuntimeError(f"Sync {request['op']} failed: {response.get('error', 'unknown error')}")
+        return response
+
+    def run(self):
+        start = time.perf_counter()
+        local = self._call(self.local, {"op": "sync_state"})
+        remote = self._call(self.remote, {"op": "sync_state"})
+        if local["replica"] == remote["replica"]:
+            raise RuntimeError("Both sides are the same vault replica.")
+
+        received = self._pull(self.remote, remote, self.local, local)
+        sent = self._pull(self.local, local, self.remote, remote)
+        return {
+            "replica": local["replica"], "peer": remote["replica"],
+            "received": received, "sent": sent, "seconds": time.perf_counter() - start,
+        }
+
+    def _pull(self, source, source_state, target, target_state):
+        # Changes last written by the target itself are never sent back to it
+        since = self._call(target, {"op": "sync_state", "peer": source_state["replica"]})["received"]
+        if since > source_state["seq"]:
+            # The source's journal went backwards (an old copy put back in place)
+            since = 0
+
+        stats = {"changes": 0, "applied": 0, "stale": 0}
+        while True:
+            page = self._call(source, {
+                "op": "sync_changes", "since": since, "exclude": target_state["replica"], "limit": self.page_size,
+            })
+            result = self._call(target, {
+                "op": "sync_apply", "peer": source_state["replica"], "seq": page["seq"], "changes": page["changes"],
+            })
+            stats["changes"] += len(page["changes"])
+            stats["applied"] += result["applied"]
+            stats["stale"] += result["stale"]
+            since = page["seq"]
+            if not page["more"]:
+                return stats
@@ -0,0 +1,165 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# LOCKR_TRACE=<path> records timings for the whole process and writes them as
+# JSON to <path> at exit; "{pid}" in the path is replaced by the process id and
+# "-" writes to stderr.
+TRACE_ENV = "LOCKR_TRACE"
+# Latency histogram buckets: bucket i counts calls taking < 2**i microseconds
+BUCKETS = 28
+
+
+class OperationStats:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[min(int(seconds * 1e6).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the given fraction of calls, in ms
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min(2 ** index / 1000, self.max * 1000)
+        return self.max * 1000
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000,
+            "min_ms": self.min * 1000,
+            "max_ms": self.max * 1000,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "histogram_us": {f"<{2 ** i}": count for i, count in enumerate(self.buckets) if count},
+        }
+
+
+class Tracer:
+    """Per-operation call counts and latency histograms.
+
+    Nothing is wrapped until instrument() is called, so a process that never
+    enables tracing runs the original methods with no overhead at all.
+    Wrapped methods are restored by uninstrument().
+    """
+
+    def __init__(self):
+        self.operations = {}
+        self._lock = threading.Lock()
+        self._originals = []
+
+    @property
+    def enabled(self):
+        return bool(self._originals)
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = OperationStats()
+            stats.add(seconds)
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        return timed
+
+    def instrument(self, owner, prefix, names=None):
+        """Time owner's public methods (or just names) as "<prefix>.<method>"."""
+        import inspect
+
+        for name, attribute in list(vars(owner).items()):
+            if names is not None and name not in names:
+                continue
+            if names is None and name.startswith("_"):
+                continue
+            func = attribute.__func__ if isinstance(attribute, (staticmethod, classmethod)) else attribute
+            if not inspect.isfunction(func):
+                continue
+            # Generators and @contextmanager functions return before their work is done
+            if inspect.isgeneratorfunction(func) or inspect.isgeneratorfunction(getattr(func, "__wrapped__", None)):
+                continue
+            timed = self.wrap(f"{prefix}.{name}", func)
+            if isinstance(attribute, (staticmethod, classmethod)):
+                timed = type(attribute)(timed)
+            self._originals.append((owner, name, attribute))
+            setattr(owner, name, timed)
+
+    def uninstrument(self):
+        while self._originals:
+            owner, name, attribute = self._originals.pop()
+            setattr(owner, name, attribute)
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.summary() for name, stats in sorted(self.operations.items())}
+
+
+tracer = Tracer()
+
+
+def install():
+    """Instrument the database, crypto, service and REPL entry points."""
+    if tracer.enabled:
+        return
+    from rich.console import Console
+
+    from .crypto import CryptoManager
+    from .database import DatabaseManager
+    from .manager import Server
+    from .service import VaultService
+
+    tracer.instrument(DatabaseManager, "database")
+    tracer.instrument(DatabaseManager, "database", names={"_connect"})
+    tracer.instrument(CryptoManager, "crypto")
+    tracer.instrument(VaultService, "service", names={"handle"})
+    # handle_* timings include time spent waiting for input
+    tracer.instrument(Server, "server", names={name for name in vars(Server) if name.startswith("handle_")})
+    tracer.instrument(Console, "ui", names={"print"})
+
+
+def install_from_env():
+    if os.environ.get(TRACE_ENV):
+        install()
+        atexit.register(dump)
+
+
+def dump(path=None):
+    path = path or os.environ.get(TRACE_ENV)
+    if not path or not tracer.operations:
+        return
+    report = json.dumps({"pid": os.getpid(), "operations": tracer.snapshot()}, indent=2)
+    if path == "-":
+        print(report, file=sys.stderr)
+        return
+    with open(path.replace("{pid}", str(os.getpid())), "w") as handle:
+        handle.write(report + "\n")
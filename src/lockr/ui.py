@@ -46,11 +46,19 @@ class UIManager:
             ("/help", "all commands", "/h"),
             ("/info", "version details", "/i"),
             ("/view", "view passwords", "/v"),
+            ("/search", "search entries", "/s"),
             ("/add", "add password", "/a"),
             ("/update", "update password", "/u"),
             ("/delete", "delete password", "/d"),
             ("/copy", "copy to clipboard", "/c"),
             ("/master", "change master", "/m"),
+            ("/rekey", "rotate data key", "/r"),
+            ("/import", "import CSV/JSON", "/im"),
+            ("/export", "encrypted export", "/e"),
+            ("/backup", "snapshot vault", "/b"),
+            ("/audit", "reuse/breach check", "/au"),
+            ("/vault", "open/switch vaults", "/vt"),
+            ("/stats", "timing statistics", "/st"),
             ("/quit", "quit program", "/q"),
         ]
         for cmd, desc, shortcut in commands:
@@ -69,4 +77,39 @@ class UIManager:
 
         self.console.print(art)
         self.console.print(f"Version: {version}", style="cyan")
-        self.console.print("Repo: [link=https://github.com/patnaikankit/lockr]github.com/patnaikankit/lockr[/link]\n", style="cyan")
\ No newline at end of file
+        self.console.print("Repo: [link=https://github.com/patnaikankit/lockr]github.com/patnaikankit/lockr[/link]\n", style="cyan")
+
+    def stats_table(self, operations):
+        table = Table(title="Timings (ms)", show_lines=False, box=None, padding=(0, 1))
+        table.add_column("Operation", style="white", no_wrap=True)
+        for column in ("Calls", "Mean", "p50", "p95", "p99", "Max"):
+            table.add_column(column, style="dim white", justify="right", no_wrap=True)
+
+        for name, stats in operations.items():
+            table.add_row(
+                name,
+                str(stats["count"]),
+                *(f"{stats[key]:.2f}" for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")),
+            )
+        return table
+
+    def audit_table(self, rows):
+        table = Table(title="Audit")
+        table.add_column("ID", justify="center", style="cyan", no_wrap=True)
+        table.add_column("Website", justify="center", style="cyan", no_wrap=True)
+        table.add_column("Username", justify="center", style="cyan", no_wrap=True)
+        table.add_column("Issue", style="yellow")
+
+        for pw_id, website, username, issue in rows:
+            table.add_row(str(pw_id), website, username, issue)
+        return table
+
+    def vaults_table(self, names, open_names, active):
+        table = Table(title="Vaults")
+        table.add_column("Vault", justify="center", style="cyan", no_wrap=True)
+        table.add_column("Status", justify="center", style="white", no_wrap=True)
+
+        for name in names:
+            status = "active" if name == active else "unlocked" if name in open_names else "locked"
+            table.add_row(name, status)
+        return table
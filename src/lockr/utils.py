@@ -1,10 +1,14 @@
+import os
+import shutil
 import string
-import secrets
+import subprocess
+import sys
 
-def generate_password(length=16) -> str:
-    chars = string.ascii_letters + string.digits + string.punctuation
+from .generator import PasswordPolicy, generate
 
-    return ''.join(secrets.choice(chars) for _ in range(length))
+def generate_password(length=16) -> str:
+    # Always contains every character class, so it passes check_complexity
+    return generate(PasswordPolicy(length=length))
 
 def check_complexity(password: str, min_length: int = 12):
     isValid = True
@@ -30,5 +34,34 @@ def check_complexity(password: str, min_length: int = 12):
         check.append("no punctuation symbols")
         isValid = False
 
-    return isValid, check 
-        
\ No newline at end of file
+    return isValid, check
+
+def _clipboard_command():
+    # A command that reads the clipboard contents from stdin, or None
+    if sys.platform == "darwin":
+        candidates = [("pbcopy",)]
+    elif os.environ.get("WAYLAND_DISPLAY"):
+        candidates = [("wl-copy",)]
+    elif os.environ.get("DISPLAY"):
+        candidates = [("xclip", "-selection", "clipboard"), ("xsel", "--clipboard", "--input")]
+    else:
+        candidates = []
+    return next((command for command in candidates if shutil.which(command[0])), None)
+
+def copy_secret(secret):
+    """Put a SecretBuffer on the clipboard, piping its bytes when a clipboard command exists."""
+    command = _clipboard_command()
+    if command:
+        subprocess.run(command, input=secret.view(), check=True)
+        return
+    # pyperclip only takes a str, which cannot be wiped afterwards
+    import pyperclip
+    pyperclip.copy(secret.decode())
+
+def clear_clipboard():
+    command = _clipboard_command()
+    if command:
+        subprocess.run(command, input=b"", check=True)
+        return
+    import pyperclip
+    pyperclip.copy("")
@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from .crypto import CryptoManager
+from .database import DatabaseManager, VaultError, list_vaults, vault_db_path
+
+# Threads shared by unlock and search; each keeps its own connection per vault
+MAX_THREADS = 8
+
+
+class VaultSet:
+    """Several independently keyed vaults open in one session.
+
+    Each vault is its own database file with its own salt, data key and
+    rotation. Unlocking derives every vault's KDF on its own thread (the KDF
+    releases the GIL), and search fans out to all unlocked vaults at once.
+    """
+
+    def __init__(self):
+        # name -> (DatabaseManager, CryptoManager), in the order vaults were added
+        self.vaults = {}
+        self._pool = ThreadPoolExecutor(MAX_THREADS, thread_name_prefix="lockr-vault")
+
+    def __contains__(self, name):
+        return name in self.vaults
+
+    def __len__(self):
+        return len(self.vaults)
+
+    def names(self):
+        return list(self.vaults)
+
+    def get(self, name):
+        return self.vaults[name]
+
+    def add(self, name, database=None, crypto=None):
+        """Register a vault; only vaults that already exist on disk can be opened by name."""
+        if name not in self.vaults:
+            if database is None:
+                if name not in list_vaults():
+                    raise RuntimeError(f"No vault named {name!r} at {vault_db_path(name)}.")
+                database = DatabaseManager(vault=name)
+            self.vaults[name] = (database, crypto or CryptoManager(database))
+        return self.vaults[name]
+
+    def unlock(self, passwords):
+        """Unlock vaults concurrently from {name: password}; returns {name: unlocked}."""
+        for name in passwords:
+            self.add(name)
+        if not passwords:
+            return {}
+
+        futures = {
+            name: self._pool.submit(self._unlock_one, self.vaults[name][1], password)
+            for name, password in passwords.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+    @staticmethod
+    def _unlock_one(crypto, password):
+        try:
+            return crypto.unlock(password)
+        except VaultError:
+            # A busy or unreadable database is not a wrong password; the caller reports it
+            raise
+        except RuntimeError:
+            # Missing salt or a data key that will not unwrap
+            return False
+
+    def search(self, query, limit=20):
+        """(vault, id, website, username, created_at) rows from every unlocked vault."""
+        results = [
+            (name, self._pool.submit(database.search_passwords, query, limit))
+            for name, (database, crypto) in self.vaults.items() if crypto.fernet
+        ]
+        return [(name, *row) for name, future in results for row in future.result()]
+
+    def remove(self, name):
+        database, crypto = self.vaults.pop(name)
+        crypto.lock()
+        database.close()
+
+    def close(self):
+        for name in list(self.vaults):
+            self.remove(name)
+        self._pool.shutdown()
+
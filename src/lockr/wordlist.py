@@ -0,0 +1,82 @@
+# Bundled passphrase wordlist: 1102 short, common English words, so each word
+# drawn uniformly adds log2(1102) ~= 10.1 bits of entropy.
+WORDS = tuple("""
+able acid acorn actor adapt admit adobe adopt adult agent agile agree ahead aisle alarm
+album alert algae alias alley allow alloy alpha altar amber amino ample amuse anchor
+angel angle ankle annex apple apron arbor arena argue armor aroma arrow artist ascot
+aspen asset atlas atom attic audio audit aunt autumn avenue awake award axis bacon badge
+bagel baker balmy bamboo banjo barge barn baron basil basin batch bath beach beacon beam
+bean bear beaver bed beech beetle begin bell belt bench berry bike bingo birch bird
+bison black blade blank blast blaze blend bliss block bloom blue blunt board boat bold
+bolt bonus book boost boot border bottle bounce bowl box brain brave bread breeze brick
+bride brief bright brisk broad bronze brook broom brush bubble bucket buddy budget
+buffalo bugle build bulb bunch bundle bunny burrow bush butter button buzz cabin cable
+cactus cadet cake calm camel camera camp canal candle candy canoe canvas canyon cape
+caramel carbon cargo carpet carrot cart castle cat cedar cello cement cereal chalk champ
+chapel charm chart chase cheek cheese cherry chess chest chief chime chip choir chord
+chorus cider cinema circle citrus civic claim clam clay clean clerk cliff climb clock
+cloth cloud clover club coach coast cobalt cocoa coconut code coffee coin comet comic
+coral cord cork corn cosmic cotton couch count cousin cover coyote crab craft crane
+crater crayon cream creek crest cricket crisp crown cube cuckoo cumin curtain curve
+cycle cymbal daisy dance dawn deck decor delta denim depot desert desk detail dial diary
+diesel digit dinner direct disco dish divot dock dog dolphin domain dome donkey donut
+door dot dove dozen draft dragon drama drawer dream dress drift drill drive drum duck
+dune dusk dust dwarf eager eagle early earth easel east echo eclipse edge eel effort
+eight elbow elder elect elk elm ember emerald empire empty enamel energy engine enjoy
+entry envoy epoch equal error essay ethic event exact exit expert extra fabric falcon
+fame fancy farm fauna feast feather fence fern ferry fever fiber fiddle field fig film
+final finch fire first fish flag flame flash fleet flint float flock flora flour flute
+foam focus fog folk forest forge fork form fossil fox frame fresh frog frost fruit fudge
+fuel funnel fury fusion gadget galaxy gallon game garden garlic gate gauge gecko gem
+genie gentle ghost giant ginger giraffe glacier glade glass glide globe glove glow glue
+goat gold golf goose gorge grace grain grant grape graph grass gravel gravy green grid
+grill grin grove guard guava guest guide guitar gull gust habit hammer hamster hand
+harbor harp harvest hatch haven hawk hazel heart hedge helmet herb hero heron hill hinge
+hippo hobby hockey honey hood hook hope horizon horn horse hotel hound house hover
+humble hummus hunt husky hybrid hymn icicle icon idea igloo image inch index indigo
+infant ink inlet input insect invent iris iron island ivory ivy jacket jade jaguar jam
+jar jasmine jazz jeans jelly jersey jewel jigsaw jog joke journal joy judge juice jumbo
+jungle junior jury kale kayak kebab keen kennel kettle key kidney kilt kind king kiosk
+kite kitten kiwi knee knife knight knit knob knot koala label lace ladder lagoon lake
+lamb lamp lane lantern laptop large laser latch lava lawn layer leaf ledge lemon lens
+lentil level lever liberty library lilac lily lime linen lion liquid list lizard llama
+lobby lobster local locket lodge logic lotus lounge loyal lucky lumber lunar lunch lyric
+macaw magic magnet major mango manor maple marble march margin marsh mask mason meadow
+medal melody melon member memo mentor menu merit mesa metal meteor method metro middle
+mild mill mimic mind mineral mint mirror mist mitten mixer model modem mohair molar
+moment monk moose morning mosaic moss motel motor mound mouse mouth mural museum music
+mustard myth nacho napkin narrow native nature navy nectar needle nephew nest net nickel
+night nimble ninja noble noodle normal north nose notch note novel nugget number nurse
+nutmeg nylon oak oasis oat ocean octave office olive omega onion opal opera orbit orchid
+order organ origin otter outfit oval oven owl oxygen oyster paddle page paint palace
+palm panda panel panther paper parade parcel park parrot pasta pastel patch path patio
+peach peanut pearl pebble pecan pedal pelican pencil penny pepper perch piano picnic
+pigeon pilot pine pink pioneer pipe pirate pitch pixel pizza plains planet plank plant
+plate plaza plum plume poem poet polar pond pony poppy porch portal potato pottery pouch
+powder prairie praise prism prize proud pudding puffin pulse pumpkin puppy purple puzzle
+pyramid quail quake quartz queen quest quick quiet quill quilt quiz quota rabbit raccoon
+radar radio raft rain rally ramp ranch range rapid raven razor reach ready recipe reef
+relay relic remedy rescue ribbon rice ridge ring ripple river road robin robot rocket
+rodeo roof rookie root rope rose rotor round route rover royal ruby rudder rugby ruler
+rumble rustic saddle safari saga sail salad salmon salon salsa salt sample sand sandal
+satin sauce savvy scale scarf scene school scoop scout screen script scroll season seed
+sensor sequel shadow shark shelf shell shield shine shirt shore shovel shrimp sierra
+signal silk silver siren skate sketch ski skill sky slate sled slope smile smoke snack
+snail snake sneaker snow soap soccer sock sofa solar sonic soup south space spark
+sparrow spice spider spike spinach spiral splash sponge spoon sport spring sprout spruce
+square squid stable stadium stage stairs stamp star statue steam steel stem stereo stick
+stone stool storm story stove straw stream street stripe studio sugar suite summer
+summit sun sunset supper surf swamp swan sweater swift swing symbol syrup table tablet
+taco tail talent tango tank tape target tartan task taxi teacup teapot temple tempo
+tennis tent terrace thimble thistle thread thrive thunder ticket tiger tile timber tiny
+toast toffee tomato tonic topaz torch tortoise totem toucan towel tower toy track
+tractor trail train tray treat tree trend tribe trophy trout truck trumpet trunk tulip
+tuna tundra tunnel turban turkey turnip turtle tutor tuxedo twig twin ukulele ultra
+umbrella uncle unicorn union unit upper urban usher utmost vacuum valley valve vanilla
+vapor vase vault velvet vendor venue verse vessel vest veteran video view villa vine
+vinyl violet violin virtue visor vista vital vivid vocal voice volcano volume voyage
+waffle wagon walnut walrus wand warm wasabi watch water wave wax wealth weasel weather
+wedge wheat wheel whisk whistle willow window winter wizard wolf wombat wonder wood wool
+world wreath wrist yacht yak yard yarn yellow yeti yodel yoga yogurt young yucca zebra
+zen zenith zephyr zero zigzag zinc zipper zodiac zone zoom
+""".split())
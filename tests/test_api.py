@@ -0,0 +1,76 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+
+from lockr.api import ApiServer, hash_token
+from lockr.service import VaultService
+from vaultgen import build_vault
+
+TOKEN = "lockr_test_read_write"
+READ_ONLY_TOKEN = "lockr_test_read_only"
+
+
+class ApiTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Key derivation happens here, outside the event loop
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        database, crypto = build_vault(os.path.join(tmp.name, "api.db"), 3)
+        database.add_api_token("rw", hash_token(TOKEN))
+        database.add_api_token("ro", hash_token(READ_ONLY_TOKEN), read_only=True)
+        self.api = ApiServer(VaultService(database, crypto), port=0)
+
+    async def asyncSetUp(self):
+        server = await self.api.start()
+        self.port = server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.api._server.close()
+        await self.api._server.wait_closed()
+        self.api.close()
+
+    async def post(self, request, token=TOKEN):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        body = json.dumps(request).encode()
+        writer.write(
+            f"POST /v1/request HTTP/1.1\r\nAuthorization: Bearer {token}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        head, _, payload = raw.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(payload)
+
+    async def test_get(self):
+        status, response = await self.post({"op": "get", "id": 1})
+        self.assertEqual(status, 200)
+        self.assertTrue(response["ok"])
+
+    async def test_wrongly_typed_argument_is_a_bad_request(self):
+        status, response = await self.post({"op": "get", "id": [1]})
+        self.assertEqual(status, 400)
+        self.assertFalse(response["ok"])
+
+    async def test_unexpected_error_is_answered(self):
+        with mock.patch.object(self.api.service, "respond", side_effect=AssertionError("boom")):
+            status, response = await self.post({"op": "get", "id": 1})
+        self.assertEqual(status, 500)
+        self.assertFalse(response["ok"])
+
+    async def test_read_only_token_cannot_sync(self):
+        for op in ("sync_state", "sync_changes", "put"):
+            status, _ = await self.post({"op": op, "since": 0}, READ_ONLY_TOKEN)
+            self.assertEqual(status, 403, op)
+        status, _ = await self.post({"op": "list"}, READ_ONLY_TOKEN)
+        self.assertEqual(status, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
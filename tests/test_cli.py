@@ -0,0 +1,65 @@
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+
+from lockr.agent import AgentClient, AgentServer
+from lockr.cli import CLIManager
+from lockr.service import VaultService
+from vaultgen import build_vault
+
+REQUESTS = [{"op": "get", "id": [1]}, {"id": 1}, {"op": "get", "id": 1, "extra": True}, {"op": "get", "id": 1}]
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.database, self.crypto = build_vault(os.path.join(tmp.name, "cli.db"), 2)
+        self.addCleanup(self.database.close)
+
+    def run_batch(self, handler):
+        stdout = io.StringIO()
+        cli = CLIManager(argparse.Namespace(command="batch", no_agent=False), stdin=io.StringIO(
+            "".join(json.dumps(request) + "\n" for request in REQUESTS)
+        ), stdout=stdout)
+        cli._handler = handler
+        self.assertEqual(cli.run(), 1)
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_bad_lines_do_not_stop_the_batch(self):
+        def handler(request):
+            # A backend that fails on the bad line rather than replying
+            if not isinstance(request.get("id"), int):
+                raise TypeError("id must be an int")
+            return {"ok": True}
+
+        replies = self.run_batch(handler)
+        self.assertEqual([reply["ok"] for reply in replies], [False, True, True, True])
+
+    def test_agent_backend_passes_requests_through(self):
+        agent = AgentServer(VaultService(self.database, self.crypto), os.path.join(self.tmp, "agent.sock"))
+        agent.bind()
+        thread = threading.Thread(target=agent.server.serve_forever)
+        thread.start()
+        client = AgentClient(agent.socket_path)
+        try:
+            replies = self.run_batch(client.send)
+        finally:
+            client.close()
+            agent.server.shutdown()
+            thread.join()
+            agent.server.server_close()
+        self.assertEqual([reply["ok"] for reply in replies], [False, False, True, True])
+        self.assertEqual(replies[3]["id"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
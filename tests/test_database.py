@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+
+from lockr.database import BUSY_TIMEOUT_ENV, DatabaseManager, VaultBusyError, VaultError, parse_entry_id
+from lockr.importer import ImportManager
+from vaultgen import build_vault
+
+
+class BusyTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "busy.db")
+        DatabaseManager(db_path=self.path).close()
+
+    def open(self, timeout):
+        with mock.patch.dict(os.environ, {BUSY_TIMEOUT_ENV: str(timeout)}):
+            database = DatabaseManager(db_path=self.path)
+        self.addCleanup(database.close)
+        return database
+
+    def hold_lock(self, seconds):
+        # Another process's write transaction, held for a while
+        holder = self.open(5)
+        locked = threading.Event()
+
+        def hold():
+            with holder.transaction():
+                locked.set()
+                time.sleep(seconds)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        self.addCleanup(thread.join)
+        locked.wait()
+
+    def test_autocommit_write_waits_for_lock(self):
+        database = self.open(5)
+        self.hold_lock(0.5)
+        start = time.monotonic()
+        self.assertEqual(database.reserve_password_ids(3), 1)
+        self.assertGreater(time.monotonic() - start, 0.3)
+
+    def test_autocommit_write_reports_busy(self):
+        database = self.open(0.2)
+        self.hold_lock(1.0)
+        with self.assertRaises(VaultBusyError):
+            database.reserve_password_ids()
+
+
+class DeleteTest(unittest.TestCase):
+    def test_only_deleted_rows_are_reported(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            database = DatabaseManager(db_path=os.path.join(tmp, "delete.db"))
+            self.addCleanup(database.close)
+            pw_id = database.insert_passsword("example.com", "someone", b"token")
+            changed = []
+            database.add_change_listener(changed.append)
+            self.assertFalse(database.delete_password(pw_id + 1))
+            self.assertTrue(database.delete_password(pw_id))
+            self.assertEqual(changed, [pw_id])
+
+
+class ParseEntryIdTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(parse_entry_id(" 12 "), 12)
+        for value in ("abc", "2.0", "0", "-3", ""):
+            with self.assertRaises(VaultError):
+                parse_entry_id(value)
+
+
+class ImportIdTest(unittest.TestCase):
+    def test_entries_added_mid_import_keep_ids_distinct(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "import.db")
+            database, crypto = build_vault(path, 0)
+            other = DatabaseManager(db_path=path)
+            export = os.path.join(tmp, "export.csv")
+            with open(export, "w") as handle:
+                handle.write("website,username,password\n")
+                handle.writelines(f"site{i}.com,user{i},secret{i}\n" for i in range(6))
+
+            def progress(stats):
+                # Another session adds an entry between batches, taking the next predicted id
+                other.insert_passsword(f"other{stats['imported']}.com", "someone", b"token")
+
+            stats = ImportManager(database, crypto, workers=1, batch_size=2).import_file(export, progress=progress)
+            self.assertEqual(stats["imported"], 6)
+            for i in range(6):
+                (pw_id, website, _, _), = database.find_passwords(website=f"site{i}.com", exact=True)
+                _, website, _, token, version = database.fetch_password_entry(pw_id)
+                self.assertEqual(crypto.decrypt_entry(pw_id, website, version, token), f"secret{i}")
+            other.close()
+            database.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
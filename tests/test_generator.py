@@ -0,0 +1,32 @@
+import contextlib
+import io
+import string
+import unittest
+
+from lockr.generator import PasswordPolicy, generate_batch
+from lockr.main import build_parser
+
+
+class PassphraseTest(unittest.TestCase):
+    def test_single_word_has_every_class(self):
+        for phrase in generate_batch(200, PasswordPolicy(mode="passphrase", words=1)):
+            for name, characters in (("upper", string.ascii_uppercase), ("lower", string.ascii_lowercase),
+                                     ("digits", string.digits), ("symbols", string.punctuation)):
+                self.assertTrue(set(phrase) & set(characters), f"{phrase!r} has no {name}")
+
+    def test_separator_supplies_the_symbol(self):
+        for phrase in generate_batch(50, PasswordPolicy(mode="passphrase", words=3)):
+            self.assertEqual(phrase.count("-"), 2)
+            self.assertTrue(phrase[-1].isdigit())
+
+
+class GenerateCountTest(unittest.TestCase):
+    def test_count_must_be_positive(self):
+        for count in ("0", "-1", "x"):
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+                build_parser().parse_args(["generate", "--count", count])
+        self.assertEqual(build_parser().parse_args(["generate", "--count", "3"]).count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
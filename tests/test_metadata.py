@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+
+from lockr.database import parse_entry_id
+from lockr.metadata import MetadataManager
+from vaultgen import build_vault
+
+
+class SealedUpdateTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.database, crypto = build_vault(os.path.join(tmp.name, "sealed.db"), 5)
+        self.addCleanup(self.database.close)
+        MetadataManager(self.database, crypto).seal()
+
+    def test_update_username_by_typed_id(self):
+        # The id as typed at the REPL, converted where it is read
+        website = self.database.fetch_password_entry(2)[1]
+        self.assertTrue(self.database.update_password(parse_entry_id("2"), username="renamed@example.com"))
+        rows = self.database.find_passwords(username="renamed@example.com")
+        self.assertEqual([(row[0], row[1]) for row in rows], [(2, website)])
+
+
+if __name__ == "__main__":
+    unittest.main()
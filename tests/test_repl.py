@@ -0,0 +1,91 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from lockr.crypto import CryptoManager
+from lockr.database import DatabaseManager, resolve_db_path
+from lockr.manager import Server
+
+MASTER_PASSWORD = "correct horse battery staple 42!"
+IDLE_LOCK = 0.3
+
+
+class SlowServer(Server):
+    """Server with a /slow command that outlasts the idle timeout."""
+
+    def dispatch(self, manager_process):
+        if manager_process == "/slow":
+            time.sleep(IDLE_LOCK * 4)
+            self.after_slow = self.is_authenticated
+            return True
+        return super().dispatch(manager_process)
+
+
+class SessionTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = mock.patch.dict(os.environ, {"XDG_DATA_HOME": tmp.name, "LOCKR_IDLE_LOCK": str(IDLE_LOCK)})
+        env.start()
+        self.addCleanup(env.stop)
+        # The vault path is resolved once per process; point it at this test's directory
+        resolve_db_path.cache_clear()
+        self.addCleanup(resolve_db_path.cache_clear)
+        database = DatabaseManager()
+        CryptoManager(database).initialize_key(MASTER_PASSWORD)
+        database.close()
+
+    def run_session(self, lines):
+        server = SlowServer()
+        server.console.quiet = True
+        with mock.patch("sys.stdin", io.StringIO("".join(f"{line}\n" for line in lines))), \
+                mock.patch("sys.stdout", io.StringIO()):
+            server.run()
+        return server
+
+
+class IdleLockTest(SessionTest):
+    def test_running_command_is_not_locked(self):
+        server = self.run_session([MASTER_PASSWORD, "/slow", "/quit"])
+        self.assertTrue(server.after_slow)
+
+    def test_idle_prompt_locks(self):
+        server = SlowServer()
+        server.console.quiet = True
+        reader, writer = os.pipe()
+        os.write(writer, f"{MASTER_PASSWORD}\n".encode())
+
+        def answer_late():
+            # Nothing typed at the first command prompt until the idle lock has fired
+            time.sleep(IDLE_LOCK * 4)
+            self.locked = not server.is_authenticated
+            os.write(writer, f"/quit\n{MASTER_PASSWORD}\n/quit\n".encode())
+
+        threading.Thread(target=answer_late, daemon=True).start()
+        with open(reader) as stdin, mock.patch("sys.stdin", stdin), mock.patch("sys.stdout", io.StringIO()):
+            server.run()
+        os.close(writer)
+        self.assertTrue(self.locked)
+
+
+class EntryIdTest(SessionTest):
+    def setUp(self):
+        super().setUp()
+        database = DatabaseManager()
+        database.insert_passsword("example.com", "someone", b"token")
+        database.close()
+
+    def test_bad_id_is_reported_and_session_continues(self):
+        server = self.run_session([MASTER_PASSWORD, "/delete", "abc", "/slow", "/quit"])
+        self.assertTrue(server.after_slow)
+        database = DatabaseManager()
+        self.addCleanup(database.close)
+        self.assertIsNotNone(database.fetch_password_entry(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
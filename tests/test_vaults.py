@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+
+from lockr.database import VaultBusyError
+from lockr.vaults import VaultSet
+from vaultgen import MASTER_PASSWORD, build_vault
+
+
+class UnlockTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        database, crypto = build_vault(os.path.join(tmp.name, "vault.db"), 1)
+        crypto.lock()
+        self.vaults = VaultSet()
+        self.addCleanup(self.vaults.close)
+        self.vaults.add("main", database)
+
+    def test_wrong_password(self):
+        self.assertEqual(self.vaults.unlock({"main": "not it"}), {"main": False})
+        self.assertEqual(self.vaults.unlock({"main": MASTER_PASSWORD}), {"main": True})
+
+    def test_busy_vault_is_not_a_wrong_password(self):
+        database = self.vaults.get("main")[0]
+        with mock.patch.object(database, "get_kdf_settings", side_effect=VaultBusyError("busy")):
+            with self.assertRaises(VaultBusyError):
+                self.vaults.unlock({"main": MASTER_PASSWORD})
+
+
+if __name__ == "__main__":
+    unittest.main()